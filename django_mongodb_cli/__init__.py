@@ -2,6 +2,7 @@ import sys
 import typer
 
 from .app import app
+from .mongo import mongo
 from .project import project
 from .repo import repo
 
@@ -28,5 +29,6 @@ def main(ctx: typer.Context):
 
 
 dm.add_typer(app, name="app")
+dm.add_typer(mongo, name="mongo")
 dm.add_typer(project, name="project")
 dm.add_typer(repo, name="repo")
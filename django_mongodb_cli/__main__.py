@@ -0,0 +1,3 @@
+from . import dm
+
+dm(prog_name="dm")
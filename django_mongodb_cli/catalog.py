@@ -0,0 +1,211 @@
+import ast
+import fnmatch
+import json
+import re
+from pathlib import Path
+
+
+class TestCatalog:
+    """
+    Cached catalog of the tests defined in a repository's test files: test
+    functions, and test methods of classes, found by parsing each file with
+    ``ast``. A file is parsed again only when its mtime or size changes.
+    """
+
+    # Bumped when the format of the cached tests changes
+    VERSION = 1
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def load(self) -> dict:
+        try:
+            return json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def refresh(self, files: list) -> dict:
+        """
+        Return the tests of each file as ``[class, name, cases, markers]`` lists, keyed
+        by path, reparsing the files that changed since they were cached.
+        """
+        cached = self.load()
+        catalog = {}
+        changed = False
+        for file in files:
+            key = str(file)
+            try:
+                stat = file.stat()
+            except OSError:
+                continue
+            entry = cached.get(key)
+            if (
+                not entry
+                or entry.get("version") != self.VERSION
+                or entry["mtime"] != stat.st_mtime_ns
+                or entry["size"] != stat.st_size
+            ):
+                entry = {
+                    "version": self.VERSION,
+                    "mtime": stat.st_mtime_ns,
+                    "size": stat.st_size,
+                    "tests": self.parse(file),
+                }
+                changed = True
+            catalog[key] = entry
+        if changed or catalog.keys() != cached.keys():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(json.dumps(catalog))
+        return {key: entry["tests"] for key, entry in catalog.items()}
+
+    @classmethod
+    def parse(cls, file: Path) -> list:
+        """
+        Return the tests defined at the top level of a file. Classes count as
+        test classes when they have bases or are named ``Test*``, and inherit
+        test methods from classes defined in the same file. ``cases`` is the
+        number of parametrized cases, when their values are literal, and
+        ``markers`` the names of the pytest marks of the test and its class.
+        """
+        try:
+            tree = ast.parse(file.read_bytes(), filename=str(file))
+        except (SyntaxError, ValueError, OSError):
+            return []
+        functions = (ast.FunctionDef, ast.AsyncFunctionDef)
+        classes = {
+            node.name: node for node in tree.body if isinstance(node, ast.ClassDef)
+        }
+
+        def methods(node, seen):
+            found = {
+                item.name: item
+                for item in node.body
+                if isinstance(item, functions) and item.name.startswith("test")
+            }
+            for base in node.bases:
+                if (
+                    isinstance(base, ast.Name)
+                    and base.id in classes
+                    and base.id not in seen
+                ):
+                    seen.add(base.id)
+                    for name, item in methods(classes[base.id], seen).items():
+                        found.setdefault(name, item)
+            return found
+
+        tests = []
+        for node in tree.body:
+            if isinstance(node, functions) and node.name.startswith("test"):
+                tests.append(["", node.name, cls.cases(node), cls.markers(node)])
+            elif isinstance(node, ast.ClassDef) and (
+                node.bases or node.name.startswith("Test")
+            ):
+                class_markers = cls.markers(node)
+                for name, item in sorted(methods(node, {node.name}).items()):
+                    markers = sorted({*class_markers, *cls.markers(item)})
+                    tests.append([node.name, name, cls.cases(item), markers])
+        return tests
+
+    @staticmethod
+    def markers(node) -> list:
+        """Return the names of the ``pytest.mark`` decorators of a node."""
+        markers = set()
+        for decorator in node.decorator_list:
+            if isinstance(decorator, ast.Call):
+                decorator = decorator.func
+            if (
+                isinstance(decorator, ast.Attribute)
+                and isinstance(decorator.value, ast.Attribute)
+                and decorator.value.attr == "mark"
+            ) or (
+                isinstance(decorator, ast.Attribute)
+                and isinstance(decorator.value, ast.Name)
+                and decorator.value.id == "mark"
+            ):
+                markers.add(decorator.attr)
+        return sorted(markers)
+
+    @staticmethod
+    def cases(node) -> int:
+        """Count the cases of a test from its literal parametrize decorators."""
+        cases = 1
+        for decorator in node.decorator_list:
+            if not (
+                isinstance(decorator, ast.Call)
+                and isinstance(decorator.func, ast.Attribute)
+                and decorator.func.attr == "parametrize"
+            ):
+                continue
+            values = decorator.args[1] if len(decorator.args) > 1 else None
+            for keyword in decorator.keywords:
+                if keyword.arg == "argvalues":
+                    values = keyword.value
+            if isinstance(values, (ast.List, ast.Tuple, ast.Set)):
+                cases *= len(values.elts)
+        return cases
+
+
+KEYWORD_TOKEN_RE = re.compile(r"\(|\)|[^\s()]+")
+
+# Syntax nodes a translated -k expression may contain
+KEYWORD_NODES = (
+    ast.Expression,
+    ast.BoolOp,
+    ast.And,
+    ast.Or,
+    ast.UnaryOp,
+    ast.Not,
+    ast.Call,
+    ast.Name,
+    ast.Load,
+    ast.Constant,
+)
+
+
+def pytest_keyword_matcher(expression: str) -> callable:
+    """
+    Return a function telling whether a test, given the names of the test
+    and its parents, matches a pytest ``-k`` expression: words combined with
+    ``and``, ``or``, ``not`` and parentheses, each matching a name by
+    case-insensitive substring. Raise ``ValueError`` if the expression is
+    invalid, e.g. two words without an operator between them.
+    """
+    tokens = []
+    for token in KEYWORD_TOKEN_RE.findall(expression):
+        if token in ("(", ")", "and", "or", "not"):
+            tokens.append(token)
+        else:
+            tokens.append(f"match({token.lower()!r})")
+    try:
+        tree = ast.parse(" ".join(tokens) or "True", "<-k>", "eval")
+    except SyntaxError:
+        tree = None
+    # A word followed by a parenthesis parses as a call of its result
+    if tree is None or not all(
+        isinstance(node, KEYWORD_NODES)
+        and not (isinstance(node, ast.Call) and not isinstance(node.func, ast.Name))
+        for node in ast.walk(tree)
+    ):
+        raise ValueError(f"Invalid -k expression: {expression}")
+    code = compile(tree, "<-k>", "eval")
+
+    def matches(names: list) -> bool:
+        lowered = [name.lower() for name in names]
+
+        def match(word):
+            return any(word in name for name in lowered)
+
+        return eval(code, {"__builtins__": {}}, {"match": match})
+
+    return matches
+
+
+def unittest_keyword_matcher(pattern: str) -> callable:
+    """
+    Return a function telling whether a dotted test id matches a ``-k``
+    pattern the way unittest does: a substring, or an fnmatch pattern if it
+    contains ``*``.
+    """
+    if "*" not in pattern:
+        pattern = f"*{pattern}*"
+    return lambda test_id: fnmatch.fnmatchcase(test_id, pattern)
@@ -0,0 +1,88 @@
+import hashlib
+import json
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+
+
+def git_blob_hash(path: Path) -> str:
+    """Return the git blob id of a file, as `git hash-object` computes it."""
+    data = path.read_bytes()
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+class ImpactMap:
+    """
+    Test impact map of a repository: the combined coverage data of a full run
+    with one coverage context per test, plus the HEAD commit of every
+    workspace repository and the git blob of every measured file at build
+    time. Code executed outside of any test, e.g. at import time, has the
+    empty context.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS builds (
+        repo TEXT PRIMARY KEY,
+        built TEXT NOT NULL,
+        heads TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS files (
+        repo TEXT NOT NULL,
+        file TEXT NOT NULL,
+        blob TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS files_file ON files (repo, file);
+    """
+
+    def __init__(self, path: Path):
+        self.path = path / "impact.sqlite"
+
+    def connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        conn.executescript(self.SCHEMA)
+        return conn
+
+    def coverage_file(self, repo_name: str) -> Path:
+        return self.path.parent / f"{repo_name}.coverage"
+
+    def save(self, repo_name: str, heads: dict, blobs: dict) -> None:
+        """Record a build of the map; its coverage data is already in place."""
+        with closing(self.connect()) as conn, conn:
+            conn.execute("DELETE FROM files WHERE repo = ?", (repo_name,))
+            conn.executemany(
+                "INSERT INTO files (repo, file, blob) VALUES (?, ?, ?)",
+                ((repo_name, file, blob) for file, blob in blobs.items()),
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO builds (repo, built, heads) VALUES (?, ?, ?)",
+                (repo_name, time.strftime("%Y-%m-%d %H:%M:%S"), json.dumps(heads)),
+            )
+
+    def heads(self, repo_name: str) -> dict | None:
+        """Return the workspace HEAD commits the map was built at, if any."""
+        if not self.path.exists() or not self.coverage_file(repo_name).exists():
+            return None
+        with closing(self.connect()) as conn:
+            row = conn.execute(
+                "SELECT heads FROM builds WHERE repo = ?", (repo_name,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def blobs(self, repo_name: str, files: set) -> dict:
+        """Return the git blob each of ``files`` had when it was measured."""
+        blobs = {}
+        files = sorted(files)
+        with closing(self.connect()) as conn:
+            # Stay below SQLite's limit on bound parameters
+            for i in range(0, len(files), 500):
+                chunk = files[i : i + 500]
+                blobs.update(
+                    conn.execute(
+                        "SELECT file, blob FROM files WHERE repo = ? AND file IN "
+                        f"({', '.join('?' * len(chunk))})",
+                        (repo_name, *chunk),
+                    )
+                )
+        return blobs
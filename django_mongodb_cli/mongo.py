@@ -0,0 +1,52 @@
+import typer
+
+from .mongo_pool import MongoPool
+
+mongo = typer.Typer(help="Manage local MongoDB servers.")
+
+pool = typer.Typer(
+    help="Manage a pool of ephemeral mongod processes for parallel test workers."
+)
+mongo.add_typer(pool, name="pool")
+
+
+@pool.command("up")
+def pool_up(
+    ctx: typer.Context,
+    size: int = typer.Option(
+        2, "--size", "-n", min=1, help="Number of mongod processes to start"
+    ),
+    replica_set: bool = typer.Option(
+        False,
+        "--replica-set",
+        help="Run each mongod as a single-node replica set (needed for transactions)",
+    ),
+):
+    """
+    Start mongod processes with dbpaths on tmpfs and random ports.
+    `dm repo test --jobs N` hands each worker its own server from the pool.
+    """
+    mongo_pool = MongoPool()
+    mongo_pool.ctx = ctx
+    if not mongo_pool.up(size, replica_set):
+        raise typer.Exit(1)
+
+
+@pool.command("down")
+def pool_down(ctx: typer.Context):
+    """
+    Stop the pool's mongod processes and delete their data.
+    """
+    mongo_pool = MongoPool()
+    mongo_pool.ctx = ctx
+    mongo_pool.down()
+
+
+@pool.command("status")
+def pool_status(ctx: typer.Context):
+    """
+    Show the pool's mongod processes and their URIs.
+    """
+    mongo_pool = MongoPool()
+    mongo_pool.ctx = ctx
+    mongo_pool.status()
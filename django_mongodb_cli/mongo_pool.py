@@ -0,0 +1,272 @@
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from pathlib import Path
+
+import typer
+
+from .workspace import Workspace
+
+
+class MongoPool(Workspace):
+    """
+    A pool of ephemeral local mongod processes, each with its dbpath on tmpfs
+    and a random port, so that concurrent test workers never share a server.
+
+    ``dm mongo pool up`` records its members in the cache directory, where
+    ``dm repo test`` finds them; ``start()`` and ``stop()`` also serve private
+    pools that live for a single test run.
+    """
+
+    @property
+    def mongo_cfg(self) -> dict:
+        return self.tool_cfg.get("mongo", {}) or {}
+
+    def mongod_path(self) -> str | None:
+        """The mongod binary: ``mongod`` in [tool.django-mongodb-cli.mongo] or $PATH."""
+        return self.mongo_cfg.get("mongod") or shutil.which("mongod")
+
+    def pool_dir(self) -> Path:
+        """
+        Parent directory of the dbpaths: ``pool_dir`` in the mongo config, or
+        /dev/shm when it exists so data never touches the disk.
+        """
+        configured = self.mongo_cfg.get("pool_dir")
+        if configured:
+            return Path(configured).expanduser()
+        shm = Path("/dev/shm")
+        return shm if shm.is_dir() else Path(tempfile.gettempdir())
+
+    @staticmethod
+    def free_port() -> int:
+        with closing(socket.socket()) as sock:
+            sock.bind(("127.0.0.1", 0))
+            return sock.getsockname()[1]
+
+    @staticmethod
+    def is_running(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    @staticmethod
+    def wait_ready(proc: subprocess.Popen, port: int, timeout: float = 30) -> bool:
+        """Wait until mongod accepts connections, or has exited."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if proc.poll() is not None:
+                return False
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            except OSError:
+                time.sleep(0.1)
+                continue
+            try:
+                from pymongo import MongoClient
+                from pymongo.errors import PyMongoError
+            except ImportError:
+                return True
+            client = MongoClient(port=port, directConnection=True)
+            try:
+                client.admin.command("ping")
+                return True
+            except PyMongoError:
+                time.sleep(0.1)
+            finally:
+                client.close()
+        return False
+
+    def initiate(self, port: int, timeout: float = 30) -> bool:
+        """Initiate a single-node replica set and wait for it to be primary."""
+        try:
+            from pymongo import MongoClient
+            from pymongo.errors import PyMongoError
+        except ImportError:
+            self.err("❌ pymongo is required to initiate a replica set.")
+            return False
+        client = MongoClient(port=port, directConnection=True)
+        try:
+            client.admin.command(
+                "replSetInitiate",
+                {
+                    "_id": f"dm{port}",
+                    "members": [{"_id": 0, "host": f"127.0.0.1:{port}"}],
+                },
+            )
+            deadline = time.monotonic() + timeout
+            while time.monotonic() < deadline:
+                if client.admin.command("hello").get("isWritablePrimary"):
+                    return True
+                time.sleep(0.2)
+        except PyMongoError as e:
+            self.err(f"❌ Failed to initiate replica set on port {port}: {e}")
+        finally:
+            client.close()
+        return False
+
+    def start_member(
+        self, mongod: str, replica_set: bool = False, detach: bool = True
+    ) -> dict | None:
+        """
+        Start one mongod on a free port and wait for it. Detached members run
+        in their own session and outlive dm; the others get the terminal's
+        Ctrl-C together with dm.
+        """
+        dbpath = Path(tempfile.mkdtemp(prefix="dm-mongod-", dir=self.pool_dir()))
+        # Another process may grab the port between probing and binding it
+        for _ in range(3):
+            port = self.free_port()
+            args = [
+                mongod,
+                "--port",
+                str(port),
+                "--bind_ip",
+                "127.0.0.1",
+                "--dbpath",
+                str(dbpath),
+                "--logpath",
+                str(dbpath / "mongod.log"),
+                # Many members share the machine's memory
+                "--wiredTigerCacheSizeGB",
+                "0.25",
+            ]
+            if replica_set:
+                args += ["--replSet", f"dm{port}"]
+            proc = subprocess.Popen(
+                args,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                start_new_session=detach,
+            )
+            if self.wait_ready(proc, port):
+                break
+            proc.kill()
+            proc.wait()
+        else:
+            log = dbpath / "mongod.log"
+            tail = (
+                log.read_text(errors="replace").splitlines()[-3:]
+                if log.exists()
+                else []
+            )
+            self.err(f"❌ mongod failed to start: {' '.join(tail)}")
+            shutil.rmtree(dbpath, ignore_errors=True)
+            return None
+
+        member = {
+            "pid": proc.pid,
+            "port": port,
+            "dbpath": str(dbpath),
+            "uri": f"mongodb://127.0.0.1:{port}/?directConnection=true",
+            "replica_set": replica_set,
+        }
+        if replica_set and not self.initiate(port):
+            self.stop_members([member])
+            return None
+        return member
+
+    def start(
+        self, size: int, replica_set: bool = False, detach: bool = True
+    ) -> list | None:
+        """Start ``size`` members concurrently; all of them or none."""
+        mongod = self.mongod_path()
+        if not mongod:
+            self.err(
+                "❌ mongod not found. Set `mongod` under [tool.django-mongodb-cli.mongo] "
+                "or add it to PATH."
+            )
+            return None
+        self.info(f"Starting {size} mongod processes with dbpaths in {self.pool_dir()}")
+        with ThreadPoolExecutor(max_workers=size) as executor:
+            members = list(
+                executor.map(
+                    lambda _: self.start_member(mongod, replica_set, detach),
+                    range(size),
+                )
+            )
+        started = [m for m in members if m]
+        if len(started) < size:
+            self.stop_members(started)
+            return None
+        return started
+
+    def stop_members(self, members: list, timeout: float = 15) -> None:
+        """Shut members down cleanly (SIGKILL after ``timeout``) and remove their data."""
+        for member in members:
+            if self.is_running(member["pid"]):
+                try:
+                    os.kill(member["pid"], signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+        deadline = time.monotonic() + timeout
+        for member in members:
+            while self.is_running(member["pid"]) and time.monotonic() < deadline:
+                try:
+                    # Reap our own children so they don't linger as zombies
+                    if os.waitpid(member["pid"], os.WNOHANG)[0]:
+                        break
+                except ChildProcessError:
+                    pass
+                time.sleep(0.1)
+            if self.is_running(member["pid"]):
+                try:
+                    os.kill(member["pid"], signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+            shutil.rmtree(member["dbpath"], ignore_errors=True)
+
+    def members(self) -> list:
+        """Return the live members of the pool started by ``dm mongo pool up``."""
+        members = self.load_state("mongo-pool.json").get("members", [])
+        return [m for m in members if self.is_running(m["pid"])]
+
+    def uris(self) -> list:
+        return [member["uri"] for member in self.members()]
+
+    def up(self, size: int, replica_set: bool = False) -> bool:
+        members = self.members()
+        if members:
+            self.warn(
+                f"A pool of {len(members)} mongod processes is already up; "
+                "run `dm mongo pool down` first."
+            )
+            return False
+        members = self.start(size, replica_set)
+        if not members:
+            return False
+        self.save_state("mongo-pool.json", {"members": members})
+        self.status()
+        return True
+
+    def down(self) -> None:
+        members = self.load_state("mongo-pool.json").get("members", [])
+        if not members:
+            self.info("No mongod pool is up.")
+            return
+        self.stop_members(members)
+        self.save_state("mongo-pool.json", {})
+        self.ok(f"✅ Stopped {len(members)} mongod processes.")
+
+    def status(self) -> None:
+        members = self.load_state("mongo-pool.json").get("members", [])
+        if not members:
+            self.info("No mongod pool is up.")
+            return
+        self.title(f"{'Port':<6}  {'PID':<8}  {'State':<8}  URI")
+        for member in members:
+            running = self.is_running(member["pid"])
+            self._msg(
+                f"{member['port']:<6}  {member['pid']:<8}  "
+                f"{'up' if running else 'down':<8}  {member['uri']}",
+                typer.colors.GREEN if running else typer.colors.RED,
+            )
@@ -1,5 +1,6 @@
 import typer
 import os
+import re
 import shlex
 
 from .utils import Package, Repo, Test
@@ -38,6 +39,44 @@ def repo_command(
         typer.echo(typer.style(missing_msg, fg=typer.colors.YELLOW))
 
 
+def select_repos(
+    repo_instance: Repo,
+    repo_name: str,
+    all_repos: bool,
+    group: str,
+    missing_msg: str,
+) -> list:
+    """
+    Resolve a repository name, --group or --all-repos into a list of
+    repository names, exiting with an error on invalid combinations.
+    """
+    if group and all_repos:
+        typer.echo(
+            typer.style(
+                "Cannot use --group and --all-repos together. Please use one or the other.",
+                fg=typer.colors.RED,
+            )
+        )
+        raise typer.Exit(1)
+    if group:
+        group_repos = repo_instance.get_group_repos(group)
+        if not group_repos:
+            typer.echo(
+                typer.style(
+                    f"Group '{group}' not found. Use --list-groups to see available groups.",
+                    fg=typer.colors.RED,
+                )
+            )
+            raise typer.Exit(1)
+        return list(group_repos)
+    if all_repos:
+        return list(repo_instance.map)
+    if repo_name:
+        return [repo_name]
+    typer.echo(typer.style(missing_msg, fg=typer.colors.YELLOW))
+    raise typer.Exit()
+
+
 @repo.callback(invoke_without_command=True)
 def main(
     ctx: typer.Context,
@@ -300,6 +339,51 @@ def fetch(
     )
 
 
+hooks = typer.Typer(
+    help="Manage pre-commit hooks.",
+    context_settings={"help_option_names": ["-h", "--help"]},
+)
+repo.add_typer(hooks, name="hooks")
+
+
+@hooks.command("warm")
+def hooks_warm(
+    ctx: typer.Context,
+    repo_name: str = typer.Argument(None),
+    all_repos: bool = typer.Option(False, "--all-repos", "-a", help=HELP_ALL_REPOS),
+    group: str = typer.Option(None, "--group", "-g", help=HELP_GROUP),
+    list_groups: bool = typer.Option(
+        False, "--list-groups", "-l", help=HELP_LIST_GROUPS
+    ),
+    jobs: int = typer.Option(
+        4, "--jobs", "-j", min=1, help="Number of distinct configs to warm concurrently"
+    ),
+    force: bool = typer.Option(
+        False, "--force", "-f", help="Warm even if .pre-commit-config.yaml is unchanged"
+    ),
+):
+    """
+    Install pre-commit hook environments ahead of the first commit.
+    Distinct configs are warmed concurrently, identical configs once;
+    unchanged configs are skipped.
+    """
+    repo_instance = Repo()
+    repo_instance.ctx = ctx
+
+    if list_groups:
+        repo_instance.list_groups()
+        raise typer.Exit()
+
+    repo_names = select_repos(
+        repo_instance,
+        repo_name,
+        all_repos,
+        group,
+        missing_msg="Please specify a repository name, use --group to warm a group, or use -a,--all-repos to warm all repositories.",
+    )
+    repo_instance.warm_hooks(repo_names, jobs=jobs, force=force)
+
+
 @repo.command()
 def install(
     repo_name: str = typer.Argument(None),
@@ -308,19 +392,47 @@ def install(
     list_groups: bool = typer.Option(
         False, "--list-groups", "-l", help=HELP_LIST_GROUPS
     ),
+    locked: bool = typer.Option(
+        False,
+        "--locked",
+        help="Sync the environment to the group's lock file without resolving (requires --group)",
+    ),
+    jobs: int = typer.Option(
+        1, "--jobs", "-j", min=1, help="Number of repositories to install concurrently"
+    ),
+    build_jobs: str = typer.Option(
+        None,
+        "--build-jobs",
+        help="Total parallel native build jobs shared by all installs (a number or 'auto')",
+    ),
 ):
     """
     Install Python package found in the specified repository.
     If --all-repos is used, install packages for all repositories.
     If --group is used, install all repositories in the specified group.
     If --list-groups is used, list available repository groups.
+    If --locked is used with --group, sync the environment to the group's lock file.
+    If --jobs is used, install that many repositories concurrently.
+    If --build-jobs is used, native builds share that many parallel jobs.
     """
     repo_instance = Repo()
+    package_instance = Package()
+    package_instance.set_jobs(jobs)
+    package_instance.set_build_jobs(build_jobs)
 
     if list_groups:
         repo_instance.list_groups()
         raise typer.Exit()
 
+    if locked and not group:
+        typer.echo(
+            typer.style(
+                "--locked requires --group. Create a lock with: dm repo lock --group <group>",
+                fg=typer.colors.RED,
+            )
+        )
+        raise typer.Exit(1)
+
     if group:
         # Install all repos in the specified group
         group_repos = repo_instance.get_group_repos(group)
@@ -340,9 +452,10 @@ def install(
             )
         )
 
-        package_instance = Package()
-        for repo in group_repos:
-            package_instance.install_package(repo)
+        if locked:
+            package_instance.install_locked(group)
+        else:
+            package_instance.install_packages(group_repos)
 
         typer.echo(
             typer.style(
@@ -352,16 +465,99 @@ def install(
         )
         return
 
+    if all_repos:
+        typer.echo(typer.style("Installing all repositories...", fg=typer.colors.CYAN))
+        package_instance.install_packages(list(package_instance.map))
+        return
+
     repo_command(
         all_repos,
         repo_name,
         all_msg="Installing all repositories...",
         missing_msg="Please specify a repository name, use --group to install a group, use --list-groups to see available groups, or use -a,--all-repos to install all repositories.",
-        single_func=lambda repo_name: Package().install_package(repo_name),
-        all_func=lambda repo_name: Package().install_package(repo_name),
+        single_func=lambda repo_name: package_instance.install_package(repo_name),
+        all_func=lambda repo_name: package_instance.install_package(repo_name),
     )
 
 
+@repo.command()
+def lint(
+    ctx: typer.Context,
+    repo_name: str = typer.Argument(None),
+    all_repos: bool = typer.Option(False, "--all-repos", "-a", help=HELP_ALL_REPOS),
+    group: str = typer.Option(None, "--group", "-g", help=HELP_GROUP),
+    list_groups: bool = typer.Option(
+        False, "--list-groups", "-l", help=HELP_LIST_GROUPS
+    ),
+    jobs: int = typer.Option(
+        4, "--jobs", "-j", min=1, help="Number of repositories to lint concurrently"
+    ),
+):
+    """
+    Run pre-commit hooks on changed files only.
+    Changed files are working tree changes plus the branch's commits
+    since its upstream. Repositories are linted concurrently and the
+    results shown in one table.
+    """
+    repo_instance = Repo()
+    repo_instance.ctx = ctx
+
+    if list_groups:
+        repo_instance.list_groups()
+        raise typer.Exit()
+
+    repo_names = select_repos(
+        repo_instance,
+        repo_name,
+        all_repos,
+        group,
+        missing_msg="Please specify a repository name, use --group to lint a group, or use -a,--all-repos to lint all repositories.",
+    )
+    if not repo_instance.lint_repos(repo_names, jobs=jobs):
+        raise typer.Exit(1)
+
+
+@repo.command()
+def lock(
+    group: str = typer.Option(None, "--group", "-g", help=HELP_GROUP),
+    list_groups: bool = typer.Option(
+        False, "--list-groups", "-l", help=HELP_LIST_GROUPS
+    ),
+):
+    """
+    Lock the third-party dependencies of a group of repositories.
+    Resolves all workspace editables, extras and dependency groups
+    with `uv pip compile` so `dm repo install --group <group> --locked`
+    can install without resolving.
+    """
+    package_instance = Package()
+
+    if list_groups:
+        package_instance.list_groups()
+        raise typer.Exit()
+
+    if not group:
+        typer.echo(
+            typer.style(
+                "Please specify a group with --group, or use --list-groups to see available groups.",
+                fg=typer.colors.YELLOW,
+            )
+        )
+        raise typer.Exit()
+
+    if not package_instance.get_group_repos(group):
+        typer.echo(
+            typer.style(
+                f"Group '{group}' not found. Use --list-groups to see available groups.",
+                fg=typer.colors.RED,
+            )
+        )
+        raise typer.Exit(1)
+
+    if not package_instance.lock_group(group):
+        raise typer.Exit(1)
+
+
 @repo.command()
 def log(
     repo_name: str = typer.Argument(None),
@@ -741,6 +937,7 @@ def remove(
     ctx: typer.Context,
     repo_name: str = typer.Argument(None),
     all_repos: bool = typer.Option(False, "--all-repos", "-a", help=HELP_ALL_REPOS),
+    group: str = typer.Option(None, "--group", "-g", help=HELP_GROUP),
     uninstall: bool = typer.Option(
         False, "--uninstall", "-u", help=HELP_UNINSTALL_BEFORE
     ),
@@ -748,11 +945,29 @@ def remove(
     """
     Delete the specified repository.
     If --all-repos is used, delete all repositories.
+    If --group is used, delete all repositories in the specified group.
     If --uninstall is used, uninstall the package before deleting.
     """
     repo = Repo()
     repo.ctx = ctx
 
+    if group or all_repos:
+        repo_names = select_repos(repo, repo_name, all_repos, group, missing_msg="")
+        typer.echo(
+            typer.style(
+                f"Deleting repositories: {', '.join(repo_names)}",
+                fg=typer.colors.RED,
+            )
+        )
+        if uninstall:
+            # Uninstall everything in one pip call before deleting the sources
+            package = Package()
+            package.ctx = ctx
+            package.uninstall_packages(repo_names)
+        for name in repo_names:
+            repo.delete_repo(name)
+        return
+
     def do_delete(name):
         if uninstall:
             Package().uninstall_package(name)
@@ -762,7 +977,7 @@ def remove(
         all_repos,
         repo_name,
         all_msg="Deleting all repositories...",
-        missing_msg="Please specify a repository name or use -a,--all-repos to delete all repositories.",
+        missing_msg="Please specify a repository name, use --group to delete a group, or use -a,--all-repos to delete all repositories.",
         single_func=do_delete,
         all_func=do_delete,
         fg=typer.colors.RED,  # Red for delete
@@ -1102,6 +1317,17 @@ def test(
     ctx: typer.Context,
     repo_name: str = typer.Argument(None),
     modules: list[str] = typer.Argument(None),
+    group: str = typer.Option(
+        None,
+        "--group",
+        "-g",
+        help="Run the tests of every repository in the group that has test settings, concurrently",
+    ),
+    all_configured: bool = typer.Option(
+        False,
+        "--all-configured",
+        help="Run the tests of every repository that has test settings, concurrently",
+    ),
     keep_db: bool = typer.Option(
         False, "--keepdb", help="Keep the database after tests"
     ),
@@ -1111,6 +1337,11 @@ def test(
     list_tests: bool = typer.Option(
         False, "--list-tests", "-l", help="List tests instead of running them"
     ),
+    dry_run: bool = typer.Option(
+        False,
+        "--dry-run",
+        help="Show the tests --keyword would select, without running them",
+    ),
     setenv: bool = typer.Option(
         False,
         "--setenv",
@@ -1121,13 +1352,137 @@ def test(
         None,
         help="Optional MongoDB connection URI. Falls back to $MONGODB_URI if not provided.",
     ),
+    jobs: int = typer.Option(
+        1,
+        "--jobs",
+        "-j",
+        min=1,
+        help="Run configured test directories concurrently in N workers, each with its own database (./runtests.py suites: --parallel N)",
+    ),
+    single_session: bool = typer.Option(
+        False,
+        "--single-session",
+        help="Run all configured test directories in one pytest session, skipping directories that fail to import",
+    ),
+    shard: str = typer.Option(
+        None,
+        "--shard",
+        metavar="K/N",
+        help="Run only shard K of N, with test modules balanced by historical duration",
+    ),
+    slowest: int = typer.Option(
+        None,
+        "--slowest",
+        min=1,
+        metavar="N",
+        help="Show the N slowest tests from recorded timings instead of running tests",
+    ),
+    trend: int = typer.Option(
+        None,
+        "--trend",
+        min=1,
+        metavar="N",
+        help="Show durations of the last N recorded runs instead of running tests",
+    ),
+    affected: bool = typer.Option(
+        False,
+        "--affected",
+        help="Run only tests affected by changes in the workspace, using a coverage-based impact map",
+    ),
+    result_cache: bool = typer.Option(
+        True,
+        "--cache/--no-cache",
+        help="Skip test modules that passed before with the same inputs",
+    ),
+    mongo_pool: bool = typer.Option(
+        False,
+        "--mongo-pool",
+        help="Start a private mongod per --jobs worker for this run and stop it afterwards",
+    ),
+    last_failed: bool = typer.Option(
+        False,
+        "--last-failed",
+        "--lf",
+        help="Run only the tests that failed when last run",
+    ),
+    failed_first: bool = typer.Option(
+        False,
+        "--failed-first",
+        "--ff",
+        help="Run the tests that failed when last run first, then the rest",
+    ),
+    db_snapshot: bool = typer.Option(
+        False,
+        "--db-snapshot",
+        help="Restore the migrated test database from a snapshot instead of running migrations",
+    ),
+    rerun_failures: int = typer.Option(
+        0,
+        "--rerun-failures",
+        min=0,
+        help="Rerun failed tests up to N times in a fresh process, recording those that pass as flaky",
+    ),
+    quarantine: bool = typer.Option(
+        False,
+        "--quarantine",
+        help="Run recently flaky tests separately, after the other tests and at a lower priority",
+    ),
+    mongo_stats: bool = typer.Option(
+        False,
+        "--mongo-stats",
+        help="Count the MongoDB commands, time and bytes of each test and rank the tests by them",
+    ),
+    coverage: bool = typer.Option(
+        False,
+        "--coverage",
+        help="Measure coverage across all test processes and write a combined HTML and XML report of the workspace's editable packages",
+    ),
+    warm: bool = typer.Option(
+        False,
+        "--warm",
+        help="Fork the tests from a background process with Django, PyMongo and the test settings preloaded, restarted when workspace sources change",
+    ),
+    watch: bool = typer.Option(
+        False,
+        "--watch",
+        help="Watch the workspace packages and test directories and rerun the tests mapped to each change",
+    ),
+    flaky: bool = typer.Option(
+        False,
+        "--flaky",
+        help="Show the recorded flaky tests and how often they were flaky",
+    ),
 ):
     """
     Run tests for a repository.
     If --modules is provided, run tests for the specified modules.
     If --keepdb is used, keep the database after tests.
     If --keyword is provided, run tests with the specified keyword.
+    If --dry-run is used, show the tests --keyword selects without running them.
     If --setenv is used, set the DJANGO_SETTINGS_MODULE environment variable.
+    If --jobs is used, run the configured test directories concurrently
+    (./runtests.py suites run with --parallel N).
+    If --single-session is used, run all test directories in one pytest session.
+    If --shard K/N is used, run only the K-th of N balanced partitions.
+    If --slowest or --trend is used, report recorded timings instead.
+    If --affected is used, run only the tests that execute changed code.
+    Test modules that passed with the same inputs are skipped unless --no-cache is used.
+    If --mongo-pool is used, each worker gets its own ephemeral mongod.
+    With --jobs, workers also use a pool started by `dm mongo pool up`.
+    If --last-failed or --failed-first is used, select or order tests by
+    the failures recorded in the timing database.
+    If --db-snapshot is used, restore the migrated test database from a snapshot.
+    If --rerun-failures N is used, rerun failed tests and record flaky ones;
+    --quarantine runs known flaky tests in a separate batch, --flaky lists them.
+    If --mongo-stats is used, report the MongoDB commands sent by each test.
+    If --coverage is used, write a combined coverage report; a full run also
+    rebuilds the --affected impact map from its per-test contexts.
+    If --warm is used, fork serial test runs from a warm server of the
+    repository instead of starting Python and importing Django each time.
+    If --watch is used, rerun the tests mapped to files as they are saved,
+    through the impact map or else by name and recorded failures.
+    If --group or --all-configured is used, run several repositories' tests
+    concurrently (--jobs at a time) and write a compatibility report.
     """
 
     # --- NEW: Determine MongoDB URI ---
@@ -1152,12 +1507,144 @@ def test(
         test_runner.set_env(setenv)
     if list_tests:
         test_runner.set_list_tests(list_tests)
+    if dry_run:
+        test_runner.set_dry_run(dry_run)
+    if jobs > 1:
+        test_runner.set_jobs(jobs)
+    if single_session:
+        test_runner.set_single_session(single_session)
+    if shard:
+        match = re.fullmatch(r"(\d+)/(\d+)", shard)
+        if not match or not 1 <= int(match.group(1)) <= int(match.group(2)):
+            typer.echo(
+                typer.style(
+                    f"Invalid --shard '{shard}'. Use K/N with 1 <= K <= N, e.g. --shard 2/4.",
+                    fg=typer.colors.RED,
+                )
+            )
+            raise typer.Exit(1)
+        test_runner.set_shard((int(match.group(1)), int(match.group(2))))
+    if affected:
+        if modules or shard:
+            typer.echo(
+                typer.style(
+                    "--affected selects the tests itself; it can't be combined with modules or --shard.",
+                    fg=typer.colors.RED,
+                )
+            )
+            raise typer.Exit(1)
+        test_runner.set_affected(affected)
+    if last_failed or failed_first:
+        if modules or affected or (last_failed and shard):
+            typer.echo(
+                typer.style(
+                    "--last-failed and --failed-first select from recorded failures; they can't be combined with modules or --affected (or --last-failed with --shard).",
+                    fg=typer.colors.RED,
+                )
+            )
+            raise typer.Exit(1)
+        test_runner.set_last_failed(last_failed)
+        test_runner.set_failed_first(failed_first)
+    test_runner.set_result_cache(result_cache)
+    if mongo_pool:
+        test_runner.set_mongo_pool(mongo_pool)
+    if db_snapshot:
+        if keep_db:
+            typer.echo(
+                typer.style(
+                    "--db-snapshot replaces the test database; it can't be combined with --keepdb.",
+                    fg=typer.colors.RED,
+                )
+            )
+            raise typer.Exit(1)
+        test_runner.set_db_snapshot(db_snapshot)
+    if rerun_failures:
+        test_runner.set_rerun_failures(rerun_failures)
+    if quarantine:
+        if modules or last_failed:
+            typer.echo(
+                typer.style(
+                    "--quarantine selects from the test labels; it can't be combined with modules or --last-failed.",
+                    fg=typer.colors.RED,
+                )
+            )
+            raise typer.Exit(1)
+        test_runner.set_quarantine(quarantine)
+    if flaky:
+        test_runner.set_flaky(flaky)
+    if mongo_stats:
+        test_runner.set_mongo_stats(mongo_stats)
+    if coverage:
+        test_runner.set_coverage(coverage)
+    if warm:
+        test_runner.set_warm(warm)
+    if watch:
+        if modules or affected or last_failed or shard:
+            typer.echo(
+                typer.style(
+                    "--watch selects the tests from the changed files; it can't be combined with modules, --affected, --last-failed or --shard.",
+                    fg=typer.colors.RED,
+                )
+            )
+            raise typer.Exit(1)
+        test_runner.set_watch(watch)
+    if slowest:
+        test_runner.set_slowest(slowest)
+    if trend:
+        test_runner.set_trend(trend)
+
+    if group or all_configured:
+        if (
+            (group and all_configured)
+            or repo_name
+            or list_tests
+            or dry_run
+            or slowest
+            or trend
+            or flaky
+            or watch
+        ):
+            typer.echo(
+                typer.style(
+                    "Use either --group or --all-configured, without a repository name, --list-tests, --dry-run, --slowest, --trend, --flaky or --watch.",
+                    fg=typer.colors.RED,
+                )
+            )
+            raise typer.Exit(1)
+        if all_configured:
+            repo_names = list(test_runner.tool_cfg.get("test", {}))
+        else:
+            repo_names = select_repos(test_runner, None, False, group, missing_msg="")
+        options = []
+        if keyword:
+            options += ["--keyword", keyword]
+        for flag, enabled in (
+            ("--keepdb", keep_db),
+            ("--single-session", single_session),
+            ("--affected", affected),
+            ("--no-cache", not result_cache),
+            ("--last-failed", last_failed),
+            ("--failed-first", failed_first),
+            ("--db-snapshot", db_snapshot),
+            ("--quarantine", quarantine),
+            ("--mongo-stats", mongo_stats),
+            ("--coverage", coverage),
+        ):
+            if enabled:
+                options.append(flag)
+        if shard:
+            options += ["--shard", shard]
+        if rerun_failures:
+            options += ["--rerun-failures", str(rerun_failures)]
+        if not test_runner.run_test_group(repo_names, options):
+            raise typer.Exit(1)
+        return
 
     repo_command(
         False,
         repo_name,
         all_msg=None,
-        missing_msg="Please specify a repository name.",
+        missing_msg="Please specify a repository name, use --group to test a group, or use --all-configured.",
         single_func=lambda repo_name: test_runner.run_tests(repo_name),
         repo_list=test_runner.map,
         all_func=None,
@@ -0,0 +1,18 @@
+"""
+Helpers loaded inside test processes started by ``dm repo test``.
+"""
+
+try:
+    import coverage
+except ImportError:
+    coverage = None
+
+
+def switch_coverage_context(context: str) -> None:
+    """
+    Label the coverage data collected from now on with ``context``, the id of
+    the running test, when the process runs under ``coverage run``.
+    """
+    cov = coverage.Coverage.current() if coverage else None
+    if cov is not None:
+        cov.switch_context(context)
@@ -0,0 +1,25 @@
+"""
+Give concurrent test processes their own databases.
+
+``dm repo test --jobs`` and group runs set ``DM_TEST_DB_SUFFIX`` in each
+process they start so that processes never share a database. Test settings
+opt in with::
+
+    from django_mongodb_cli.testing.databases import suffix_databases
+
+    suffix_databases(DATABASES)
+"""
+
+import os
+
+
+def suffix_databases(databases: dict) -> None:
+    """
+    Append ``DM_TEST_DB_SUFFIX``, when it is set, to the name of every
+    database in ``databases``.
+    """
+    suffix = os.environ.get("DM_TEST_DB_SUFFIX")
+    if not suffix:
+        return
+    for database in databases.values():
+        database["NAME"] = f"{database['NAME']}_{suffix}"
@@ -0,0 +1,102 @@
+"""
+Per-test accounting of the commands tests send to MongoDB, for
+``dm repo test --mongo-stats``.
+
+A pymongo command listener counts the commands of the running test, the time
+the driver waited for their replies, and the BSON size of the commands and
+replies. When a test stops, its counts are appended as a JSON line to a file
+per process in the ``DM_MONGO_STATS`` directory, which works the same in
+forked ``--parallel`` workers. Commands sent between tests are recorded under
+a label such as the class whose fixtures sent them.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+
+import bson
+from pymongo import monitoring
+
+# The listener of this process, once enabled
+listener = None
+
+
+def empty_counts() -> dict:
+    return {"commands": 0, "duration": 0.0, "sent": 0, "received": 0, "by_command": {}}
+
+
+class CommandStats(monitoring.CommandListener):
+    """Command listener that attributes commands to the running test."""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.test = None
+        self.counts = empty_counts()
+        self.lock = threading.Lock()
+
+    def started(self, event):
+        size = len(bson.encode(event.command))
+        with self.lock:
+            self.counts["commands"] += 1
+            self.counts["sent"] += size
+            by_command = self.counts["by_command"]
+            by_command[event.command_name] = by_command.get(event.command_name, 0) + 1
+
+    def succeeded(self, event):
+        size = len(bson.encode(event.reply))
+        with self.lock:
+            self.counts["duration"] += event.duration_micros / 1e6
+            self.counts["received"] += size
+
+    def failed(self, event):
+        with self.lock:
+            self.counts["duration"] += event.duration_micros / 1e6
+
+    def start_test(self, test_id: str, outside: str) -> None:
+        """Record the commands sent since the last test under ``outside``."""
+        self.flush(outside)
+        self.test = test_id
+
+    def stop_test(self) -> None:
+        test, self.test = self.test, None
+        if test is not None:
+            self.flush(test)
+
+    def flush(self, label: str) -> None:
+        """Write the commands counted so far under ``label``, if any."""
+        with self.lock:
+            counts, self.counts = self.counts, empty_counts()
+        if not counts["commands"]:
+            return
+        path = self.directory / f"{os.getpid()}.jsonl"
+        with path.open("a") as f:
+            f.write(json.dumps({"test": label, **counts}) + "\n")
+
+
+def enable_command_stats(directory: Path) -> CommandStats:
+    """
+    Register the command listener of this process. MongoClients created
+    before this call don't report their commands to it.
+    """
+    global listener
+    if listener is None:
+        directory.mkdir(parents=True, exist_ok=True)
+        listener = CommandStats(directory)
+        monitoring.register(listener)
+    return listener
+
+
+def start_test(test_id: str, outside: str = "(outside tests)") -> None:
+    if listener is not None:
+        listener.start_test(test_id, outside)
+
+
+def stop_test() -> None:
+    if listener is not None:
+        listener.stop_test()
+
+
+def flush(label: str) -> None:
+    if listener is not None:
+        listener.flush(label)
@@ -0,0 +1,66 @@
+"""
+pytest plugin loaded by ``dm repo test``.
+
+While ``--affected`` builds the test impact map, coverage data is labelled
+with the running test, including its fixtures, as a node id whose path is
+absolute so it doesn't depend on pytest's rootdir.
+
+With ``--quarantine``, the tests listed in the ``DM_DESELECT`` file, as node
+ids relative to the current directory, are left out of the run.
+
+With ``--mongo-stats``, the MongoDB commands of each test, including its
+fixtures, are counted under the same node ids.
+"""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from . import mongo_stats, switch_coverage_context
+
+
+def node_id(item) -> str:
+    """Return the node id of an item relative to the current directory."""
+    _, _, name = item.nodeid.partition("::")
+    path = os.path.relpath(item.path)
+    return f"{path}::{name}" if name else path
+
+
+def pytest_configure(config):
+    if os.environ.get("DM_MONGO_STATS"):
+        mongo_stats.enable_command_stats(Path(os.environ["DM_MONGO_STATS"]))
+
+
+def pytest_sessionfinish(session):
+    mongo_stats.flush("(outside tests)")
+
+
+def pytest_collection_modifyitems(config, items):
+    path = os.environ.get("DM_DESELECT")
+    if not path:
+        return
+    deselected_ids = tuple(Path(path).read_text().split())
+    selected, deselected = [], []
+    for item in items:
+        item_id = node_id(item)
+        if any(
+            item_id == d or item_id.startswith((f"{d}::", f"{d}["))
+            for d in deselected_ids
+        ):
+            deselected.append(item)
+        else:
+            selected.append(item)
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    _, _, name = item.nodeid.partition("::")
+    switch_coverage_context(f"{item.path}::{name}" if name else str(item.path))
+    mongo_stats.start_test(node_id(item))
+    yield
+    mongo_stats.stop_test()
+    switch_coverage_context("")
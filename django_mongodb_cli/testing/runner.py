@@ -0,0 +1,384 @@
+"""
+Django test runner used by ``dm repo test`` for ./runtests.py suites.
+
+Test settings select it through the ``DM_TEST_RUNNER`` environment variable.
+It writes per-test outcomes and durations as JUnit XML to the path in
+``DM_JUNIT_XML`` so they can be recorded in the timing database, lets
+``--parallel`` clone MongoDB test databases for its workers, restores
+migrated test databases from the snapshots in ``DM_DB_SNAPSHOT``, leaves
+out the tests listed in the ``DM_DESELECT`` file, and counts the MongoDB
+commands of each test when ``DM_MONGO_STATS`` is set.
+"""
+
+import os
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from xml.etree import ElementTree
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.base.creation import BaseDatabaseCreation
+from django.test.runner import (
+    DiscoverRunner,
+    ParallelTestSuite,
+    RemoteTestResult,
+    RemoteTestRunner,
+)
+from django.test.utils import iter_test_cases
+
+from . import mongo_stats, switch_coverage_context
+from .snapshot import (
+    dump_database,
+    index_models,
+    restore_database,
+    restore_instead_of_migrate,
+    snapshot_key,
+)
+
+
+class RecordingResultMixin:
+    """
+    Record the outcome and duration of every test. Durations come from
+    ``addDuration`` (Python 3.12+), which Django also replays from parallel
+    workers, and fall back to wall-clock time between start and stop.
+
+    Under ``coverage run`` the coverage context follows the running test, so
+    that the test impact map knows which tests execute which lines, and with
+    ``--mongo-stats`` MongoDB commands are counted per test. With
+    ``--parallel``, tests run in the workers, which do both themselves.
+    """
+
+    switch_contexts = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.dm_records = {}
+        self.dm_started = {}
+
+    def dm_record(self, test, outcome=None, err=None, duration=None):
+        record = self.dm_records.setdefault(
+            test.id(), {"outcome": "passed", "duration": None, "message": ""}
+        )
+        # A failure is never overwritten by a later success of a subtest
+        if outcome and record["outcome"] == "passed":
+            record["outcome"] = outcome
+            if err is not None:
+                try:
+                    record["message"] = str(err[1]).splitlines()[0][:500]
+                except (IndexError, TypeError):
+                    record["message"] = ""
+        if duration is not None:
+            record["duration"] = duration
+
+    def startTest(self, test):
+        self.dm_started[test.id()] = time.perf_counter()
+        if self.switch_contexts:
+            switch_coverage_context(test.id())
+            mongo_stats.start_test(test.id(), class_fixtures(test))
+        super().startTest(test)
+
+    def stopTest(self, test):
+        super().stopTest(test)
+        if self.switch_contexts:
+            mongo_stats.stop_test()
+            switch_coverage_context("")
+        started = self.dm_started.pop(test.id(), None)
+        record = self.dm_records.get(test.id())
+        if started is not None and (record is None or record["duration"] is None):
+            self.dm_record(test, duration=time.perf_counter() - started)
+
+    def addDuration(self, test, elapsed):
+        self.dm_record(test, duration=elapsed)
+        super().addDuration(test, elapsed)
+
+    def addSuccess(self, test):
+        self.dm_record(test)
+        super().addSuccess(test)
+
+    def addError(self, test, err):
+        self.dm_record(test, "error", err)
+        super().addError(test, err)
+
+    def addFailure(self, test, err):
+        self.dm_record(test, "failed", err)
+        super().addFailure(test, err)
+
+    def addSubTest(self, test, subtest, err):
+        if err is not None:
+            failed = issubclass(err[0], test.failureException)
+            self.dm_record(test, "failed" if failed else "error", err)
+        super().addSubTest(test, subtest, err)
+
+    def addSkip(self, test, reason):
+        self.dm_record(test, "skipped", (None, reason))
+        super().addSkip(test, reason)
+
+    def addExpectedFailure(self, test, err):
+        self.dm_record(test, "skipped", (None, "expected failure"))
+        super().addExpectedFailure(test, err)
+
+    def addUnexpectedSuccess(self, test):
+        self.dm_record(test, "failed", (None, "unexpected success"))
+        super().addUnexpectedSuccess(test)
+
+
+def class_fixtures(test) -> str:
+    """Label the commands sent before a test, by its class's fixtures."""
+    return f"{test.id().rpartition('.')[0]} (class fixtures)"
+
+
+class PerTestRemoteTestResult(RemoteTestResult):
+    """
+    Result of ``--parallel`` workers that switches the coverage context and
+    counts commands per test.
+    """
+
+    def startTest(self, test):
+        switch_coverage_context(test.id())
+        mongo_stats.start_test(test.id(), class_fixtures(test))
+        super().startTest(test)
+
+    def stopTest(self, test):
+        super().stopTest(test)
+        mongo_stats.stop_test()
+        switch_coverage_context("")
+
+
+class PerTestRemoteTestRunner(RemoteTestRunner):
+    resultclass = PerTestRemoteTestResult
+
+
+class PerTestParallelTestSuite(ParallelTestSuite):
+    runner_class = PerTestRemoteTestRunner
+
+
+def write_junit_xml(path: str, records: dict) -> None:
+    """Write recorded test results as a JUnit XML report."""
+    tags = {"failed": "failure", "error": "error", "skipped": "skipped"}
+    suite = ElementTree.Element("testsuite", name="django")
+    counts = dict.fromkeys(tags, 0)
+    total = 0.0
+    for test_id, record in records.items():
+        classname, _, name = test_id.rpartition(".")
+        duration = record["duration"] or 0.0
+        total += duration
+        case = ElementTree.SubElement(
+            suite,
+            "testcase",
+            classname=classname,
+            name=name,
+            time=f"{duration:.6f}",
+        )
+        if record["outcome"] in tags:
+            counts[record["outcome"]] += 1
+            ElementTree.SubElement(
+                case, tags[record["outcome"]], message=record["message"]
+            )
+    suite.set("tests", str(len(records)))
+    suite.set("failures", str(counts["failed"]))
+    suite.set("errors", str(counts["error"]))
+    suite.set("skipped", str(counts["skipped"]))
+    suite.set("time", f"{total:.6f}")
+    ElementTree.ElementTree(suite).write(path, encoding="utf-8", xml_declaration=True)
+
+
+def copy_collection(source_db, target_db, spec: dict) -> None:
+    """
+    Copy one collection with its options and indexes. Documents are copied
+    server-side with ``$out`` into the pre-created collection, which keeps its
+    options and indexes.
+    """
+    name, options = spec["name"], spec.get("options", {})
+    target_db.create_collection(name, **options)
+    if spec.get("type") == "view":
+        return
+    indexes = index_models(source_db[name])
+    if indexes:
+        target_db[name].create_indexes(indexes)
+    source = source_db[name]
+    if source.find_one({}, {"_id": 1}) is None:
+        return
+    if options.get("capped") or options.get("timeseries"):
+        # $out can't write to capped or time series collections
+        target_db[name].insert_many(source.find(), ordered=False)
+    else:
+        source.aggregate([{"$out": {"db": target_db.name, "coll": name}}])
+
+
+def copy_database(source_db, target_db, workers: int = 8) -> None:
+    """Copy every collection and view of ``source_db`` into ``target_db``."""
+    specs = [
+        spec
+        for spec in source_db.list_collections()
+        if not spec["name"].startswith("system.")
+    ]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for future in [
+            executor.submit(copy_collection, source_db, target_db, spec)
+            for spec in specs
+        ]:
+            future.result()
+
+
+class CloningCreationMixin:
+    """
+    Test database cloning for the MongoDB backend, which doesn't implement
+    it. Clones are copied server-side from the migrated test database.
+    """
+
+    def _clone_test_db(self, suffix, verbosity, keepdb=False):
+        target = self.get_test_db_clone_settings(suffix)["NAME"]
+        client = self.connection.database.client
+        if keepdb and target in client.list_database_names():
+            return
+        client.drop_database(target)
+        copy_database(client[self.connection.settings_dict["NAME"]], client[target])
+
+    def setup_worker_connection(self, _worker_id):
+        settings_dict = self.get_test_db_clone_settings(str(_worker_id))
+        self.connection.settings_dict.update(settings_dict)
+        # close() keeps the MongoClient and the database it cached
+        self.connection.close_pool()
+
+    def destroy_test_db(
+        self, old_database_name=None, verbosity=1, keepdb=False, suffix=None
+    ):
+        # Destroying a clone points the connection at it; point it back at the
+        # test database so the names of the other clones derive from it.
+        name = self.connection.settings_dict["NAME"]
+        if suffix is not None:
+            # _destroy_test_db() drops the collections of the cached database
+            self.connection.close_pool()
+        super().destroy_test_db(old_database_name, verbosity, keepdb, suffix)
+        if suffix is not None:
+            self.connection.settings_dict["NAME"] = name
+            settings.DATABASES[self.connection.alias]["NAME"] = name
+
+
+class SnapshotCreationMixin:
+    """
+    Create the test database from a snapshot of the migrated database of an
+    earlier run, taking one when there is none for the current migrations.
+    """
+
+    snapshot_dir = None
+
+    def create_test_db(
+        self, verbosity=1, autoclobber=False, serialize=True, keepdb=False
+    ):
+        if keepdb:
+            return super().create_test_db(verbosity, autoclobber, serialize, keepdb)
+        alias = self.connection.alias
+        key = snapshot_key(self.connection)
+        path = self.snapshot_dir / f"{alias}-{key[:16]}.bson.gz"
+        if not path.exists():
+            name = super().create_test_db(verbosity, autoclobber, serialize, keepdb)
+            dump_database(self.connection.database.client[name], path)
+            return name
+
+        def restore():
+            if verbosity >= 1:
+                self.log(f"Restoring test database for alias '{alias}' from {path}")
+            name = self.connection.settings_dict["NAME"]
+            restore_database(self.connection.database.client[name], path)
+
+        with restore_instead_of_migrate(alias, restore):
+            return super().create_test_db(verbosity, autoclobber, serialize, keepdb)
+
+
+def extend_creation(connection, mixin, **attrs) -> None:
+    """Replace the creation of a connection with one extended by ``mixin``."""
+    creation = type(connection.creation)
+    cls = type(creation.__name__, (mixin, creation), attrs)
+    connection.creation = cls(connection)
+
+
+def enable_database_cloning() -> None:
+    """Install test database cloning on MongoDB connections that lack it."""
+    for connection in connections.all():
+        creation = type(connection.creation)
+        if (
+            connection.vendor != "mongodb"
+            or creation._clone_test_db is not BaseDatabaseCreation._clone_test_db
+        ):
+            continue
+        extend_creation(connection, CloningCreationMixin)
+        connection.features.can_clone_databases = True
+
+
+def enable_database_snapshots(snapshot_dir: Path) -> None:
+    """Create MongoDB test databases from snapshots kept in ``snapshot_dir``."""
+    for connection in connections.all():
+        if connection.vendor == "mongodb":
+            extend_creation(
+                connection, SnapshotCreationMixin, snapshot_dir=snapshot_dir
+            )
+
+
+class TimingRunner(DiscoverRunner):
+    """
+    DiscoverRunner that also writes a JUnit XML report to $DM_JUNIT_XML, runs
+    MongoDB suites with ``--parallel``, restores test database snapshots and
+    counts the MongoDB commands of each test.
+    """
+
+    parallel_test_suite = PerTestParallelTestSuite
+    parallel_suite = False
+
+    def setup_test_environment(self, **kwargs):
+        if os.environ.get("DM_MONGO_STATS"):
+            # Before any MongoClient is created
+            mongo_stats.enable_command_stats(Path(os.environ["DM_MONGO_STATS"]))
+        super().setup_test_environment(**kwargs)
+
+    def load_tests_for_label(self, label, discover_kwargs):
+        tests = super().load_tests_for_label(label, discover_kwargs)
+        path = os.environ.get("DM_DESELECT")
+        if not path:
+            return tests
+        # Test ids, or the dotted prefix of the tests of a module or class
+        deselected = tuple(Path(path).read_text().split())
+        return self.test_suite(
+            test
+            for test in iter_test_cases(tests)
+            if not any(
+                test.id() == d or test.id().startswith(f"{d}.") for d in deselected
+            )
+        )
+
+    def get_resultclass(self):
+        base = super().get_resultclass() or unittest.TextTestResult
+        return type(
+            f"Recording{base.__name__}",
+            (RecordingResultMixin, base),
+            # Events of workers are replayed here after the tests ran
+            {"switch_contexts": not self.parallel_suite},
+        )
+
+    def setup_databases(self, **kwargs):
+        if self.parallel > 1:
+            enable_database_cloning()
+        if os.environ.get("DM_DB_SNAPSHOT"):
+            enable_database_snapshots(Path(os.environ["DM_DB_SNAPSHOT"]))
+        return super().setup_databases(**kwargs)
+
+    def run_suite(self, suite, **kwargs):
+        # Forked workers must not inherit the counts of the database setup
+        mongo_stats.flush("(test database setup)")
+        self.parallel_suite = isinstance(suite, ParallelTestSuite)
+        if self.parallel > 1:
+            # Don't let forked workers inherit open MongoClients
+            for connection in connections.all(initialized_only=True):
+                if connection.vendor == "mongodb":
+                    connection.close_pool()
+        result = super().run_suite(suite, **kwargs)
+        path = os.environ.get("DM_JUNIT_XML")
+        if path:
+            write_junit_xml(path, result.dm_records)
+        return result
+
+    def teardown_databases(self, old_config, **kwargs):
+        super().teardown_databases(old_config, **kwargs)
+        mongo_stats.flush("(test database teardown)")
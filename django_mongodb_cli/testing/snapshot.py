@@ -0,0 +1,179 @@
+"""
+Snapshots of migrated MongoDB test databases.
+
+``dm repo test --db-snapshot`` dumps the test database after its migrations
+ran and later runs restore it instead of migrating. A snapshot is a gzipped
+stream of BSON documents: for each collection, a header with its options,
+indexes and document count, followed by its documents.
+"""
+
+import gzip
+import hashlib
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from importlib import import_module, metadata
+from pathlib import Path
+
+import bson
+from django.apps import apps
+from django.conf import settings
+from django.db.migrations.loader import MigrationLoader
+from pymongo import IndexModel
+
+# Snapshots kept per database alias, most recent first
+KEEP_SNAPSHOTS = 3
+
+
+def index_models(collection) -> list:
+    """Return the secondary indexes of a collection as IndexModels."""
+    indexes = []
+    for index in collection.list_indexes():
+        if index["name"] == "_id_" or index.get("clustered"):
+            continue
+        keys = list(index.pop("key").items())
+        for field in ("v", "ns"):
+            index.pop(field, None)
+        indexes.append(IndexModel(keys, **index))
+    return indexes
+
+
+def _module_files(module_name: str) -> list:
+    """Return the source files of a module or of every module in a package."""
+    module = import_module(module_name)
+    if not getattr(module, "__file__", None):
+        return []
+    if hasattr(module, "__path__"):
+        return sorted(Path(module.__file__).parent.rglob("*.py"))
+    return [Path(module.__file__)]
+
+
+def snapshot_key(connection) -> str:
+    """
+    Hash what the migrated test database is built from: the migration files
+    of every installed app (the models of apps without migrations), the
+    settings module, the installed apps and the versions of Django and the
+    backend.
+    """
+    digest = hashlib.sha256()
+
+    def add(*parts):
+        for part in parts:
+            digest.update(str(part).encode())
+            digest.update(b"\0")
+
+    for name in ("django", "django-mongodb-backend"):
+        try:
+            add(name, metadata.version(name))
+        except metadata.PackageNotFoundError:
+            add(name, None)
+    add(*settings.INSTALLED_APPS)
+    add(connection.settings_dict["TEST"].get("MIGRATE", True))
+    files = []
+    settings_module = sys.modules.get(os.environ.get("DJANGO_SETTINGS_MODULE", ""))
+    if getattr(settings_module, "__file__", None):
+        files.append(Path(settings_module.__file__))
+    for app_config in apps.get_app_configs():
+        module_name, _ = MigrationLoader.migrations_module(app_config.label)
+        try:
+            files += _module_files(module_name) if module_name else []
+            migrated = module_name is not None
+        except ImportError:
+            migrated = False
+        if not migrated and app_config.models_module:
+            files += _module_files(app_config.models_module.__name__)
+    for file in files:
+        add(file)
+        digest.update(file.read_bytes())
+    return digest.hexdigest()
+
+
+def dump_database(db, path: Path) -> None:
+    """Write every collection of ``db`` to a snapshot file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}")
+    with gzip.open(tmp, "wb") as f:
+        for spec in db.list_collections():
+            name = spec["name"]
+            if name.startswith("system."):
+                continue
+            view = spec.get("type") == "view"
+            documents = [] if view else list(db[name].find())
+            indexes = [] if view else index_models(db[name])
+            f.write(
+                bson.encode(
+                    {
+                        "collection": name,
+                        "options": spec.get("options", {}),
+                        "indexes": [index.document for index in indexes],
+                        "count": len(documents),
+                    }
+                )
+            )
+            for document in documents:
+                f.write(bson.encode(document))
+    os.replace(tmp, path)
+    snapshots = sorted(
+        path.parent.glob(f"{path.name.partition('-')[0]}-*.bson.gz"),
+        key=lambda p: p.stat().st_mtime,
+        reverse=True,
+    )
+    for old in snapshots[KEEP_SNAPSHOTS:]:
+        old.unlink(missing_ok=True)
+
+
+def _restore_collection(db, header: dict, documents: list) -> None:
+    name = header["collection"]
+    db.create_collection(name, **header["options"])
+    if header["indexes"]:
+        db[name].create_indexes(
+            [
+                IndexModel(list(index.pop("key").items()), **index)
+                for index in header["indexes"]
+            ]
+        )
+    if documents:
+        db[name].insert_many(documents, ordered=False)
+
+
+def restore_database(db, path: Path, workers: int = 8) -> None:
+    """Recreate the collections of a snapshot file in the empty ``db``."""
+    collections = []
+    with gzip.open(path, "rb") as f:
+        documents = bson.decode_file_iter(f)
+        for header in documents:
+            collections.append(
+                (header, [next(documents) for _ in range(header["count"])])
+            )
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for future in [
+            executor.submit(_restore_collection, db, header, docs)
+            for header, docs in collections
+        ]:
+            future.result()
+    # Touch the snapshot so that pruning keeps the ones in use
+    path.touch()
+
+
+@contextmanager
+def restore_instead_of_migrate(alias: str, restore):
+    """
+    Within the block, ``call_command("migrate")`` for the database ``alias``
+    calls ``restore()`` instead. ``create_test_db()`` imports call_command
+    from django.core.management when it runs, so it sees the replacement.
+    """
+    from django.core import management
+
+    call_command = management.call_command
+
+    def snapshot_call_command(command_name, *args, **options):
+        if command_name == "migrate" and options.get("database") == alias:
+            return restore()
+        return call_command(command_name, *args, **options)
+
+    management.call_command = snapshot_call_command
+    try:
+        yield
+    finally:
+        management.call_command = call_command
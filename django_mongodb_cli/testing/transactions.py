@@ -0,0 +1,318 @@
+"""
+Roll back TestCase tests instead of flushing.
+
+MongoDB doesn't support Django's transactions, so TestCase tests on MongoDB
+empty every collection after each test, as TransactionTestCase tests do. On a
+replica set, such as the single-node one of ``dm mongo pool up
+--replica-set``, test settings opt in to running each of them in a session
+transaction instead, aborted when the test ends::
+
+    from django_mongodb_cli.testing.transactions import rollback_test_cases
+
+    rollback_test_cases(DATABASES)
+
+The ORM sends its commands in the session of the connection, so the class
+data, fixtures and writes of the test all belong to the transaction. A
+pymongo command listener watches for what the transaction can't undo:
+commands that can't run in a transaction (e.g. an aggregation with ``$out``)
+or that the server aborted it for, writes sent outside the session (e.g. by
+another thread), and reads outside the session of collections the
+transaction wrote to, which don't see its writes. The test is then flushed
+after its rollback, and the tests of its class are flushed instead of rolled
+back from then on. The classes that fell back are listed in the
+``fallback.txt`` file of the ``DM_TRANSACTIONS`` directory, which
+``dm repo test`` keeps across runs.
+
+The isolation of every test and the time its rollback or flush took are
+appended as a JSON line to a file per process in the ``DM_TRANSACTIONS``
+directory, from which ``dm repo test`` reports the speedup. To measure what
+flushing costs, one in ``SAMPLE_FLUSHES`` rolled back tests is flushed too.
+"""
+
+import json
+import os
+import threading
+import time
+import warnings
+from pathlib import Path
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from pymongo import monitoring
+from pymongo.errors import InvalidOperation
+
+from .truncate import READ_COMMANDS, WRITE_COMMANDS
+
+# Rolled back tests per flush that measures what flushing costs
+SAMPLE_FLUSHES = 25
+
+# Error codes of commands that can't run in a transaction or whose
+# transaction the server aborted
+TRANSACTION_ERRORS = {
+    251,  # NoSuchTransaction
+    263,  # OperationNotSupportedInTransaction
+}
+
+# Private APIs of django_mongodb_backend the rollback relies on
+BACKEND_APIS = ("start_transaction_mongo", "rollback_mongo", "in_atomic_block_mongo")
+
+# Commands that read the collection they are named after
+READ_COLLECTION_COMMANDS = {"aggregate", "count", "distinct", "find"}
+
+# The listener of this process, once enabled
+watcher = None
+
+# Test classes flushed instead of rolled back, as "module.Class", loaded
+# when the first test starts since a warm server imports the settings before
+# the run's DM_TRANSACTIONS directory exists
+fallbacks = None
+
+# Tests rolled back by this process
+rolled_back = 0
+
+
+def writes(command_name: str, command: dict) -> bool:
+    """Whether a command may write documents."""
+    if command_name == "aggregate":
+        stage = (command.get("pipeline") or [{}])[-1]
+        return "$out" in stage or "$merge" in stage
+    return command_name not in READ_COMMANDS
+
+
+class TransactionWatcher(monitoring.CommandListener):
+    """
+    Command listener recording why the transactions of the running test
+    can't undo what it did, if they can't.
+    """
+
+    def __init__(self):
+        self.databases = set()
+        self.written = set()
+        self.reason = None
+        self.lock = threading.Lock()
+
+    def started(self, event):
+        db, command, name = event.database_name, event.command, event.command_name
+        with self.lock:
+            if db not in self.databases or self.reason is not None:
+                return
+            if command.get("autocommit") is False:
+                if name in WRITE_COMMANDS:
+                    self.written.add((db, command[name]))
+            elif writes(name, command):
+                self.reason = f"{name} outside the transaction"
+            elif (
+                name in READ_COLLECTION_COMMANDS and (db, command[name]) in self.written
+            ):
+                self.reason = f"{name} of {command[name]} outside the transaction"
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        failure = event.failure or {}
+        if failure.get("code") not in TRANSACTION_ERRORS and (
+            "TransientTransactionError" not in failure.get("errorLabels", [])
+        ):
+            return
+        with self.lock:
+            if self.databases and self.reason is None:
+                message = failure.get("errmsg") or failure.get("codeName", "")
+                self.reason = f"{event.command_name} failed: {message}"[:200]
+
+    def begin(self, databases) -> None:
+        """Watch the commands sent to ``databases`` until ``end()``."""
+        with self.lock:
+            self.databases = set(databases)
+            self.written = set()
+            self.reason = None
+
+    def end(self) -> str | None:
+        """Stop watching and return why the transactions fell short, if so."""
+        with self.lock:
+            reason, self.reason = self.reason, None
+            self.databases = set()
+            self.written = set()
+        return reason
+
+
+def transactions_dir() -> Path | None:
+    path = os.environ.get("DM_TRANSACTIONS")
+    return Path(path) if path else None
+
+
+def load_fallbacks() -> set:
+    global fallbacks
+    if fallbacks is None:
+        fallbacks = set()
+        directory = transactions_dir()
+        if directory is not None and (directory / "fallback.txt").exists():
+            for line in (directory / "fallback.txt").read_text().splitlines():
+                fallbacks.add(line.partition("\t")[0])
+    return fallbacks
+
+
+def class_id(case) -> str:
+    cls = case if isinstance(case, type) else type(case)
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+def is_watched(settings_dict: dict) -> bool:
+    return any(
+        isinstance(listener, TransactionWatcher)
+        for listener in settings_dict.get("OPTIONS", {}).get("event_listeners", [])
+    )
+
+
+def rollback_aliases(case) -> tuple:
+    """
+    Return the databases of a TestCase to roll back, and why its tests are
+    flushed if it has none.
+    """
+    aliases = list(case._databases_names(include_mirrors=False))
+    if not aliases or case._databases_support_transactions():
+        return [], None
+    if class_id(case) in load_fallbacks():
+        return [], "fell back earlier"
+    for alias in aliases:
+        connection = connections[alias]
+        if connection.vendor != "mongodb" or not is_watched(connection.settings_dict):
+            return [], f"database {alias!r} isn't rolled back"
+        if not connection.features._supports_transactions:
+            return [], "the server doesn't support transactions"
+    return aliases, None
+
+
+def rollback(aliases) -> None:
+    for alias in aliases:
+        connection = connections[alias]
+        connection.in_atomic_block_mongo = False
+        connection.nested_atomics = 0
+        try:
+            connection.rollback_mongo()
+        except InvalidOperation:
+            # The test committed or aborted the transaction itself
+            if connection.session is not None:
+                connection.session.end_session()
+            connection.session = None
+
+
+def fall_back(case, reason: str) -> None:
+    """Flush the tests of the class of ``case`` from now on."""
+    name = class_id(case)
+    if name in load_fallbacks():
+        return
+    fallbacks.add(name)
+    directory = transactions_dir()
+    if directory is not None:
+        with (directory / "fallback.txt").open("a") as f:
+            f.write(f"{name}\t{reason}\n")
+
+
+def record(test, rollback=None, flush=None, reason=None) -> None:
+    """Write how long the rollback and the flush of a test took, if any."""
+    directory = transactions_dir()
+    if directory is None:
+        return
+    line = {"test": test.id(), "rollback": rollback, "flush": flush, "reason": reason}
+    with (directory / f"{os.getpid()}.jsonl").open("a") as f:
+        f.write(json.dumps(line) + "\n")
+
+
+def missing_backend_apis(connection) -> list:
+    """Return the private backend APIs the rollback needs that ``connection`` lacks."""
+    missing = [name for name in BACKEND_APIS if not hasattr(connection, name)]
+    if not hasattr(type(connection.features), "_supports_transactions"):
+        missing.append("features._supports_transactions")
+    return missing
+
+
+def patch_test_case(sender, connection, **kwargs):
+    """Make TestCase roll back the watched MongoDB databases of its tests."""
+    from django.test import TestCase
+
+    if connection.vendor != "mongodb" or "dm_rollback" in TestCase.__dict__:
+        return
+    # Checked on the first connection, since some of them are set by the
+    # DatabaseWrapper constructor
+    missing = missing_backend_apis(connection)
+    if missing:
+        warnings.warn(
+            "django_mongodb_backend lacks "
+            f"{', '.join(missing)}; TestCase tests are flushed instead of "
+            "rolled back.",
+            RuntimeWarning,
+            stacklevel=2,
+        )
+        connection_created.disconnect(dispatch_uid="dm-rollback-test-cases")
+        return
+    # A classmethod since Django 5.2
+    setup_is_classmethod = isinstance(TestCase.__dict__["_fixture_setup"], classmethod)
+    fixture_setup = TestCase._fixture_setup
+    fixture_teardown = TestCase._fixture_teardown
+
+    def _fixture_setup(case):
+        aliases, case.dm_flush_reason = rollback_aliases(case)
+        case.dm_rollback_aliases = aliases
+        if aliases:
+            watcher.begin(connections[alias].settings_dict["NAME"] for alias in aliases)
+            for alias in aliases:
+                connections[alias].start_transaction_mongo()
+                connections[alias].in_atomic_block_mongo = True
+        setup = fixture_setup.__func__ if setup_is_classmethod else fixture_setup
+        try:
+            setup(case)
+        except Exception:
+            if aliases:
+                rollback(aliases)
+                watcher.end()
+            raise
+
+    def _fixture_teardown(self):
+        global rolled_back
+        aliases = getattr(self, "dm_rollback_aliases", None)
+        started = time.perf_counter()
+        if not aliases:
+            fixture_teardown(self)
+            if self.dm_flush_reason is not None:
+                record(
+                    self,
+                    flush=time.perf_counter() - started,
+                    reason=self.dm_flush_reason,
+                )
+            return
+        rollback(aliases)
+        rollback_time = time.perf_counter() - started
+        reason = watcher.end()
+        rolled_back += 1
+        flush_time = None
+        if reason is not None or rolled_back % SAMPLE_FLUSHES == 1:
+            if reason is not None:
+                fall_back(self, reason)
+            started = time.perf_counter()
+            fixture_teardown(self)
+            flush_time = time.perf_counter() - started
+        record(self, rollback_time, flush_time, reason)
+
+    TestCase._fixture_setup = (
+        classmethod(_fixture_setup) if setup_is_classmethod else _fixture_setup
+    )
+    TestCase._fixture_teardown = _fixture_teardown
+    TestCase.dm_rollback = True
+
+
+def rollback_test_cases(databases: dict) -> None:
+    """
+    Make TestCase tests of the MongoDB ``databases``, a ``DATABASES``
+    setting, roll back a transaction instead of flushing where they can.
+    If the backend lacks the private APIs this relies on, warn at the first
+    connection and leave TestCase flushing.
+    """
+    global watcher
+    if watcher is None:
+        watcher = TransactionWatcher()
+    for settings_dict in databases.values():
+        if settings_dict.get("ENGINE") == "django_mongodb_backend":
+            options = settings_dict.setdefault("OPTIONS", {})
+            options["event_listeners"] = [*options.get("event_listeners", []), watcher]
+    connection_created.connect(patch_test_case, dispatch_uid="dm-rollback-test-cases")
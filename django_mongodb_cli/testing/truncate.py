@@ -0,0 +1,160 @@
+"""
+Flush only the collections tests wrote to.
+
+Django empties the tables of every installed app after each
+TransactionTestCase test, and after every TestCase test on MongoDB, which
+doesn't support transactions. For MongoDB that is a ``listCollections`` and
+a ``delete`` command per collection. Test settings opt in with::
+
+    from django_mongodb_cli.testing.truncate import truncate_touched_collections
+
+    truncate_touched_collections(DATABASES)
+
+A pymongo command listener added to each MongoDB database's client records
+the collections that commands wrote to, and the flush then only empties
+those. The first flush of a database and any flush after a command that may
+have written to unknown collections empties every collection, as Django
+does.
+"""
+
+import threading
+
+from django.db.backends.signals import connection_created
+from pymongo import monitoring
+
+# Commands that write documents to the collection they are named after
+WRITE_COMMANDS = {"insert", "update", "delete", "findAndModify"}
+
+# Commands that never add documents to a collection
+READ_COMMANDS = {
+    "abortTransaction",
+    "buildInfo",
+    "collMod",
+    "collStats",
+    "commitTransaction",
+    "count",
+    "create",
+    "createIndexes",
+    "createSearchIndexes",
+    "dbStats",
+    "distinct",
+    "drop",
+    "dropDatabase",
+    "dropIndexes",
+    "dropSearchIndex",
+    "endSessions",
+    "explain",
+    "find",
+    "getMore",
+    "hello",
+    "isMaster",
+    "ismaster",
+    "killCursors",
+    "listCollections",
+    "listDatabases",
+    "listIndexes",
+    "listSearchIndexes",
+    "ping",
+    "saslContinue",
+    "saslStart",
+    "serverStatus",
+    "updateSearchIndex",
+}
+
+
+class TouchedCollections(monitoring.CommandListener):
+    """
+    Command listener recording the collections written to in each database
+    since its last flush. ``None`` stands for unknown collections.
+    """
+
+    def __init__(self):
+        self.touched = {}
+        self.lock = threading.Lock()
+
+    def started(self, event):
+        db, command, name = event.database_name, event.command, event.command_name
+        if name in WRITE_COMMANDS:
+            self.add(db, command[name])
+        elif name == "aggregate":
+            stage = (command.get("pipeline") or [{}])[-1]
+            target = stage.get("$out") or (stage.get("$merge") or {}).get("into")
+            if isinstance(target, dict):
+                self.add(target.get("db", db), target["coll"])
+            elif target:
+                self.add(db, target)
+        elif name == "bulkWrite":
+            for ns in command.get("nsInfo", []):
+                self.add(*ns["ns"].split(".", 1))
+        elif name == "renameCollection":
+            self.add(*command["to"].split(".", 1))
+        elif name not in READ_COMMANDS:
+            with self.lock:
+                if db == "admin":
+                    # e.g. applyOps, which may write to any database
+                    self.touched = dict.fromkeys(self.touched)
+                else:
+                    self.touched[db] = None
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+    def add(self, db: str, collection: str) -> None:
+        with self.lock:
+            touched = self.touched.get(db)
+            if touched is not None:
+                touched.add(collection)
+
+    def pop(self, db: str) -> set | None:
+        """
+        Return the collections of ``db`` written to since its last flush, or
+        None if they aren't all known, and start recording anew.
+        """
+        with self.lock:
+            touched = self.touched.get(db)
+            self.touched[db] = set()
+        return touched
+
+
+class TruncateTouchedOperationsMixin:
+    def execute_sql_flush(self, tables):
+        listener = touched_collections(self.connection.settings_dict)
+        touched = listener.pop(self.connection.database.name) if listener else None
+        if touched is not None:
+            tables = [table for table in tables if table in touched]
+        super().execute_sql_flush(tables)
+
+
+def touched_collections(settings_dict: dict) -> TouchedCollections | None:
+    """Return the listener of a database's client, if it has one."""
+    for listener in settings_dict.get("OPTIONS", {}).get("event_listeners", []):
+        if isinstance(listener, TouchedCollections):
+            return listener
+    return None
+
+
+def extend_operations(sender, connection, **kwargs):
+    ops = type(connection.ops)
+    if connection.vendor != "mongodb" or issubclass(
+        ops, TruncateTouchedOperationsMixin
+    ):
+        return
+    connection.ops.__class__ = type(
+        ops.__name__, (TruncateTouchedOperationsMixin, ops), {}
+    )
+
+
+def truncate_touched_collections(databases: dict) -> None:
+    """
+    Make flushes of the MongoDB ``databases``, a ``DATABASES`` setting, empty
+    only the collections written to since the previous flush.
+    """
+    listener = TouchedCollections()
+    for settings_dict in databases.values():
+        if settings_dict.get("ENGINE") == "django_mongodb_backend":
+            options = settings_dict.setdefault("OPTIONS", {})
+            options["event_listeners"] = [*options.get("event_listeners", []), listener]
+    connection_created.connect(extend_operations, dispatch_uid="dm-truncate-touched")
@@ -0,0 +1,246 @@
+"""
+Warm test server for ``dm repo test --warm``.
+
+The server imports Django, PyMongo, the backend and pytest, imports the test
+settings module and populates the apps, then listens on a Unix socket. For
+every run, ``run()`` sends it the test command, working directory and
+environment along with the client's stdin, stdout and stderr. The server
+forks a child that takes them over and runs the command in-process, so the
+tests start without paying for the imports again. The child reports its pid
+and then its exit status on the connection.
+
+The server has no idea whether the preloaded code is still current;
+``dm repo test`` restarts it when workspace sources change. It exits once it
+has been idle for ``IDLE_TIMEOUT`` seconds or on a stop request.
+
+Run as ``python -m django_mongodb_cli.testing.warm <socket> <settings>
+<setup>`` in the test directory and environment.
+"""
+
+import json
+import os
+import runpy
+import signal
+import socket
+import struct
+import sys
+import traceback
+from importlib import import_module
+from pathlib import Path
+
+# Seconds without a run after which the server exits
+IDLE_TIMEOUT = 3600
+
+PRELOAD = (
+    "django",
+    "django.test",
+    "django.test.runner",
+    "bson",
+    "pymongo",
+    "django_mongodb_backend",
+    "pytest",
+    "pytest_django",
+)
+
+
+def recv_exactly(sock, size: int) -> bytes:
+    """Read ``size`` bytes, or fewer if the connection closes first."""
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+
+def send_request(sock, request: dict, fds: list) -> None:
+    payload = json.dumps(request).encode()
+    message = struct.pack("!I", len(payload)) + payload
+    sent = socket.send_fds(sock, [message], fds)
+    sock.sendall(message[sent:])
+
+
+def recv_request(sock) -> tuple:
+    message, fds, _, _ = socket.recv_fds(sock, 65536, 3)
+    if len(message) < 4:
+        message += recv_exactly(sock, 4 - len(message))
+    (size,) = struct.unpack("!I", message[:4])
+    payload = message[4:]
+    payload += recv_exactly(sock, size - len(payload))
+    return json.loads(payload), fds
+
+
+def run(socket_path: Path, argv: list, cwd: str, env: dict, nice=False) -> int:
+    """
+    Run a test command in a child of the warm server and return its exit
+    status. Raises OSError when the server can't be reached.
+    """
+    if os.stat(socket_path).st_uid != os.getuid():
+        # The environment may hold credentials
+        raise PermissionError(f"{socket_path} belongs to another user.")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(str(socket_path))
+        cwd = os.path.abspath(cwd)
+        request = {"argv": argv, "cwd": cwd, "env": env, "nice": nice}
+        send_request(sock, request, [0, 1, 2])
+        data = recv_exactly(sock, 4)
+        if len(data) < 4:
+            raise ConnectionError("The warm server closed the connection.")
+        (pid,) = struct.unpack("!i", data)
+        while True:
+            try:
+                data = recv_exactly(sock, 4)
+            except KeyboardInterrupt:
+                # The child doesn't share the terminal's process group
+                os.kill(pid, signal.SIGINT)
+                continue
+            return struct.unpack("!i", data)[0] if len(data) == 4 else 1
+
+
+def stop(socket_path: Path) -> None:
+    """Ask the warm server at ``socket_path`` to exit, if it's running."""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(str(socket_path))
+            send_request(sock, {"stop": True}, [])
+            recv_exactly(sock, 1)
+    except OSError:
+        pass
+
+
+def preload(settings_module: str, setup: bool) -> None:
+    for name in PRELOAD:
+        try:
+            import_module(name)
+        except ImportError:
+            continue
+    if not settings_module:
+        return
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    try:
+        if setup:
+            import django
+
+            django.setup()
+        else:
+            import_module(settings_module)
+    except Exception:  # noqa: BLE001
+        # Any error in the settings; the runs report it themselves
+        traceback.print_exc()
+
+
+def same_user(conn) -> bool:
+    """Whether the peer of a connection runs as this process's user."""
+    if not hasattr(socket, "SO_PEERCRED"):
+        # Only the user can reach the socket's directory anyway
+        return True
+    creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, 12)
+    _, uid, _ = struct.unpack("3i", creds)
+    return uid == os.getuid()
+
+
+def run_child(conn, request: dict, fds: list) -> int:
+    """Take over the client's stdio and environment and run its command."""
+    for signum in (signal.SIGCHLD, signal.SIGTERM):
+        signal.signal(signum, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    for target, fd in zip((0, 1, 2), fds):
+        os.dup2(fd, target)
+        os.close(fd)
+    sys.stdin = os.fdopen(0, "r", closefd=False)
+    sys.stdout = sys.__stdout__ = os.fdopen(1, "w", buffering=1, closefd=False)
+    sys.stderr = sys.__stderr__ = os.fdopen(2, "w", buffering=1, closefd=False)
+    if request["nice"]:
+        os.nice(10)
+    os.chdir(request["cwd"])
+    os.environ.clear()
+    os.environ.update(request["env"])
+    argv = request["argv"]
+    conn.sendall(struct.pack("!i", os.getpid()))
+    try:
+        if argv[0] == "pytest":
+            import pytest
+
+            sys.argv = argv
+            return int(pytest.main(argv[1:]))
+        script = os.path.abspath(argv[0])
+        sys.argv = [script, *argv[1:]]
+        sys.path.insert(0, os.path.dirname(script))
+        runpy.run_path(script, run_name="__main__")
+        return 0
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code, file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 130
+
+
+def serve(socket_path: Path, settings_module: str, setup: bool) -> None:
+    preload(settings_module, setup)
+    # Children are reaped automatically
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    socket_path.unlink(missing_ok=True)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # Whoever can connect runs code as this user
+    umask = os.umask(0o177)
+    try:
+        server.bind(str(socket_path))
+    finally:
+        os.umask(umask)
+    os.chmod(socket_path, 0o600)
+    server.listen()
+    server.settimeout(IDLE_TIMEOUT)
+    print(f"Warm server {os.getpid()} listening on {socket_path}", flush=True)
+    try:
+        while True:
+            try:
+                conn, _ = server.accept()
+            except TimeoutError:
+                break
+            conn.settimeout(None)
+            if not same_user(conn):
+                conn.close()
+                continue
+            try:
+                request, fds = recv_request(conn)
+            except (OSError, ValueError):
+                conn.close()
+                continue
+            if request.get("stop"):
+                conn.close()
+                break
+            sys.stdout.flush()
+            sys.stderr.flush()
+            if os.fork() == 0:
+                server.close()
+                code = 1
+                try:
+                    code = run_child(conn, request, fds)
+                except Exception:  # noqa: BLE001
+                    # run_child() handles SystemExit and KeyboardInterrupt;
+                    # anything else must still reach os._exit() below
+                    traceback.print_exc()
+                finally:
+                    for stream in (sys.stdout, sys.stderr):
+                        try:
+                            stream.flush()
+                        except (OSError, ValueError):
+                            pass
+                    try:
+                        conn.sendall(struct.pack("!i", code))
+                    except OSError:
+                        pass
+                    os._exit(code & 0xFF)
+            conn.close()
+            for fd in fds:
+                os.close(fd)
+    finally:
+        server.close()
+        socket_path.unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    serve(Path(sys.argv[1]), sys.argv[2], sys.argv[3] == "1")
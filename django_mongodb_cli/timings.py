@@ -0,0 +1,305 @@
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from xml.etree import ElementTree
+
+
+class TimingStore:
+    """
+    SQLite database of per-test outcomes and durations loaded from JUnit XML
+    reports, keyed by repository, commit and MongoDB deployment.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS runs (
+        id INTEGER PRIMARY KEY,
+        repo TEXT NOT NULL,
+        sha TEXT,
+        uri TEXT,
+        topology TEXT,
+        started TEXT NOT NULL,
+        elapsed REAL
+    );
+    CREATE TABLE IF NOT EXISTS results (
+        run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+        report TEXT,
+        test TEXT NOT NULL,
+        file TEXT,
+        outcome TEXT NOT NULL,
+        duration REAL,
+        message TEXT
+    );
+    CREATE TABLE IF NOT EXISTS flaky (
+        run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+        test TEXT NOT NULL,
+        file TEXT,
+        attempt INTEGER NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS runs_repo ON runs (repo, id);
+    CREATE INDEX IF NOT EXISTS results_run ON results (run_id);
+    CREATE INDEX IF NOT EXISTS results_test ON results (test);
+    CREATE INDEX IF NOT EXISTS flaky_test ON flaky (test);
+    """
+
+    # How many recent runs of a repository are consulted for latest results
+    HISTORY = 20
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.executescript(self.SCHEMA)
+        return conn
+
+    @staticmethod
+    def parse_junit(path: Path) -> list:
+        """Return the test cases of a JUnit XML report as dicts."""
+        try:
+            tree = ElementTree.parse(path)
+        except (ElementTree.ParseError, OSError):
+            return []
+        outcomes = {"failure": "failed", "error": "error", "skipped": "skipped"}
+        cases = []
+        for case in tree.iter("testcase"):
+            classname = case.get("classname") or ""
+            name = case.get("name") or ""
+            outcome, message = "passed", ""
+            for child in case:
+                if child.tag in outcomes:
+                    outcome = outcomes[child.tag]
+                    message = (child.get("message") or "").splitlines()[:1]
+                    message = message[0][:500] if message else ""
+                    break
+            try:
+                duration = float(case.get("time") or 0)
+            except ValueError:
+                duration = None
+            cases.append(
+                {
+                    "test": f"{classname}.{name}" if classname else name,
+                    "file": case.get("file"),
+                    "outcome": outcome,
+                    "duration": duration,
+                    "message": message,
+                }
+            )
+        return cases
+
+    def record_run(
+        self,
+        repo_name: str,
+        sha: str | None,
+        uri: str | None,
+        topology: str,
+        elapsed: float,
+        reports: dict,
+        reruns: dict | None = None,
+    ) -> int:
+        """
+        Store one test run from its JUnit XML reports, given as a mapping of
+        report path to report name, and return the number of tests recorded.
+
+        ``reruns`` maps the reports of failed tests run again to their
+        attempt number. A rerun result replaces the outcome of the test
+        recorded before it, and a test that failed and then passed is
+        recorded as flaky.
+        """
+        reruns = reruns or {}
+        rows = []
+        recorded = {}
+        flaky = []
+        for path, report in reports.items():
+            for case in self.parse_junit(path):
+                earlier = recorded.get(case["test"]) if path in reruns else None
+                if earlier is None:
+                    rows.append((report, case))
+                    recorded[case["test"]] = case
+                    continue
+                if (
+                    earlier["outcome"] in ("failed", "error")
+                    and case["outcome"] == "passed"
+                ):
+                    flaky.append((case["test"], earlier["file"], reruns[path]))
+                earlier["outcome"] = case["outcome"]
+                earlier["message"] = case["message"]
+        if not rows:
+            return 0
+        with closing(self.connect()) as conn, conn:
+            run_id = conn.execute(
+                "INSERT INTO runs (repo, sha, uri, topology, started, elapsed) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    repo_name,
+                    sha,
+                    uri,
+                    topology,
+                    time.strftime("%Y-%m-%d %H:%M:%S"),
+                    elapsed,
+                ),
+            ).lastrowid
+            conn.executemany(
+                "INSERT INTO results "
+                "(run_id, report, test, file, outcome, duration, message) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        run_id,
+                        report,
+                        case["test"],
+                        case["file"],
+                        case["outcome"],
+                        case["duration"],
+                        case["message"],
+                    )
+                    for report, case in rows
+                ],
+            )
+            conn.executemany(
+                "INSERT INTO flaky (run_id, test, file, attempt) VALUES (?, ?, ?, ?)",
+                [(run_id, test, file, attempt) for test, file, attempt in flaky],
+            )
+        return len(rows)
+
+    def latest_results(self, repo_name: str) -> dict:
+        """
+        Return the most recent result of every test of a repository across
+        its recent runs, keyed by test id.
+        """
+        if not self.path.exists():
+            return {}
+        with closing(self.connect()) as conn:
+            rows = conn.execute(
+                "SELECT r.test, r.file, r.report, r.outcome, r.duration, r.message, "
+                "runs.sha, runs.started FROM results r "
+                "JOIN runs ON runs.id = r.run_id "
+                "WHERE runs.id IN "
+                "(SELECT id FROM runs WHERE repo = ? ORDER BY id DESC LIMIT ?) "
+                "ORDER BY runs.id",
+                (repo_name, self.HISTORY),
+            ).fetchall()
+        keys = ("file", "report", "outcome", "duration", "message", "sha", "started")
+        return {row[0]: dict(zip(keys, row[1:])) for row in rows}
+
+    def failures(self, repo_name: str) -> dict:
+        """
+        Return the tests of a repository whose most recent result is a failure
+        or an error, keyed by test id, with their file and run id.
+        """
+        if not self.path.exists():
+            return {}
+        with closing(self.connect()) as conn:
+            rows = conn.execute(
+                "SELECT r.test, r.file, r.run_id FROM results r "
+                "JOIN (SELECT results.test, MAX(results.rowid) AS last FROM results "
+                "JOIN runs ON runs.id = results.run_id WHERE runs.repo = ? "
+                "GROUP BY results.test) latest ON r.rowid = latest.last "
+                "WHERE r.outcome IN ('failed', 'error') ORDER BY r.test",
+                (repo_name,),
+            ).fetchall()
+        return {test: {"file": file, "run_id": run_id} for test, file, run_id in rows}
+
+    def flaky_tests(self, repo_name: str) -> dict:
+        """
+        Return the tests of a repository that passed on a rerun after failing,
+        keyed by test id, with their file, how many of their runs were flaky,
+        how many runs recorded them, and whether they were flaky in one of
+        the recent runs.
+        """
+        if not self.path.exists():
+            return {}
+        with closing(self.connect()) as conn:
+            rows = conn.execute(
+                "SELECT f.test, MAX(f.file), COUNT(DISTINCT f.run_id), "
+                "(SELECT COUNT(*) FROM results r JOIN runs ON runs.id = r.run_id "
+                "WHERE runs.repo = ? AND r.test = f.test), "
+                "MAX(runs.started), "
+                "MAX(f.run_id) >= (SELECT MIN(id) FROM "
+                "(SELECT id FROM runs WHERE repo = ? ORDER BY id DESC LIMIT ?)) "
+                "FROM flaky f JOIN runs ON runs.id = f.run_id "
+                "WHERE runs.repo = ? GROUP BY f.test",
+                (repo_name, repo_name, self.HISTORY, repo_name),
+            ).fetchall()
+        keys = ("file", "flaky", "runs", "last", "recent")
+        return {row[0]: dict(zip(keys, row[1:])) for row in rows}
+
+    def last_run_id(self, repo_name: str) -> int:
+        """Return the id of the most recent run of a repository, or 0."""
+        if not self.path.exists():
+            return 0
+        with closing(self.connect()) as conn:
+            row = conn.execute(
+                "SELECT MAX(id) FROM runs WHERE repo = ?", (repo_name,)
+            ).fetchone()
+        return row[0] or 0
+
+    def results_since(self, repo_name: str, run_id: int) -> list:
+        """Return the results recorded for a repository in runs after ``run_id``."""
+        with closing(self.connect()) as conn:
+            rows = conn.execute(
+                "SELECT r.test, r.outcome, r.duration, r.message FROM results r "
+                "JOIN runs ON runs.id = r.run_id "
+                "WHERE runs.repo = ? AND runs.id > ? ORDER BY r.rowid",
+                (repo_name, run_id),
+            ).fetchall()
+        keys = ("test", "outcome", "duration", "message")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def tests_since(self, repo_name: str, run_id: int) -> set:
+        """Return the ids of the tests recorded in runs after ``run_id``."""
+        with closing(self.connect()) as conn:
+            rows = conn.execute(
+                "SELECT DISTINCT r.test FROM results r JOIN runs ON runs.id = r.run_id "
+                "WHERE runs.repo = ? AND runs.id > ?",
+                (repo_name, run_id),
+            ).fetchall()
+        return {test for (test,) in rows}
+
+    def durations(self, repo_name: str) -> dict:
+        """Return the latest known duration in seconds of every test."""
+        return {
+            test: result["duration"]
+            for test, result in self.latest_results(repo_name).items()
+            if result["duration"] is not None and result["outcome"] != "skipped"
+        }
+
+    def report_durations(self, repo_name: str) -> dict:
+        """Return the latest total duration of each report, e.g. a test directory."""
+        totals = {}
+        for result in self.latest_results(repo_name).values():
+            if result["report"] and result["duration"]:
+                totals[result["report"]] = (
+                    totals.get(result["report"], 0.0) + result["duration"]
+                )
+        return totals
+
+    def runs(self, repo_name: str, limit: int) -> list:
+        """Return summaries of the most recent runs of a repository, oldest first."""
+        if not self.path.exists():
+            return []
+        with closing(self.connect()) as conn:
+            rows = conn.execute(
+                "SELECT runs.id, runs.sha, runs.topology, runs.started, runs.elapsed, "
+                "COUNT(r.test), "
+                "SUM(r.outcome IN ('failed', 'error')), "
+                "TOTAL(r.duration) "
+                "FROM runs LEFT JOIN results r ON r.run_id = runs.id "
+                "WHERE runs.repo = ? GROUP BY runs.id ORDER BY runs.id DESC LIMIT ?",
+                (repo_name, limit),
+            ).fetchall()
+        return rows[::-1]
+
+    def slowdowns(self, before: int, after: int, limit: int) -> list:
+        """Return the tests that got slower the most between two runs."""
+        with closing(self.connect()) as conn:
+            return conn.execute(
+                "SELECT a.test, b.duration, a.duration, a.duration - b.duration AS delta "
+                "FROM results a JOIN results b ON b.test = a.test AND b.run_id = ? "
+                "WHERE a.run_id = ? AND a.outcome != 'skipped' "
+                "AND b.outcome != 'skipped' AND delta > 0 "
+                "ORDER BY delta DESC LIMIT ?",
+                (before, after, limit),
+            ).fetchall()
@@ -1,17 +1,37 @@
+import configparser
+import hashlib
+import importlib.metadata
+import importlib.util
+import json
 import os
+import queue
 import re
 import shutil
+import sqlite3
 import subprocess
 import sys
+import tempfile
+import threading
+import time
+import tomllib
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from pathlib import Path
 
-import toml
 import typer
-from git import GitCommandError
+from git import GitCommandError, InvalidGitRepositoryError
 from git import Repo as GitRepo
 
+from .catalog import TestCatalog, pytest_keyword_matcher, unittest_keyword_matcher
+from .impact import ImpactMap, git_blob_hash
+from .mongo_pool import MongoPool
+from .timings import TimingStore
+from .watch import SKIPPED_SOURCE_DIRS, FileWatcher
+from .workspace import Workspace
 
-class Repo:
+
+class Repo(Workspace):
     """
     Repo is a class that manages repository operations such as cloning, updating,
     and checking the status of repositories defined in a configuration file.
@@ -19,9 +39,7 @@ class Repo:
     """
 
     def __init__(self, pyproject_file: Path = Path("pyproject.toml")):
-        self.pyproject_file = pyproject_file
-        self.config = self._load_config()
-        self._tool_cfg = self.config.get("tool", {}).get("django-mongodb-cli", {}) or {}
+        super().__init__(pyproject_file)
         self.path = Path(self._tool_cfg.get("path", ".")).resolve()
         self.map = self.get_map()
         self.user = None
@@ -31,27 +49,6 @@ class Repo:
     # -----------------------------
     # Core utilities / helpers
     # -----------------------------
-    def _load_config(self) -> dict:
-        return toml.load(self.pyproject_file)
-
-    def _msg(self, text: str, fg) -> None:
-        typer.echo(typer.style(text, fg=fg))
-
-    def info(self, text: str) -> None:
-        self._msg(text, typer.colors.CYAN)
-
-    def warn(self, text: str) -> None:
-        self._msg(text, typer.colors.YELLOW)
-
-    def ok(self, text: str) -> None:
-        self._msg(text, typer.colors.GREEN)
-
-    def err(self, text: str) -> None:
-        self._msg(text, typer.colors.RED)
-
-    def title(self, text: str) -> None:
-        typer.echo(text)
-
     def run(
         self,
         args,
@@ -74,6 +71,30 @@ class Repo:
             self.err(f"Command failed: {' '.join(str(a) for a in args)} ({e})")
             return False
 
+    def run_capture(
+        self,
+        args,
+        cwd: Path | str | None = None,
+        env: dict[str, str] | None = None,
+    ) -> tuple[int, str]:
+        """Run a subprocess and return its exit code and combined output.
+
+        Used by worker pools, where streaming output from several
+        subprocesses at once would interleave.
+        """
+        try:
+            result = subprocess.run(
+                args,
+                cwd=str(cwd) if cwd else None,
+                env=env,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+            )
+        except OSError as e:
+            return 127, f"Command failed: {' '.join(str(a) for a in args)} ({e})\n"
+        return result.returncode, result.stdout
+
     def ensure_repo(
         self, repo_name: str, must_exist: bool = True
     ) -> tuple[Path | None, GitRepo | None]:
@@ -85,10 +106,6 @@ class Repo:
         repo = self.get_repo(str(path)) if path.exists() else None
         return path, repo
 
-    @property
-    def tool_cfg(self) -> dict:
-        return self._tool_cfg
-
     def test_cfg(self, repo_name: str) -> dict:
         return self.tool_cfg.get("test", {}).get(repo_name, {}) or {}
 
@@ -172,11 +189,67 @@ class Repo:
 
         return url, branch
 
-    def copy_file(
+    def overlay_file(
         self, src: str | Path, dst: str | Path, what: str, repo_name: str
     ) -> None:
-        shutil.copyfile(src, dst)
-        self.info(f"Copied {what} from {src} to {dst} for {repo_name}.")
+        """
+        Make ``dst`` in a clone provide ``src`` from this repository without
+        dirtying the clone. An untracked ``dst`` becomes a symlink to ``src``
+        and is listed in the clone's ``.git/info/exclude``. A tracked ``dst``
+        is overwritten, and only when its content differs from ``src``.
+        """
+        src, dst = Path(src).resolve(), Path(dst)
+        if not src.exists():
+            self.err(f"❌ {what.capitalize()} source {src} not found for {repo_name}.")
+            return
+        parent = dst.parent
+        while not parent.exists():
+            parent = parent.parent
+        try:
+            clone = GitRepo(parent, search_parent_directories=True)
+            rel = (dst.parent.resolve() / dst.name).relative_to(
+                Path(clone.working_dir).resolve()
+            )
+            tracked = bool(clone.git.ls_files("--", rel.as_posix()))
+        except (GitCommandError, InvalidGitRepositoryError, ValueError):
+            clone = rel = None
+            tracked = False
+
+        if tracked:
+            if src.is_dir() or dst.is_symlink() or dst.is_dir():
+                self.err(
+                    f"❌ Can't overlay {what} on tracked {dst} for {repo_name}: "
+                    "only files can replace tracked files."
+                )
+                return
+            if (
+                hashlib.sha256(src.read_bytes()).digest()
+                != hashlib.sha256(dst.read_bytes()).digest()
+            ):
+                shutil.copyfile(src, dst)
+                self.info(f"Copied {what} from {src} to {dst} for {repo_name}.")
+            return
+
+        if dst.is_symlink() and dst.resolve() == src:
+            return
+        if dst.is_symlink() or dst.is_file():
+            dst.unlink()
+        elif dst.is_dir():
+            # A copy made before overlays were symlinks
+            shutil.rmtree(dst)
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        dst.symlink_to(src, target_is_directory=src.is_dir())
+        self.info(f"Linked {what} {dst} to {src} for {repo_name}.")
+        if clone is not None:
+            exclude = Path(clone.common_dir) / "info" / "exclude"
+            pattern = f"/{rel.as_posix()}"
+            text = exclude.read_text() if exclude.exists() else ""
+            if pattern not in text.splitlines():
+                exclude.parent.mkdir(parents=True, exist_ok=True)
+                with exclude.open("a") as f:
+                    if text and not text.endswith("\n"):
+                        f.write("\n")
+                    f.write(f"{pattern}\n")
 
     # -----------------------------
     # Repo operations
@@ -220,16 +293,181 @@ class Repo:
         # Install pre-commit hooks if config exists
         pc_cfg = path / ".pre-commit-config.yaml"
         if pc_cfg.exists():
-            # Use prek if available, otherwise fall back to pre-commit
-            pre_commit_cmd = "prek" if shutil.which("prek") else "pre-commit"
+            pre_commit_cmd = self.pre_commit_cmd()
             self.info(f"Installing pre-commit hooks using {pre_commit_cmd}...")
-            if self.run([pre_commit_cmd, "install", "-t", "pre-commit"], cwd=path):
+            if self.run(
+                [pre_commit_cmd, "install", "-t", "pre-commit"],
+                cwd=path,
+            ):
                 self.ok("Pre-commit hooks installed!")
         else:
             self.warn(
                 "No .pre-commit-config.yaml found. Skipping pre-commit hook installation."
             )
 
+    @staticmethod
+    def pre_commit_cmd() -> str:
+        # Use prek if available, otherwise fall back to pre-commit
+        return "prek" if shutil.which("prek") else "pre-commit"
+
+    @staticmethod
+    def hooks_store(pre_commit_cmd: str) -> Path:
+        """
+        Return the per-user store of hook environments of pre-commit or prek,
+        shared by all clones, where the git hooks look for them at commit time.
+        """
+        name = "prek" if pre_commit_cmd == "prek" else "pre-commit"
+        home = os.environ.get("PREK_HOME" if name == "prek" else "PRE_COMMIT_HOME")
+        if home:
+            return Path(home).expanduser()
+        cache = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+        return Path(cache) / name
+
+    def warm_hooks(self, repo_names: list, jobs: int = 4, force: bool = False) -> None:
+        """
+        Install the hook environments of several repositories in the hook
+        runner's store.
+
+        Configurations are content-hashed: repos whose .pre-commit-config.yaml
+        is unchanged since the last warm of the same store are skipped while
+        the store exists, and repos sharing an identical config are warmed
+        once since they resolve to the same environments. Distinct configs are
+        warmed ``jobs`` at a time; pre-commit and prek lock the store around
+        each change to it, so concurrent installs never corrupt it.
+        """
+        pre_commit_cmd = self.pre_commit_cmd()
+        store = str(self.hooks_store(pre_commit_cmd))
+        store_exists = Path(store).is_dir() and any(Path(store).iterdir())
+        state = self.load_state("hooks.json")
+        by_digest = {}
+        for repo_name in repo_names:
+            path, _ = self.ensure_repo(repo_name)
+            if not path:
+                self.warn(f"Skipping {repo_name}: not cloned.")
+                continue
+            pc_cfg = path / ".pre-commit-config.yaml"
+            if not pc_cfg.exists():
+                self.warn(f"Skipping {repo_name}: no .pre-commit-config.yaml.")
+                continue
+            digest = hashlib.sha256(pc_cfg.read_bytes()).hexdigest()
+            warmed = {"digest": digest, "store": store}
+            if not force and store_exists and state.get(repo_name) == warmed:
+                self.ok(f"{repo_name}: hooks unchanged, skipping.")
+                continue
+            by_digest.setdefault(digest, []).append((repo_name, path))
+
+        if not by_digest:
+            self.ok("✅ All hook environments are up to date.")
+            return
+
+        self.info(
+            f"Warming hook environments for {sum(len(r) for r in by_digest.values())} "
+            f"repositories ({len(by_digest)} distinct configs) in {store} "
+            f"using {pre_commit_cmd}..."
+        )
+
+        def warm(repos):
+            return self.run_capture([pre_commit_cmd, "install-hooks"], cwd=repos[0][1])
+
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = {
+                executor.submit(warm, repos): digest
+                for digest, repos in by_digest.items()
+            }
+            # Results are recorded here, one at a time, as the warms finish
+            for future in as_completed(futures):
+                digest = futures[future]
+                repos = by_digest[digest]
+                names = ", ".join(name for name, _ in repos)
+                returncode, output = future.result()
+                if returncode == 0:
+                    for repo_name, _ in repos:
+                        state[repo_name] = {"digest": digest, "store": store}
+                    self.ok(f"✅ Hooks ready: {names}")
+                else:
+                    self.err(f"❌ Failed to install hooks: {names}")
+                    typer.echo(output)
+                self.save_state("hooks.json", state)
+
+    def changed_files(
+        self, repo_name: str, since: str | None = None, include_deleted: bool = False
+    ) -> list:
+        """
+        Return files changed in the working tree (staged, unstaged and
+        untracked) plus files changed on the branch since it diverged from
+        its upstream, and since commit ``since`` when given, relative to the
+        repository root. Deleted files are left out unless include_deleted.
+        """
+        path, repo = self.ensure_repo(repo_name)
+        if not repo or not path:
+            return []
+
+        try:
+            files = set(repo.git.diff("--name-only", "HEAD").splitlines())
+        except GitCommandError:
+            # No commits yet: everything is either staged or untracked
+            files = set(repo.git.diff("--name-only", "--cached").splitlines())
+        files.update(repo.untracked_files)
+        try:
+            upstream = repo.git.rev_parse("--abbrev-ref", "@{upstream}")
+            files.update(
+                repo.git.diff("--name-only", f"{upstream}...HEAD").splitlines()
+            )
+        except GitCommandError:
+            # No upstream tracking branch; only the working tree is linted
+            pass
+        if since:
+            try:
+                files.update(repo.git.diff("--name-only", since).splitlines())
+            except GitCommandError:
+                pass
+        return sorted(
+            f for f in files if f and (include_deleted or (path / f).is_file())
+        )
+
+    def lint_repos(self, repo_names: list, jobs: int = 4) -> bool:
+        """
+        Run pre-commit hooks on the changed files of several repositories in
+        a worker pool and print one consolidated pass/fail table.
+        Returns True if every repository passed.
+        """
+        pre_commit_cmd = self.pre_commit_cmd()
+
+        def lint(repo_name):
+            path, _ = self.ensure_repo(repo_name)
+            if not path:
+                return repo_name, 0, "missing", 0.0, ""
+            if not (path / ".pre-commit-config.yaml").exists():
+                return repo_name, 0, "no config", 0.0, ""
+            files = self.changed_files(repo_name)
+            if not files:
+                return repo_name, 0, "clean", 0.0, ""
+            start = time.monotonic()
+            returncode, output = self.run_capture(
+                [pre_commit_cmd, "run", "--files", *files], cwd=path
+            )
+            status = "passed" if returncode == 0 else "failed"
+            return repo_name, len(files), status, time.monotonic() - start, output
+
+        self.info(f"Linting changed files in {len(repo_names)} repositories...")
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+            results = list(executor.map(lint, repo_names))
+
+        for repo_name, _, status, _, output in results:
+            if status == "failed":
+                self.err(f"\n── {repo_name} ──")
+                typer.echo(output.rstrip())
+
+        width = max([len("Repository")] + [len(r[0]) for r in results])
+        self.title(f"\n{'Repository':<{width}}  {'Files':>5}  {'Result':<9}  Time")
+        colors = {"passed": typer.colors.GREEN, "failed": typer.colors.RED}
+        for repo_name, count, status, duration, _ in results:
+            self._msg(
+                f"{repo_name:<{width}}  {count:>5}  {status:<9}  {duration:.1f}s",
+                colors.get(status, typer.colors.YELLOW),
+            )
+        return all(r[2] != "failed" for r in results)
+
     def commit_repo(self, repo_name: str) -> None:
         """
         Commit changes to the specified repository with a commit message.
@@ -877,17 +1115,140 @@ class Repo:
             raise typer.Exit(code=1)
 
 
+# Environment variables read by common native build systems (make, CMake,
+# cargo, numpy.distutils, torch-style setuptools extensions) to pick their
+# parallelism.
+BUILD_JOBS_ENV_VARS = (
+    "MAKEFLAGS",
+    "CMAKE_BUILD_PARALLEL_LEVEL",
+    "CARGO_BUILD_JOBS",
+    "NPY_NUM_BUILD_JOBS",
+    "MAX_JOBS",
+)
+
+# Files that mark an install directory as containing native code to compile
+NATIVE_BUILD_FILES = {"CMakeLists.txt", "Cargo.toml", "meson.build"}
+NATIVE_SOURCE_SUFFIXES = (".c", ".cc", ".cpp", ".cxx", ".pyx", ".rs")
+
+
+class JobBudget:
+    """
+    A counting budget of build jobs shared by concurrently installing repos,
+    so that their native builds together never exceed ``total`` jobs.
+    """
+
+    def __init__(self, total: int):
+        self.total = max(1, total)
+        self.available = self.total
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def reserve(self, jobs: int | None):
+        """Block until ``jobs`` are free, hold them for the with-block."""
+        if not jobs:
+            yield
+            return
+        jobs = min(jobs, self.total)
+        with self._cond:
+            self._cond.wait_for(lambda: self.available >= jobs)
+            self.available -= jobs
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.available += jobs
+                self._cond.notify_all()
+
+
 class Package(Repo):
-    def install_package(self, repo_name: str) -> None:
+    def __init__(self, pyproject_file: Path = Path("pyproject.toml")):
+        super().__init__(pyproject_file)
+        self.jobs = 1
+        self.build_jobs = None
+        self.build_budget = JobBudget(os.cpu_count() or 1)
+
+    def set_jobs(self, jobs: int) -> None:
+        """Set how many repositories are installed concurrently."""
+        self.jobs = max(1, jobs)
+
+    def set_build_jobs(self, build_jobs: str | int | None) -> None:
         """
-        Install a package from the cloned repository.
+        Set the total of native build jobs (an integer or ``"auto"`` for the
+        number of CPUs), shared by all concurrently installing repos.
         """
-        self.info(f"Installing {repo_name}")
-        path, _ = self.ensure_repo(repo_name)
-        if not path:
+        jobs = self.parse_build_jobs(build_jobs, os.cpu_count() or 1)
+        if jobs:
+            self.build_jobs = build_jobs
+            self.build_budget = JobBudget(jobs)
+
+    def parse_build_jobs(self, value: str | int | None, auto: int) -> int | None:
+        if value is None:
+            return None
+        if str(value).strip().lower() == "auto":
+            return auto
+        try:
+            return max(1, int(value))
+        except (TypeError, ValueError):
+            self.warn(f"Ignoring invalid build_jobs value: {value!r}")
+            return None
+
+    def build_jobs_for(self, repo_name: str, paths: list) -> int | None:
+        """
+        Return the number of build jobs to reserve for a repository, or None
+        when it doesn't need any.
+
+        ``build_jobs`` in [tool.django-mongodb-cli.install.<repo_name>] takes
+        precedence; ``"auto"`` is the budget's fair share across concurrently
+        installing repositories. Otherwise repositories with native code to
+        compile get that fair share of the global ``--build-jobs`` total.
+        """
+        fair_share = max(1, self.build_budget.total // self.jobs)
+        install_cfg = self.install_cfg(repo_name)
+        if "build_jobs" in install_cfg:
+            jobs = self.parse_build_jobs(install_cfg["build_jobs"], fair_share)
+            return min(jobs, self.build_budget.total) if jobs else None
+        if self.build_jobs is None or not any(map(self.has_native_code, paths)):
+            return None
+        return fair_share
+
+    @staticmethod
+    def has_native_code(install_path: Path) -> bool:
+        """Whether an install directory has C, C++, Cython or Rust to compile."""
+        for root, dirs, files in os.walk(install_path):
+            dirs[:] = [d for d in dirs if not d.startswith(".") and d != "node_modules"]
+            if NATIVE_BUILD_FILES.intersection(files) or any(
+                name.endswith(NATIVE_SOURCE_SUFFIXES) for name in files
+            ):
+                return True
+        return False
+
+    @staticmethod
+    def build_jobs_env(jobs: int) -> dict:
+        env = {name: str(jobs) for name in BUILD_JOBS_ENV_VARS}
+        env["MAKEFLAGS"] = f"-j{jobs}"
+        return env
+
+    def install_packages(self, repo_names: list) -> None:
+        """
+        Install several repositories, ``self.jobs`` at a time. Native builds
+        draw from the shared build budget so the machine isn't oversubscribed.
+        """
+        if self.jobs <= 1:
+            for repo_name in repo_names:
+                self.install_package(repo_name)
             return
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            list(executor.map(self.install_package, repo_names))
 
-        install_cfg = self.tool_cfg.get("install", {}).get(repo_name, {})
+    def install_cfg(self, repo_name: str) -> dict:
+        return self.tool_cfg.get("install", {}).get(repo_name, {}) or {}
+
+    def install_paths(self, repo_name: str, path: Path, verbose: bool = True) -> list:
+        """
+        Return the directories to install for a repository, honouring
+        ``install_dirs`` (list) and the legacy ``install_dir`` (single) keys.
+        """
+        install_cfg = self.install_cfg(repo_name)
 
         # Determine install directories - support both install_dir (single) and install_dirs (list)
         install_dirs = install_cfg.get("install_dirs")
@@ -905,22 +1266,57 @@ class Package(Repo):
                 for install_dir_item in install_dirs:
                     install_path = Path(path / install_dir_item).resolve()
                     paths_to_install.append(install_path)
-                    self.info(f"Will install from directory: {install_path}")
+                    if verbose:
+                        self.info(f"Will install from directory: {install_path}")
         elif install_dir:
             # Backward compatibility: support single install_dir
             install_path = Path(path / install_dir).resolve()
             paths_to_install = [install_path]
-            self.info(f"Using custom install directory: {install_path}")
+            if verbose:
+                self.info(f"Using custom install directory: {install_path}")
         else:
             # No custom install directory specified, use repo root
             paths_to_install = [path]
+        return paths_to_install
 
+    def install_env(self, repo_name: str, verbose: bool = True) -> dict:
         env = os.environ.copy()
-        env_vars_list = install_cfg.get("env_vars")
+        env_vars_list = self.install_cfg(repo_name).get("env_vars")
         if env_vars_list:
-            typer.echo("Setting environment variables for installation:")
-            typer.echo(env_vars_list)
+            if verbose:
+                typer.echo("Setting environment variables for installation:")
+                typer.echo(env_vars_list)
             env.update({item["name"]: str(item["value"]) for item in env_vars_list})
+        return env
+
+    def install_package(self, repo_name: str) -> None:
+        """
+        Install a package from the cloned repository.
+        """
+        self.info(f"Installing {repo_name}")
+        path, _ = self.ensure_repo(repo_name)
+        if not path:
+            return
+        paths = self.install_paths(repo_name, path, verbose=False)
+        jobs = self.build_jobs_for(repo_name, paths)
+        with self.build_budget.reserve(jobs):
+            self._install_package(repo_name, path, jobs)
+
+    def _install_package(self, repo_name: str, path: Path, jobs: int | None) -> None:
+        install_cfg = self.install_cfg(repo_name)
+        paths_to_install = self.install_paths(repo_name, path)
+        env = self.install_env(repo_name)
+        if jobs:
+            # Explicitly configured env_vars (e.g. a custom MAKEFLAGS) win
+            configured = {item["name"] for item in install_cfg.get("env_vars") or []}
+            self.info(f"Building {repo_name} with {jobs} parallel job(s)")
+            env.update(
+                {
+                    name: value
+                    for name, value in self.build_jobs_env(jobs).items()
+                    if name not in configured
+                }
+            )
 
         # Install the base package from each directory
         for install_path in paths_to_install:
@@ -1004,17 +1400,303 @@ class Package(Repo):
                                     f"Failed to install dependency group {group} for {repo_name} from {install_path}"
                                 )
 
-    def uninstall_package(self, repo_name: str) -> None:
+    def lock_path(self, group_name: str) -> Path:
         """
-        Uninstall a package from the cloned repository.
+        Return the lock file path for a group, under the directory configured
+        by ``lock_dir`` in [tool.django-mongodb-cli] (default: ``locks``),
+        relative to the directory of the pyproject.toml that configures it.
+        """
+        lock_dir = Path(self.tool_cfg.get("lock_dir", "locks"))
+        project_dir = self.pyproject_file.resolve().parent
+        return (project_dir / lock_dir / f"{group_name}.txt").resolve()
+
+    @staticmethod
+    def dependency_group(pyproject: dict, group: str, seen: set | None = None) -> list:
+        """
+        Return the requirement strings of a PEP 735 dependency group,
+        expanding ``{include-group = "..."}`` entries.
+        """
+        seen = seen or set()
+        if group in seen:
+            return []
+        seen.add(group)
+        requirements = []
+        for item in pyproject.get("dependency-groups", {}).get(group, []):
+            if isinstance(item, dict) and "include-group" in item:
+                requirements.extend(
+                    Package.dependency_group(pyproject, item["include-group"], seen)
+                )
+            elif isinstance(item, str):
+                requirements.append(item)
+        return requirements
+
+    @staticmethod
+    def lock_editable(install_path: Path, lock_dir: Path, extras=()) -> str:
+        """
+        Return an editable requirement line for a lock input, with the path
+        relative to the lock directory so the lock is portable between
+        checkouts.
+        """
+        rel_path = Path(os.path.relpath(install_path, lock_dir)).as_posix()
+        if not rel_path.startswith("."):
+            rel_path = f"./{rel_path}"
+        if extras:
+            return f"-e {rel_path}[{','.join(extras)}]"
+        return f"-e {rel_path}"
+
+    def lock_requirements(self, repo_name: str, env: dict, lock_dir: Path) -> list:
+        """
+        Return the ``uv pip compile`` input lines for a repository: one
+        editable requirement per install directory (with its extras) plus the
+        requirements of its configured dependency groups.
+        """
+        path, _ = self.ensure_repo(repo_name)
+        if not path:
+            self.warn(f"Skipping {repo_name}: not cloned.")
+            return []
+
+        install_cfg = self.install_cfg(repo_name)
+        env.update(
+            {
+                item["name"]: str(item["value"])
+                for item in install_cfg.get("env_vars") or []
+            }
+        )
+
+        extras = [
+            extra
+            for extra in install_cfg.get("extras") or []
+            if isinstance(extra, str) and re.match(r"^[a-zA-Z0-9._-]+$", extra)
+        ]
+        groups = [
+            group
+            for group in install_cfg.get("groups") or []
+            if isinstance(group, str) and re.match(r"^[a-zA-Z0-9._-]+$", group)
+        ]
+
+        lines = [f"# {repo_name}"]
+        for install_path in self.install_paths(repo_name, path, verbose=False):
+            lines.append(self.lock_editable(install_path, lock_dir, extras))
+
+            pyproject_path = install_path / "pyproject.toml"
+            if groups and pyproject_path.exists():
+                with pyproject_path.open("rb") as f:
+                    pyproject = tomllib.load(f)
+                for group in groups:
+                    lines.extend(self.dependency_group(pyproject, group))
+        return lines
+
+    def lock_group(self, group_name: str) -> Path | None:
+        """
+        Resolve every workspace editable of a group, including its extras and
+        dependency groups, into a single pinned lock file with ``uv pip compile``.
+        """
+        group_repos = self.get_group_repos(group_name)
+        if not group_repos:
+            self.err(f"Group '{group_name}' not found.")
+            return None
+
+        lock_path = self.lock_path(group_name)
+        lock_dir = lock_path.parent
+        lock_dir.mkdir(parents=True, exist_ok=True)
+
+        env = os.environ.copy()
+        lines = []
+        # The locked install syncs the environment, so keep this project (and
+        # with it dm itself) in the lock rather than letting the sync remove it
+        if self.config.get("project"):
+            project_dir = self.pyproject_file.resolve().parent
+            lines.extend(["# project", self.lock_editable(project_dir, lock_dir)])
+        for repo_name in group_repos:
+            lines.extend(self.lock_requirements(repo_name, env, lock_dir))
+
+        input_path = lock_path.with_suffix(".in")
+        input_path.write_text("\n".join(lines) + "\n")
+
+        self.info(f"Locking group '{group_name}' into {lock_path}")
+        if not self.run(
+            [
+                "uv",
+                "pip",
+                "compile",
+                str(input_path),
+                "--output-file",
+                str(lock_path),
+                "--python",
+                sys.executable,
+            ],
+            # Editable paths are relative to the lock directory
+            cwd=lock_dir,
+            env=env,
+        ):
+            self.err(f"❌ Failed to lock group '{group_name}'.")
+            return None
+        self.ok(f"✅ Locked group '{group_name}' to {lock_path}")
+        return lock_path
+
+    def install_locked(self, group_name: str) -> None:
+        """
+        Install a group from its lock file without resolving: ``uv pip sync``
+        installs exactly the pinned set and removes anything not in the lock.
+        """
+        lock_path = self.lock_path(group_name)
+        if not lock_path.exists():
+            self.err(
+                f"❌ No lock file for group '{group_name}' at {lock_path}. "
+                f"Create it first with `dm repo lock --group {group_name}`."
+            )
+            raise typer.Exit(code=1)
+
+        env = os.environ.copy()
+        for repo_name in self.get_group_repos(group_name):
+            env.update(self.install_env(repo_name, verbose=False))
+
+        self.info(f"Installing group '{group_name}' from {lock_path}")
+        if self.run(
+            ["uv", "pip", "sync", str(lock_path)], cwd=lock_path.parent, env=env
+        ):
+            self.ok(f"✅ Installed group '{group_name}' from lock file.")
+        else:
+            self.err(f"❌ Failed to install group '{group_name}' from lock file.")
+
+    @staticmethod
+    def read_distribution_name(install_path: Path) -> str | None:
+        """
+        Read the distribution name from the packaging metadata in an install
+        directory: pyproject.toml, then setup.cfg, then setup.py.
+        """
+        pyproject_path = install_path / "pyproject.toml"
+        if pyproject_path.exists():
+            with pyproject_path.open("rb") as f:
+                name = tomllib.load(f).get("project", {}).get("name")
+            if name:
+                return name
+
+        setup_cfg = install_path / "setup.cfg"
+        if setup_cfg.exists():
+            parser = configparser.ConfigParser(interpolation=None)
+            parser.read(setup_cfg)
+            name = parser.get("metadata", "name", fallback=None)
+            if name:
+                return name
+
+        setup_py = install_path / "setup.py"
+        if setup_py.exists():
+            match = re.search(
+                r"""\bname\s*=\s*["']([A-Za-z0-9._-]+)["']""", setup_py.read_text()
+            )
+            if match:
+                return match.group(1)
+        return None
+
+    def distribution_names(self, repo_name: str, cache: dict) -> list:
+        """
+        Return the distribution names installed from a repository, one per
+        install directory. Names are cached in ``cache`` keyed by install
+        directory and invalidated when its packaging metadata changes. Falls
+        back to the repository name when no metadata is found.
         """
-        self.info(f"Uninstalling package from repository: {repo_name}")
         path, _ = self.ensure_repo(repo_name)
         if not path:
+            return []
+
+        names = []
+        for install_path in self.install_paths(repo_name, path, verbose=False):
+            metadata_files = [
+                install_path / name
+                for name in ("pyproject.toml", "setup.cfg", "setup.py")
+                if (install_path / name).exists()
+            ]
+            mtime = max((f.stat().st_mtime for f in metadata_files), default=0)
+            cached = cache.get(str(install_path))
+            if cached and cached.get("mtime") == mtime:
+                name = cached["name"]
+            else:
+                name = self.read_distribution_name(install_path) or repo_name
+                cache[str(install_path)] = {"name": name, "mtime": mtime}
+            names.append(name)
+        return names
+
+    def uninstall_packages(self, repo_names: list) -> None:
+        """
+        Uninstall the packages of several repositories with a single pip call.
+        Distributions that aren't installed are skipped up front.
+        """
+        cache = self.load_state("dist-names.json")
+        names = []
+        for repo_name in repo_names:
+            for name in self.distribution_names(repo_name, cache):
+                if name not in names:
+                    names.append(name)
+        self.save_state("dist-names.json", cache)
+
+        installed = []
+        for name in names:
+            try:
+                importlib.metadata.distribution(name)
+                installed.append(name)
+            except importlib.metadata.PackageNotFoundError:
+                self.warn(f"{name} is not installed, skipping.")
+
+        if not installed:
+            self.info("Nothing to uninstall.")
             return
 
-        if self.run([sys.executable, "-m", "pip", "uninstall", "-y", repo_name]):
-            self.ok(f"✅ Successfully uninstalled package from {repo_name}.")
+        self.info(f"Uninstalling: {', '.join(installed)}")
+        if self.run([sys.executable, "-m", "pip", "uninstall", "-y", *installed]):
+            self.ok(f"✅ Successfully uninstalled {', '.join(installed)}.")
+
+    def uninstall_package(self, repo_name: str) -> None:
+        """
+        Uninstall a package from the cloned repository.
+        """
+        self.info(f"Uninstalling package from repository: {repo_name}")
+        self.uninstall_packages([repo_name])
+
+
+# Per-test result lines of verbose pytest and Django runner output, counted
+# for the live progress of group test runs
+PROGRESS_RE = re.compile(
+    r" (?P<pytest>PASSED|FAILED|ERROR|SKIPPED|XFAIL|XPASS)\b"
+    r"| \.\.\. (?P<django>ok|FAIL|ERROR|skipped|expected failure|unexpected success)\b"
+)
+PROGRESS_OUTCOMES = {
+    "PASSED": "passed",
+    "XPASS": "passed",
+    "ok": "passed",
+    "FAILED": "failed",
+    "FAIL": "failed",
+    "ERROR": "failed",
+    "unexpected success": "failed",
+    "SKIPPED": "skipped",
+    "XFAIL": "skipped",
+    "skipped": "skipped",
+    "expected failure": "skipped",
+}
+# Test labels skipped by the result cache, as listed by `dm repo test`
+CACHED_LABEL_RE = re.compile(r"^\s+cached\s{2,}\S")
+# Statuses of a library in a group run report that count as compatible
+PASSING_STATUSES = ("passed", "cached")
+
+# Collection errors in pytest output: failing test modules and conftest files
+COLLECTION_ERROR_RE = re.compile(
+    r"ERROR collecting (\S+)|ImportError while loading conftest '([^']+)'"
+)
+
+
+# Django test runner that writes JUnit XML reports, see test/settings/*.py
+TIMING_RUNNER = "django_mongodb_cli.testing.runner.TimingRunner"
+
+# Environment variables that change between runs and are only read once the
+# tests run, so a warm server started with other values can still serve them
+WARM_RUN_VARS = {"DM_JUNIT_XML", "DM_DESELECT", "DM_MONGO_STATS", "DM_TRANSACTIONS"}
+
+
+# Changed files with these suffixes never affect test outcomes
+IMPACT_IGNORED_SUFFIXES = (".rst", ".md", ".txt", ".yml", ".yaml", ".pyc")
+
+# Old-side line range of a hunk in `git diff -U0` output
+HUNK_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? ", re.MULTILINE)
 
 
 class Test(Repo):
@@ -1032,11 +1714,35 @@ class Test(Repo):
         self.keyword = None
         self.setenv = False
         self.list_tests = False
+        self.dry_run = False
+        self.jobs = 1
+        self.single_session = False
+        self.shard = None
+        self.slowest = None
+        self.trend = None
+        self.affected = False
+        self.result_cache = True
+        self.mongo_pool = False
+        self.db_snapshot = False
+        self.last_failed = False
+        self.failed_first = False
+        self.rerun_failures = 0
+        self.mongo_stats = False
+        self.coverage = False
+        self.warm = False
+        self.watch = False
+        self.quarantine = False
+        self.flaky = False
+        self.pool_uris = []
         self.test_settings = {}
+        self.junit_dir = None
+        self.junit_reports = {}
+        self.rerun_reports = {}
+        self.coverage_dir = None
 
     def copy_settings(self, repo_name: str) -> None:
         """
-        Copy test settings from this repository to the repository
+        Overlay test settings from this repository on the repository
         specified by repo_name.
         """
         settings = self.test_settings.get("settings")
@@ -1045,21 +1751,21 @@ class Test(Repo):
             return
         source = settings["test"]["source"]
         target = settings["test"]["target"]
-        self.copy_file(source, target, "test settings", repo_name)
+        self.overlay_file(source, target, "test settings", repo_name)
 
     def copy_apps(self, repo_name: str) -> None:
         """
-        Copy apps file configuration for tests.
+        Overlay the apps file configuration for tests.
         """
         apps = self.test_settings.get("apps_file")
         if not apps:
             self.warn(f"No apps_file settings found for {repo_name}.")
             return
-        self.copy_file(apps["source"], apps["target"], "apps", repo_name)
+        self.overlay_file(apps["source"], apps["target"], "apps", repo_name)
 
     def copy_migrations(self, repo_name: str) -> None:
         """
-        Copy migrations from this repository to the repository
+        Overlay migrations from this repository on the repository
         specified by repo_name.
         """
         migrations_dir = self.test_settings.get("migrations_dir")
@@ -1074,10 +1780,7 @@ class Test(Repo):
                 "'source' or 'target' is missing under 'migrations_dir' in test_settings"
             )
 
-        self.info(f"Copying migrations from {source} to {target} for repo {repo_name}")
-        if not os.path.exists(target):
-            shutil.copytree(source, target)
-            self.info(f"Copied migrations from {source} to {target} for {repo_name}.")
+        self.overlay_file(source, target, "migrations", repo_name)
 
     def patch_repo(self, repo_name: str) -> None:
         """
@@ -1095,10 +1798,11 @@ class Test(Repo):
 
     def _list_tests(self, repo_name: str) -> None:
         """
-        List all test files (recursively) and subdirectories for the specified repository.
+        List all test files (recursively) and subdirectories for the specified
+        repository, with the number of tests each test module defines.
         """
-        test_config = self.tool_cfg.get("test", {}).get(repo_name, {})
-        test_dirs = test_config.get("test_dirs", [])
+        self.test_settings = self.test_cfg(repo_name)
+        test_dirs = self.test_settings.get("test_dirs", [])
 
         if not test_dirs:
             self.err(f"No test directories configured for {repo_name}.")
@@ -1109,9 +1813,13 @@ class Test(Repo):
         )
 
         try:
+            cwd = self._test_cwd()
+            catalog = self._test_catalog(repo_name, cwd)
             found_any = False
+            total = modules = 0
             for test_dir in test_dirs:
-                if not os.path.exists(test_dir):
+                test_dir_path = self._resolve_test_dir(test_dir, cwd)
+                if not test_dir_path:
                     self.warn(
                         f"Test directory '{test_dir}' does not exist for {repo_name}."
                     )
@@ -1119,12 +1827,12 @@ class Test(Repo):
 
                 self.ok(f"\n📁 {test_dir}")
 
-                for root, dirs, files in os.walk(test_dir):
+                for root, dirs, files in os.walk(test_dir_path):
                     # Ignore __pycache__ dirs
                     dirs[:] = [d for d in dirs if not d.startswith("__")]
                     dirs.sort()
 
-                    rel_path = os.path.relpath(root, test_dir)
+                    rel_path = os.path.relpath(root, test_dir_path)
                     display_path = "." if rel_path == "." else rel_path
 
                     test_files = [
@@ -1138,7 +1846,14 @@ class Test(Repo):
                     if test_files:
                         found_any = True
                         for test_file in sorted(test_files):
-                            typer.echo(f"    - {test_file}")
+                            tests = catalog.get(str(Path(root) / test_file))
+                            if tests:
+                                count = sum(test[2] for test in tests)
+                                total += count
+                                modules += 1
+                                typer.echo(f"    - {test_file} ({count})")
+                            else:
+                                typer.echo(f"    - {test_file}")
                     else:
                         if not quiet:
                             typer.echo("    (no test files)")
@@ -1147,32 +1862,93 @@ class Test(Repo):
                 self.warn(
                     f"No Python test files found in configured test directories for {repo_name}."
                 )
+            else:
+                self.info(f"\n{total} tests in {modules} test modules")
         except Exception as e:
             self.err(f"❌ Failed to list tests for {repo_name}: {e}")
 
-    def _run_tests(self, repo_name: str) -> None:
+    def _test_cwd(self) -> str:
+        """
+        Return the directory tests run in: ``clone_dir`` when it exists,
+        otherwise the current working directory (the project root).
+        """
+        clone_dir = self.test_settings.get("clone_dir")
+        if clone_dir and os.path.exists(clone_dir):
+            return clone_dir
+        return os.getcwd()
+
+    def _test_catalog(self, repo_name: str, cwd: str) -> dict:
+        """Return the tests of every test file of a repository, keyed by path."""
+        catalog = TestCatalog(self.cache_dir / "test-catalog" / f"{repo_name}.json")
+        return catalog.refresh([file for _, file in self._test_files(cwd)])
+
+    def _dry_run(self, repo_name: str) -> None:
+        """
+        Report the tests that match ``-k`` (all tests without it) from the
+        test catalog, without starting the test runner.
+        """
         self.test_settings = self.test_cfg(repo_name)
         if not self.test_settings:
             self.warn(f"No test settings found for {repo_name}.")
             return
+        start = time.perf_counter()
+        cwd = self._test_cwd()
+        catalog = self._test_catalog(repo_name, cwd)
+        pytest = self._runner_kind() == "pytest"
+        matches = None
+        if self.keyword:
+            try:
+                matches = (
+                    pytest_keyword_matcher(self.keyword)
+                    if pytest
+                    else unittest_keyword_matcher(self.keyword)
+                )
+            except ValueError as e:
+                self.err(f"❌ {e}")
+                raise typer.Exit(code=1)
+
+        test_dirs = {file: test_dir for test_dir, file in self._test_files(cwd)}
+        package_style = self._label_style() == "package"
+        selected = {}
+        total = 0
+        for path, tests in catalog.items():
+            file = Path(path)
+            rel = os.path.relpath(file, cwd)
+            base = file.relative_to(test_dirs[file]) if package_style else Path(rel)
+            module = ".".join(base.with_suffix("").parts)
+            for class_name, name, cases, markers in tests:
+                total += cases
+                if pytest:
+                    test_id = "::".join(p for p in (rel, class_name, name) if p)
+                    # pytest matches the names of the test, its parents and
+                    # its marks
+                    key = [
+                        n for n in (*Path(rel).parts, class_name, name, *markers) if n
+                    ]
+                else:
+                    test_id = key = ".".join(p for p in (module, class_name, name) if p)
+                if matches is None or matches(key):
+                    selected.setdefault(rel, []).append((test_id, cases))
+        elapsed = (time.perf_counter() - start) * 1000
+
+        count = sum(cases for tests in selected.values() for _, cases in tests)
+        for rel, tests in sorted(selected.items()):
+            self.ok(f"{rel} ({sum(cases for _, cases in tests)})")
+            if count <= 200:
+                for test_id, cases in tests:
+                    suffix = f" [{cases} cases]" if cases > 1 else ""
+                    typer.echo(f"    {test_id}{suffix}")
+        keyword = f" match -k {self.keyword!r}" if self.keyword else ""
+        self.info(
+            f"\n{count} of {total} tests in {len(selected)} modules{keyword} "
+            f"({elapsed:.0f} ms)"
+        )
 
-        # Determine the working directory for running tests
-        # Priority: clone_dir > current working directory (repo root)
-        clone_dir = self.test_settings.get("clone_dir")
-        test_dirs = self.test_settings.get("test_dirs", [])
-
-        # Determine cwd (current working directory)
-        if clone_dir and os.path.exists(clone_dir):
-            cwd = clone_dir
-        else:
-            # Use current working directory (repository root) when clone_dir is not specified
-            cwd = os.getcwd()
-
-        # Prepare environment/files
-        self.copy_apps(repo_name)
-        self.copy_migrations(repo_name)
-        self.copy_settings(repo_name)
-
+    def _test_command(self, repo_name: str) -> list:
+        """
+        Build the base test command for a repository from its test settings,
+        without any test modules or directories.
+        """
         test_command_name = self.test_settings.get("test_command")
         test_command = [test_command_name] if test_command_name else ["pytest"]
 
@@ -1191,56 +1967,2241 @@ class Test(Repo):
 
         if test_options:
             test_command.extend(test_options)
+        if self._runner_kind() == "django":
+            self._set_parallel(test_command)
         if self.keep_db:
             test_command.extend(["--keepdb"])
         if self.keyword:
             test_command.extend(["-k", self.keyword])
+        return test_command
 
-        # Prepare environment variables
+    def _set_parallel(self, test_command: list) -> None:
+        """
+        Resolve the ``--parallel`` worker count of a ./runtests.py command in
+        place. ``--jobs`` takes precedence over the configured value, and
+        ``auto`` becomes the number of cores: runtests.py only honours ``auto``
+        for backends that clone test databases, which the MongoDB backend does
+        through the dm test runner.
+        """
+        for index, arg in enumerate(test_command):
+            if arg == "--parallel" and index + 1 < len(test_command):
+                index += 1
+                value = test_command[index]
+                break
+            if arg.startswith("--parallel="):
+                value = arg.partition("=")[2]
+                break
+        else:
+            if self.jobs > 1:
+                test_command.extend(["--parallel", str(self.jobs)])
+            return
+        if self.jobs > 1:
+            value = str(self.jobs)
+        elif value in ("auto", "0"):
+            value = str(os.cpu_count() or 1)
+        if test_command[index].startswith("--parallel="):
+            value = f"--parallel={value}"
+        test_command[index] = value
+
+    def _test_env(self, repo_name: str) -> dict:
         env = os.environ.copy()
-        env_vars_list = self.tool_cfg.get("test", {}).get(repo_name, {}).get("env_vars")
+        env_vars_list = self.test_cfg(repo_name).get("env_vars")
         if env_vars_list:
             env.update({item["name"]: str(item["value"]) for item in env_vars_list})
+        return env
 
-        if self.modules:
-            test_command.extend(self.modules)
-        elif test_command and test_command[0] == "pytest" and test_dirs:
-            # When no specific modules are provided, run pytest separately for each test_dir
-            # This avoids import errors when one test directory has problematic imports
-            # but allows all tests to run
+    def _run_test_dirs(
+        self,
+        repo_name: str,
+        test_command: list,
+        test_dirs: list,
+        cwd: str,
+        env: dict,
+        dir_labels: dict | None = None,
+    ) -> None:
+        """
+        Run the test command once per test directory, ``self.jobs`` at a time,
+        on the directory or on its labels in ``dir_labels``.
+        """
+        dir_labels = dir_labels or {}
+        if self.jobs <= 1:
             for test_dir in test_dirs:
                 test_cmd = test_command.copy()
-                test_cmd.append(test_dir)
+                test_cmd.extend(dir_labels.get(test_dir, [test_dir]))
                 self.info(f"Running tests in {cwd} with command: {' '.join(test_cmd)}")
-                result = subprocess.run(test_cmd, cwd=cwd, env=env)
-                if result.returncode != 0:
+                test_cmd, test_env = self._instrument(test_cmd, env, test_dir)
+                returncode = self._run_test_process(repo_name, test_cmd, cwd, test_env)
+                if returncode != 0:
                     self.warn(
-                        f"Tests in {test_dir} failed with return code {result.returncode}"
+                        f"Tests in {test_dir} failed with return code {returncode}"
                     )
-            return  # Early return since we already ran the tests
+            return
 
-        self.info(f"Running tests in {cwd} with command: {' '.join(test_command)}")
-        subprocess.run(test_command, cwd=cwd, env=env)
+        # Each concurrently running worker holds a slot; the slot number names
+        # its database so workers never share one.
+        slots = queue.Queue()
+        for slot in range(self.jobs):
+            slots.put(slot)
 
-    def run_tests(self, repo_name: str) -> None:
+        def run_dir(test_dir):
+            slot = slots.get()
+            try:
+                worker_env = env.copy()
+                worker_env["DM_TEST_DB_SUFFIX"] = f"w{slot}"
+                if self.pool_uris:
+                    worker_env["MONGODB_URI"] = self.pool_uris[
+                        slot % len(self.pool_uris)
+                    ]
+                test_cmd, worker_env = self._instrument(
+                    test_command + dir_labels.get(test_dir, [test_dir]),
+                    worker_env,
+                    test_dir,
+                )
+                start = time.monotonic()
+                returncode, output = self.run_capture(test_cmd, cwd=cwd, env=worker_env)
+                return returncode, output, time.monotonic() - start
+            finally:
+                slots.put(slot)
+
+        self.info(
+            f"Running {len(test_dirs)} test directories in {cwd} with {self.jobs} workers: "
+            f"{' '.join(test_command)} <test_dir>"
+        )
+        # Start the historically slowest directories first so that a long
+        # one does not begin last and leave the other workers idle.
+        durations = self.timing_store.report_durations(repo_name)
+        order = sorted(test_dirs, key=lambda d: -durations.get(d, 0.0))
+        start = time.monotonic()
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            futures = {executor.submit(run_dir, d): d for d in order}
+            for future in as_completed(futures):
+                test_dir = futures[future]
+                returncode, output, duration = future.result()
+                results[test_dir] = (returncode, duration)
+                self.title(f"\n── {test_dir} ({duration:.1f}s) ──")
+                typer.echo(output.rstrip())
+        self._print_test_summary(
+            {d: results[d] for d in test_dirs}, time.monotonic() - start
+        )
+
+    def _collection_errors(self, output: str, test_dirs: list, cwd: str) -> set:
         """
-        Run tests for the specified repository.
+        Map the collection errors reported by pytest back to the test
+        directories that contain the failing modules or conftest files.
         """
-        if self.list_tests:
-            self._list_tests(repo_name)
-            return
+        bad_dirs = set()
+        for match in COLLECTION_ERROR_RE.finditer(output):
+            error_path = Path(match.group(1) or match.group(2))
+            candidates = [error_path, Path(cwd) / error_path]
+            for test_dir in test_dirs:
+                test_dir_path = (Path(cwd) / test_dir).resolve()
+                if any(c.resolve().is_relative_to(test_dir_path) for c in candidates):
+                    bad_dirs.add(test_dir)
+        return bad_dirs
+
+    def _quarantined_dirs(
+        self, repo_name: str, test_command: list, test_dirs: list, cwd: str, env: dict
+    ) -> list:
+        """
+        Return the test directories that fail to import, pre-collecting once
+        and caching the result keyed by the repository's HEAD commit.
+        """
+        try:
+            head = GitRepo(cwd, search_parent_directories=True).head.commit.hexsha
+        except (GitCommandError, InvalidGitRepositoryError, ValueError):
+            head = None
+
+        state = self.load_state("quarantine.json")
+        cached = state.get(repo_name, {})
+        if head and cached.get("head") == head and cached.get("test_dirs") == test_dirs:
+            return cached.get("quarantined", [])
+
+        self.info(f"Pre-collecting {len(test_dirs)} test directories...")
+        collect_command = test_command + ["--collect-only", "-q"]
+        returncode, output = self.run_capture(
+            collect_command + test_dirs, cwd=cwd, env=env
+        )
+        if returncode in (3, 4):
+            # A broken conftest aborts the whole session and hides errors in
+            # other directories, so collect each directory on its own.
+            def collect(test_dir):
+                rc, out = self.run_capture(
+                    collect_command + [test_dir], cwd=cwd, env=env
+                )
+                broken = rc in (3, 4) or self._collection_errors(out, [test_dir], cwd)
+                return test_dir if broken else None
 
-        path, _ = self.ensure_repo(repo_name)
-        if not path:
-            self.err(f"❌ Failed to run tests for {repo_name}: path not found.")
+            with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+                bad_dirs = {d for d in executor.map(collect, test_dirs) if d}
+        else:
+            bad_dirs = self._collection_errors(output, test_dirs, cwd)
+
+        quarantined = [d for d in test_dirs if d in bad_dirs]
+        if head:
+            with self.locked_state("quarantine.json") as state:
+                state[repo_name] = {
+                    "head": head,
+                    "test_dirs": test_dirs,
+                    "quarantined": quarantined,
+                }
+        return quarantined
+
+    def _run_single_session(
+        self, repo_name: str, test_command: list, test_dirs: list, cwd: str, env: dict
+    ) -> None:
+        """
+        Run all test directories in one pytest session, skipping directories
+        known to fail at import time instead of paying for one process each.
+        """
+        quarantined = self._quarantined_dirs(
+            repo_name, test_command, test_dirs, cwd, env
+        )
+        for test_dir in quarantined:
+            self.warn(f"Skipping {test_dir}: it fails to import (quarantined).")
+        runnable = [d for d in test_dirs if d not in quarantined]
+        if not runnable:
+            self.err(f"❌ All test directories for {repo_name} are quarantined.")
             return
 
-        self._run_tests(repo_name)
-
-    def set_modules(self, modules: list) -> None:
-        self.modules = modules
+        test_cmd = test_command + runnable
+        self.info(f"Running tests in {cwd} with command: {' '.join(test_cmd)}")
+        test_cmd, env = self._instrument(test_cmd, env, repo_name)
+        returncode = self._run_test_process(repo_name, test_cmd, cwd, env)
+        if returncode != 0:
+            self.warn(f"Tests failed with return code {returncode}")
 
-    def set_keep_db(self, keep_db: bool) -> None:
+    def _runner_kind(self) -> str:
+        """
+        Return ``"pytest"`` for suites driven by pytest (directly or through a
+        wrapper script, configured with ``runner = "pytest"``), ``"django"``
+        for suites driven by Django's test runner through runtests.py or
+        ``manage.py test``, and ``"other"`` for any other command, such as
+        ``just``, which gets no runner-specific options or instrumentation.
+        """
+        runner = self.test_settings.get("runner")
+        if runner:
+            return runner
+        test_command = self.test_settings.get("test_command") or "pytest"
+        if test_command == "pytest":
+            return "pytest"
+        words = [
+            Path(word).name
+            for word in [
+                *test_command.split(),
+                *(self.test_settings.get("test_options") or []),
+            ]
+        ]
+        if "runtests.py" in words:
+            return "django"
+        if "manage.py" in words and words[words.index("manage.py") + 1 :][:1] == [
+            "test"
+        ]:
+            return "django"
+        return "other"
+
+    def _resolve_test_dir(self, test_dir: str, cwd: str) -> Path | None:
+        """Resolve a configured test directory against cwd or the project root."""
+        for candidate in (Path(cwd) / test_dir, Path(test_dir)):
+            if candidate.is_dir():
+                return candidate.resolve()
+        return None
+
+    def _test_labels(self, cwd: str) -> dict:
+        """
+        Discover the test labels of the configured test directories, mapped to
+        the test files each covers.
+
+        ``label_style`` in the test settings picks the label format:
+        ``"path"`` (test files relative to cwd, the pytest default),
+        ``"module"`` (dotted modules relative to cwd, the ./runtests.py
+        default) or ``"package"`` (top-level test packages, as Django's own
+        runtests.py expects).
+        """
+        style = self._label_style()
+        labels = {}
+        for test_dir_path, file_path in self._test_files(cwd):
+            if style == "package":
+                rel = file_path.relative_to(test_dir_path)
+                if len(rel.parts) < 2:
+                    continue
+                label = rel.parts[0]
+            else:
+                rel = os.path.relpath(file_path, cwd)
+                label = (
+                    rel if style == "path" else rel[: -len(".py")].replace(os.sep, ".")
+                )
+            labels.setdefault(label, []).append(file_path)
+        return labels
+
+    def _label_style(self) -> str:
+        return self.test_settings.get("label_style") or (
+            "path" if self._runner_kind() == "pytest" else "module"
+        )
+
+    def _test_files(self, cwd: str) -> list:
+        """
+        Return the test files of the configured test directories, named the
+        way the runner discovers them, as pairs of test directory and file.
+        """
+        pattern = re.compile(
+            r"^(test_.*|.*_test)\.py$"
+            if self._runner_kind() == "pytest"
+            else r"^test.*\.py$"
+        )
+        files = []
+        for test_dir in self.test_settings.get("test_dirs", []):
+            test_dir_path = self._resolve_test_dir(test_dir, cwd)
+            if not test_dir_path:
+                self.warn(f"Test directory '{test_dir}' does not exist.")
+                continue
+            for root, dirs, names in os.walk(test_dir_path):
+                dirs[:] = sorted(d for d in dirs if not d.startswith(("__", ".")))
+                for name in sorted(names):
+                    if pattern.match(name):
+                        files.append((test_dir_path, Path(root) / name))
+        return files
+
+    @staticmethod
+    def _label_matcher(labels) -> callable:
+        """
+        Return a function mapping a recorded test, by id and file, to the test
+        label that contains it, or None.
+        """
+        keys = {}
+        for label in labels:
+            key = label.removesuffix(".py")
+            keys[key.replace(os.sep, ".").replace("/", ".")] = label
+
+        def match(test: str, file: str | None) -> str | None:
+            # pytest reports carry the test file; match on it when present
+            source = file or test
+            if source.endswith(".py"):
+                source = source[: -len(".py")].replace("/", ".")
+            parts = source.split(".")
+            # The longest run of dotted parts that names a label wins, so that
+            # reports rooted above cwd still map onto cwd-relative labels.
+            for start in range(len(parts)):
+                for end in range(len(parts), start, -1):
+                    label = keys.get(".".join(parts[start:end]))
+                    if label:
+                        return label
+            return None
+
+        return match
+
+    def _unit_durations(self, repo_name: str, labels: dict) -> dict:
+        """
+        Return the recorded duration in seconds of each test label, summing
+        the latest durations of the tests that belong to it.
+        """
+        match = self._label_matcher(labels)
+        durations = {}
+        for test, result in self.timing_store.latest_results(repo_name).items():
+            if not result["duration"] or result["outcome"] == "skipped":
+                continue
+            label = match(test, result["file"])
+            if label:
+                durations[label] = durations.get(label, 0.0) + result["duration"]
+        return durations
+
+    def _failed_labels(self, repo_name: str, cwd: str) -> list:
+        """
+        Return the recorded failures of a repository as pairs of a label that
+        reruns the failing test and the test label that contains it: dotted
+        test ids for Django's runner, node ids for pytest. Failures of tests
+        whose files are gone are dropped.
+        """
+        match = self._label_matcher(self._test_labels(cwd))
+        store = self.timing_store
+        failed = []
+        for test, failure in store.failures(repo_name).items():
+            file = failure["file"]
+            label = self._failure_label(test, file)
+            unit = match(label or test, file)
+            if not unit:
+                continue
+            # Import, collection and class fixture errors stand for the tests
+            # under them; they are fixed once any of those tests reports.
+            if label is None or (self._runner_kind() != "pytest" and label != test):
+                prefix = f"{label or test}."
+                later = store.tests_since(repo_name, failure["run_id"])
+                if any(t.startswith(prefix) for t in later):
+                    continue
+            failed.append((label if label is not None else unit, unit))
+        return failed
+
+    def _failure_label(self, test: str, file: str | None) -> str | None:
+        """
+        Turn a test id recorded from a JUnit XML report into a label that
+        reruns it, or None when only its test file can be rerun.
+        """
+        if self._runner_kind() != "pytest":
+            # Errors in class fixtures are reported as "setUpClass (module.Class)"
+            # and import errors as "unittest.loader._FailedTest.<label>"
+            if m := re.fullmatch(r"\w+ \((.+)\)", test):
+                return m.group(1)
+            return test.removeprefix("unittest.loader._FailedTest.")
+        if not file:
+            # Collection errors carry no file
+            return None
+        # xunit1 class names are the dotted module, then any test classes
+        module = file[: -len(".py")].replace("/", ".")
+        classname, _, name = test.rpartition(".")
+        if "[" in test:
+            # Parameter ids may contain dots
+            head, _, params = test.partition("[")
+            classname, _, name = head.rpartition(".")
+            name = f"{name}[{params}"
+        if classname != module and not classname.startswith(f"{module}."):
+            return None
+        classes = classname[len(module) + 1 :].split(".") if classname != module else []
+        # Files are relative to pytest's rootdir, which may be above cwd
+        cwd = Path(self._test_cwd())
+        parts = Path(file).parts
+        path = next(
+            (
+                Path(*parts[index:]).as_posix()
+                for index in range(len(parts))
+                if (cwd / Path(*parts[index:])).is_file()
+            ),
+            file,
+        )
+        return "::".join([path, *classes, name])
+
+    def _failed_first_labels(
+        self, repo_name: str, cwd: str, labels: list | None
+    ) -> list | None:
+        """
+        Put the recorded failures among ``labels`` (all test labels when None)
+        first. Both runners drop tests selected twice.
+        """
+        units = labels if labels is not None else sorted(self._test_labels(cwd))
+        failed = [
+            label
+            for label, unit in self._failed_labels(repo_name, cwd)
+            if unit in units
+        ]
+        if not failed:
+            return labels
+        self.info(f"Running {len(failed)} tests of {repo_name} that failed last first")
+        return failed + units
+
+    def _shard_labels(self, repo_name: str, cwd: str) -> list:
+        """
+        Split the repository's test labels into ``N`` shards balanced by
+        historical duration, falling back to the number of test files per
+        label, and return the labels of shard ``K``.
+        """
+        index, total = self.shard
+        labels = self._test_labels(cwd)
+        durations = self._unit_durations(repo_name, labels)
+        known = [durations[label] for label in labels if label in durations]
+        if sum(known) > 0:
+            # Labels without history are weighed like an average known label
+            average_per_file = sum(known) / sum(
+                len(labels[label]) for label in labels if label in durations
+            )
+            weights = {
+                label: durations.get(label, len(files) * average_per_file)
+                for label, files in labels.items()
+            }
+            self.info(
+                f"Balancing shards by duration ({len(known)}/{len(labels)} labels timed)"
+            )
+        else:
+            weights = {label: len(files) for label, files in labels.items()}
+            self.info("Balancing shards by test file count (no timing history)")
+
+        # Longest-processing-time first: heaviest label to the lightest shard
+        shards = [[0.0, []] for _ in range(total)]
+        for label in sorted(weights, key=lambda lbl: (-weights[lbl], lbl)):
+            lightest = min(shards, key=lambda shard: shard[0])
+            lightest[0] += weights[label]
+            lightest[1].append(label)
+
+        weight, shard_labels = shards[index - 1]
+        self.info(
+            f"Shard {index}/{total}: {len(shard_labels)} of {len(labels)} labels "
+            f"(weight {weight:.1f} of {sum(weights.values()):.1f})"
+        )
+        return sorted(shard_labels)
+
+    @property
+    def timing_store(self) -> TimingStore:
+        return TimingStore(self.cache_dir / "timings.sqlite")
+
+    def _instrument(self, test_command: list, env: dict, name: str) -> tuple:
+        """
+        Return the test command and environment that make one test run write
+        a JUnit XML report, recorded under ``name`` once the tests finish,
+        and collect per-test coverage while the impact map is being built.
+        """
+        path = self.junit_dir / f"{len(self.junit_reports)}.xml"
+        self.junit_reports[path] = name
+        if self._runner_kind() == "other":
+            # Nothing is known about the options or runner of other commands
+            return test_command, env
+        if self._runner_kind() == "pytest":
+            # xunit1 reports include the file of each test case
+            test_command = test_command + [
+                f"--junitxml={path}",
+                "-o",
+                "junit_family=xunit1",
+            ]
+        else:
+            env = {**env, "DM_TEST_RUNNER": TIMING_RUNNER, "DM_JUNIT_XML": str(path)}
+        # Test settings that roll back TestCase tests report on them here
+        env = {**env, "DM_TRANSACTIONS": str(self.junit_dir / "transactions")}
+        if self.mongo_stats:
+            env = {**env, "DM_MONGO_STATS": str(self.junit_dir / "mongo-stats")}
+            if self._runner_kind() == "pytest":
+                test_command = test_command + [
+                    "-p",
+                    "django_mongodb_cli.testing.pytest_plugin",
+                ]
+        if self.coverage_dir:
+            test_command = self._coverage_command(test_command)
+        return test_command, env
+
+    def _coverage_command(self, test_command: list) -> list:
+        """
+        Wrap a Python test command in ``coverage run`` measuring the workspace,
+        with the coverage context switched per test. Processes forked by
+        multiprocessing, such as ``--parallel`` workers, are measured too.
+        """
+        if test_command[0] == "pytest":
+            program = ["-m", "pytest"]
+        else:
+            program = [test_command[0]]
+        args = test_command[1:]
+        if self._runner_kind() == "pytest":
+            args += ["-p", "django_mongodb_cli.testing.pytest_plugin"]
+        rcfile = self.coverage_dir / ".coveragerc"
+        if not rcfile.exists():
+            # Measuring multiprocessing children only takes settings from a
+            # configuration file, which they find through the environment.
+            config = configparser.ConfigParser(interpolation=None)
+            config["run"] = {
+                "parallel": "true",
+                "concurrency": "thread,multiprocessing",
+                "data_file": str(self.coverage_dir / ".coverage"),
+                "include": f"{self.path}/*",
+            }
+            with rcfile.open("w") as f:
+                config.write(f)
+        return [
+            sys.executable,
+            "-m",
+            "coverage",
+            "run",
+            f"--rcfile={rcfile}",
+            *program,
+            *args,
+        ]
+
+    @property
+    def impact_map(self) -> ImpactMap:
+        return ImpactMap(self.cache_dir / "impact")
+
+    def _workspace_heads(self) -> dict:
+        """Return the HEAD commit of every cloned workspace repository."""
+        map_repos, fs_repos = self._list_repos()
+        heads = {}
+        for name in sorted(map_repos & fs_repos):
+            try:
+                repo = self.get_repo(str(self.get_repo_path(name)))
+                heads[name] = repo.head.commit.hexsha
+            except (GitCommandError, InvalidGitRepositoryError, ValueError):
+                continue
+        return heads
+
+    def _affected_labels(self, repo_name: str, cwd: str) -> list | None:
+        """
+        Return the test labels affected by changes in the workspace since the
+        impact map was built or since each branch left its upstream, or None
+        when the map is missing or stale and a full run has to rebuild it.
+        """
+        built = self.impact_map.heads(repo_name)
+        if not built:
+            self.info(f"No test impact map for {repo_name} yet.")
+            return None
+        heads = self._workspace_heads()
+        if set(heads) != set(built):
+            self.info("The cloned repositories changed since the impact map was built.")
+            return None
+
+        changed = {}
+        for name, sha in heads.items():
+            path, repo = self.ensure_repo(name)
+            try:
+                moved = not repo.is_ancestor(built[name], sha)
+            except GitCommandError:
+                moved = True
+            if moved:
+                self.info(f"{name} is no longer based on the impact map's commit.")
+                return None
+            for f in self.changed_files(name, since=built[name], include_deleted=True):
+                changed[str((path / f).resolve())] = (repo, built[name], f)
+        if not changed:
+            return []
+
+        from coverage import CoverageData
+
+        data = CoverageData(basename=str(self.impact_map.coverage_file(repo_name)))
+        data.read()
+        measured = set(data.measured_files())
+        blobs = self.impact_map.blobs(repo_name, set(changed))
+        test_dirs = [
+            d
+            for d in (
+                self._resolve_test_dir(t, cwd)
+                for t in self.test_settings.get("test_dirs", [])
+            )
+            if d
+        ]
+
+        tests = set()
+        for file, (repo, sha, relative) in sorted(changed.items()):
+            file_path = Path(file)
+            if (
+                file_path.suffix in IMPACT_IGNORED_SUFFIXES
+                or "docs" in Path(relative).parts
+                or "__pycache__" in file_path.parts
+            ):
+                continue
+            if file_path.suffix != ".py":
+                self.info(f"{file} is not Python code; its impact can't be traced.")
+                return None
+            if file not in measured:
+                if any(file_path.is_relative_to(d) for d in test_dirs):
+                    self.info(f"{file} is a new test module.")
+                    return None
+                # Never executed by the suite
+                continue
+
+            contexts = data.contexts_by_lineno(file)
+            file_tests = set().union(*contexts.values()) - {""}
+            if not file_tests:
+                self.info(f"{file} only runs at import or setup time.")
+                return None
+            lines = self._changed_lines(repo, sha, relative, blobs.get(file))
+            if lines is None:
+                tests |= file_tests
+                continue
+            line_tests = set()
+            for line in lines:
+                line_contexts = set(contexts.get(line, ()))
+                if line_contexts == {""}:
+                    # Module-level code: anything using the module may change
+                    line_tests = file_tests
+                    break
+                line_tests |= line_contexts
+            tests |= line_tests - {""}
+        return self._impact_labels(tests, cwd)
+
+    def _changed_lines(
+        self, repo: GitRepo, sha: str, relative: str, built_blob: str | None
+    ) -> set | None:
+        """
+        Return the line numbers of a file, as it was measured, that differ in
+        the working tree, or None when only the whole file can be compared:
+        it is deleted or differed from commit ``sha`` when it was measured.
+        """
+        try:
+            if (
+                built_blob is None
+                or repo.git.rev_parse(f"{sha}:{relative}") != built_blob
+            ):
+                return None
+            diff = repo.git.diff("-U0", sha, "--", relative)
+        except GitCommandError:
+            return None
+        lines = set()
+        for match in HUNK_RE.finditer(diff):
+            start, count = int(match.group(1)), int(match.group(2) or 1)
+            # Pure insertions touch the lines around them
+            lines.update(range(start, start + count) if count else (start, start + 1))
+        return lines
+
+    def _impact_labels(self, tests: set, cwd: str) -> list:
+        """
+        Turn test ids from coverage contexts into runnable labels: test
+        classes for Django's runner, node ids relative to cwd for pytest
+        (the pytest plugin records them with absolute paths).
+        """
+        labels = set()
+        for test in tests:
+            if self._runner_kind() != "pytest":
+                # Errors in setUpClass are reported as "setUpClass (module.Class)"
+                if " " not in test:
+                    labels.add(test.rpartition(".")[0] or test)
+                continue
+            # Parametrized cases are selected through their function
+            node_id = re.sub(r"\[.*\]$", "", test)
+            path, _, rest = node_id.partition("::")
+            path = os.path.relpath(path, cwd)
+            labels.add(f"{path}::{rest}" if rest else path)
+        return sorted(labels)
+
+    def _start_impact_map(self, repo_name: str, test_command: list) -> dict | None:
+        """
+        Prepare a full run that builds the impact map and return the workspace
+        HEAD commits it describes, or None when coverage can't be collected.
+        """
+        if importlib.util.find_spec("coverage") is None:
+            self.warn(
+                "Install coverage to build the test impact map; running all tests."
+            )
+            return None
+        if test_command[0] != "pytest" and not test_command[0].endswith(".py"):
+            self.warn(
+                f"Can't trace {test_command[0]} with coverage; running all tests."
+            )
+            return None
+        self.info(f"Running all tests of {repo_name} to build the test impact map.")
+        self.coverage_dir = self._coverage_data_dir(repo_name)
+        return self._workspace_heads()
+
+    def _start_coverage(self, repo_name: str, test_command: list, full: bool):
+        """
+        Prepare a ``--coverage`` run and return the workspace HEAD commits
+        when it runs every test, so that its contexts also rebuild the impact
+        map, or None.
+        """
+        if importlib.util.find_spec("coverage") is None:
+            self.warn("Install coverage to use --coverage; running without it.")
+            return None
+        if test_command[0] != "pytest" and not test_command[0].endswith(".py"):
+            self.warn(
+                f"Can't trace {test_command[0]} with coverage; running without it."
+            )
+            return None
+        self.coverage_dir = self._coverage_data_dir(repo_name)
+        return self._workspace_heads() if full else None
+
+    def _coverage_data_dir(self, repo_name: str) -> Path:
+        """
+        Return the directory the test processes of a run write coverage data
+        to: a temporary one, or the repository's directory under
+        ``DM_COVERAGE_DIR`` when a group run combines the data of every
+        repository.
+        """
+        shared = os.environ.get("DM_COVERAGE_DIR")
+        if not shared:
+            return Path(tempfile.mkdtemp(prefix="coverage-", dir=self.cache_dir))
+        path = Path(shared) / repo_name
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def _editable_sources(self) -> list:
+        """
+        Return the source directories of the packages installed in editable
+        mode from the workspace, e.g. django_mongodb_backend.
+        """
+        workspace = self.path.resolve()
+        sources = set()
+        for dist in importlib.metadata.distributions():
+            try:
+                direct_url = json.loads(dist.read_text("direct_url.json") or "{}")
+            except ValueError:
+                continue
+            url = direct_url.get("url", "")
+            if not direct_url.get("dir_info", {}).get("editable") or not (
+                url.startswith("file://")
+            ):
+                continue
+            project = Path(urllib.parse.unquote(url[len("file://") :])).resolve()
+            if not project.is_relative_to(workspace):
+                continue
+            packages = set()
+            for name in (dist.read_text("top_level.txt") or "").split():
+                try:
+                    spec = importlib.util.find_spec(name)
+                except (ImportError, ValueError):
+                    continue
+                if spec is None or not spec.origin:
+                    continue
+                origin = Path(spec.origin).resolve()
+                package = origin.parent if spec.submodule_search_locations else origin
+                if package.is_relative_to(project):
+                    packages.add(package)
+            # Without top-level names, measure the whole project
+            sources |= packages or {project}
+        return sorted(sources)
+
+    def _report_coverage(self, data_dirs: list, report_dir: Path, name: str) -> None:
+        """
+        Combine the coverage data written to ``data_dirs`` into one data file,
+        HTML report and XML report in ``report_dir``, limited to the
+        workspace's editable packages. The HTML report shows the tests that
+        ran each line.
+        """
+        import coverage
+
+        paths = [str(f) for d in data_dirs for f in sorted(d.glob(".coverage.*"))]
+        if not paths:
+            self.warn(f"No coverage data was collected for {name}.")
+            return
+        report_dir.mkdir(parents=True, exist_ok=True)
+        data_file = report_dir / ".coverage"
+        data_file.unlink(missing_ok=True)
+        sources = self._editable_sources()
+        include = [f"{p}/*" if p.is_dir() else str(p) for p in sources] or None
+        cov = coverage.Coverage(data_file=str(data_file))
+        try:
+            cov.combine(data_paths=paths, keep=False)
+            percent = cov.html_report(
+                directory=str(report_dir / "html"),
+                include=include,
+                show_contexts=True,
+                title=f"{name} coverage",
+            )
+            cov.xml_report(outfile=str(report_dir / "coverage.xml"), include=include)
+        except coverage.exceptions.CoverageException as e:
+            self.warn(f"Could not write the coverage report of {name}: {e}")
+            return
+        scope = ", ".join(p.name for p in sources) if sources else "the workspace"
+        self.ok(f"✅ Coverage of {scope} by {name}: {percent:.1f}%")
+        self.info(
+            f"HTML report: {report_dir / 'html' / 'index.html'}\n"
+            f"XML report: {report_dir / 'coverage.xml'}"
+        )
+
+    def _save_impact_map(self, repo_name: str, heads: dict, keep: bool = False) -> None:
+        """
+        Keep the combined coverage contexts of a full run as the impact map,
+        leaving the data files of the run in place with ``keep``.
+        """
+        import coverage
+        from coverage.exceptions import CoverageException
+
+        coverage_file = self.impact_map.coverage_file(repo_name)
+        coverage_file.parent.mkdir(parents=True, exist_ok=True)
+        coverage_file.unlink(missing_ok=True)
+        cov = coverage.Coverage(data_file=str(coverage_file))
+        try:
+            cov.combine(
+                data_paths=[str(f) for f in self.coverage_dir.glob(".coverage.*")],
+                keep=keep,
+            )
+            measured = cov.get_data().measured_files()
+        except (CoverageException, OSError) as e:
+            self.warn(f"Could not build the test impact map: {e}")
+            return
+        if not measured:
+            self.warn("No coverage data was collected; the impact map was not built.")
+            return
+        blobs = {}
+        for file in measured:
+            try:
+                blobs[file] = git_blob_hash(Path(file))
+            except OSError:
+                continue
+        self.impact_map.save(repo_name, heads, blobs)
+        self.info(
+            f"Built the test impact map of {repo_name} from {len(measured)} files."
+        )
+
+    @staticmethod
+    def mongodb_topology(uri: str | None) -> str:
+        """
+        Describe the MongoDB deployment at ``uri`` as its topology and server
+        version, e.g. ``replicaset/8.0.4``.
+        """
+        try:
+            from pymongo import MongoClient
+            from pymongo.errors import PyMongoError
+        except ImportError:
+            return "unknown"
+        try:
+            client = MongoClient(
+                uri or "mongodb://localhost:27017", serverSelectionTimeoutMS=2000
+            )
+            try:
+                hello = client.admin.command("hello")
+                version = client.server_info().get("version", "")
+            finally:
+                client.close()
+        except PyMongoError:
+            return "unknown"
+        if hello.get("msg") == "isdbgrid":
+            topology = "sharded"
+        elif hello.get("setName"):
+            topology = "replicaset"
+        else:
+            topology = "standalone"
+        return f"{topology}/{version}" if version else topology
+
+    def _record_timings(self, repo_name: str, cwd: str, env: dict, elapsed: float):
+        """Load the JUnit XML reports of a test run into the timing database."""
+        reports = {
+            path: name for path, name in self.junit_reports.items() if path.exists()
+        }
+        if not reports:
+            return
+        try:
+            sha = GitRepo(cwd, search_parent_directories=True).head.commit.hexsha
+        except (GitCommandError, InvalidGitRepositoryError, ValueError):
+            sha = None
+        uri = env.get("MONGODB_URI")
+        topology = self.mongodb_topology(uri)
+        if uri:
+            # Never store credentials
+            uri = re.sub(r"//[^/@]*@", "//", uri)
+        try:
+            count = self.timing_store.record_run(
+                repo_name, sha, uri, topology, elapsed, reports, self.rerun_reports
+            )
+        except sqlite3.Error as e:
+            self.warn(f"Could not record test timings: {e}")
+            return
+        if count:
+            self.info(f"Recorded timings of {count} tests in {self.timing_store.path}")
+
+    def _print_slowest(self, repo_name: str) -> None:
+        """Print the slowest tests of a repository by their latest duration."""
+        results = self.timing_store.latest_results(repo_name)
+        timed = [(t, r) for t, r in results.items() if r["duration"] is not None]
+        if not timed:
+            self.warn(f"No test timings recorded for {repo_name}; run its tests first.")
+            return
+        timed.sort(key=lambda item: -item[1]["duration"])
+        self.title(
+            f"Slowest {min(self.slowest, len(timed))} of {len(timed)} tests for {repo_name}:"
+        )
+        for test, result in timed[: self.slowest]:
+            fg = (
+                typer.colors.RED
+                if result["outcome"] in ("failed", "error")
+                else typer.colors.GREEN
+            )
+            self._msg(
+                f"{result['duration']:>9.2f}s  {result['outcome']:<7}  "
+                f"{(result['sha'] or '')[:10]:<10}  {test}",
+                fg,
+            )
+
+    def _print_trend(self, repo_name: str) -> None:
+        """Print recent runs of a repository and the tests that slowed down most."""
+        runs = self.timing_store.runs(repo_name, self.trend)
+        if not runs:
+            self.warn(f"No test timings recorded for {repo_name}; run its tests first.")
+            return
+        self.title(
+            f"{'Started':<19}  {'Commit':<10}  {'Topology':<20}  {'Tests':>6}  "
+            f"{'Failed':>6}  {'Test time':>10}  {'Change':>8}"
+        )
+        previous = None
+        for _, sha, topology, started, _, tests, failed, test_time in runs:
+            change = f"{(test_time - previous) / previous:+.1%}" if previous else ""
+            self._msg(
+                f"{started:<19}  {(sha or '')[:10]:<10}  {topology or '':<20}  "
+                f"{tests:>6}  {failed or 0:>6}  {test_time:>9.1f}s  {change:>8}",
+                typer.colors.RED if failed else typer.colors.GREEN,
+            )
+            previous = test_time or None
+        if len(runs) > 1:
+            slowdowns = self.timing_store.slowdowns(runs[-2][0], runs[-1][0], 10)
+            if slowdowns:
+                self.title("\nSlowed down most since the previous run:")
+                for test, before, after, delta in slowdowns:
+                    typer.echo(
+                        f"  +{delta:.2f}s  ({before:.2f}s → {after:.2f}s)  {test}"
+                    )
+
+    def _use_result_cache(self, test_command: list) -> bool:
+        """
+        Whether passes are cached, unless ``--no-cache``: only whole test labels
+        run by a Python test command, not explicit modules, keywords, impact
+        selections, last failures or watched changes, and not when every test
+        must run to be measured.
+        """
+        return self.result_cache and not (
+            self.mongo_stats
+            or self.coverage
+            or self.modules
+            or self.keyword
+            or self.affected
+            or self.last_failed
+            or self.watch
+            or self._runner_kind() == "other"
+        )
+
+    def _repo_fingerprint(self, repo_name: str, exclude: list) -> str:
+        """
+        Hash the working tree of a workspace repository: the blobs of tracked
+        files, unstaged changes and untracked Python files, leaving out the
+        ``exclude`` paths. Editable installs keep their version when their
+        code changes, so this stands in for the installed version.
+        """
+        path, repo = self.ensure_repo(repo_name)
+        if not repo:
+            return ""
+        pathspec = ["--", ".", *(f":(exclude){e}" for e in exclude)]
+        digest = hashlib.sha256()
+        try:
+            digest.update(repo.git.ls_files("-s", *pathspec).encode())
+            digest.update(repo.git.diff(*pathspec).encode())
+        except GitCommandError:
+            return ""
+        for name in sorted(repo.untracked_files):
+            if name.endswith(".py") and not any(
+                Path(name).is_relative_to(e) for e in exclude
+            ):
+                digest.update(name.encode())
+                digest.update((path / name).read_bytes())
+        return digest.hexdigest()
+
+    def _result_cache_keys(
+        self, repo_name: str, test_command: list, cwd: str, env: dict
+    ) -> dict:
+        """
+        Return the cache key of every test label: a hash of its test modules
+        and of the inputs shared by all labels, namely the test command, the
+        test support code (conftest, models, ...), the settings, apps and
+        migrations copied into the repository, the working trees of the
+        workspace repositories the suite depends on, the installed versions of
+        Django, the backend and PyMongo, and the MongoDB server version.
+        """
+        labels = self._test_labels(cwd)
+        digest = hashlib.sha256()
+
+        def add(*parts):
+            for part in parts:
+                digest.update(str(part).encode())
+                digest.update(b"\0")
+
+        # The number of --parallel workers doesn't change what passes
+        add(
+            *(
+                "--parallel" if arg.startswith("--parallel=") else arg
+                for index, arg in enumerate(test_command)
+                if not (index and test_command[index - 1] == "--parallel")
+            )
+        )
+        label_files = {f for files in labels.values() for f in files}
+        test_dirs = [
+            d
+            for d in (
+                self._resolve_test_dir(t, cwd)
+                for t in self.test_settings.get("test_dirs", [])
+            )
+            if d
+        ]
+        for test_dir in test_dirs:
+            for file in sorted(test_dir.rglob("*.py")):
+                if file not in label_files and "__pycache__" not in file.parts:
+                    add(file, hashlib.sha256(file.read_bytes()).hexdigest())
+
+        copied = [
+            (self.test_settings.get("settings") or {}).get("test", {}).get("source"),
+            (self.test_settings.get("apps_file") or {}).get("source"),
+            (self.test_settings.get("migrations_dir") or {}).get("source"),
+        ]
+        for source in filter(None, copied):
+            source = Path(source)
+            files = sorted(source.rglob("*")) if source.is_dir() else [source]
+            for file in files:
+                if file.is_file() and "__pycache__" not in file.parts:
+                    add(file, hashlib.sha256(file.read_bytes()).hexdigest())
+
+        repo_path = self.get_repo_path(repo_name).resolve()
+        exclude = [
+            str(d.relative_to(repo_path))
+            for d in test_dirs
+            if d.is_relative_to(repo_path)
+        ]
+        add(repo_name, self._repo_fingerprint(repo_name, exclude))
+        depends_on = self.test_settings.get(
+            "depends_on", ["django", "django-mongodb-backend"]
+        )
+        for name in depends_on:
+            if name != repo_name and self.get_repo_path(name).exists():
+                add(name, self._repo_fingerprint(name, []))
+        for distribution in ("django", "django-mongodb-backend", "pymongo"):
+            try:
+                add(distribution, importlib.metadata.version(distribution))
+            except importlib.metadata.PackageNotFoundError:
+                add(distribution, "")
+        add(self.mongodb_topology(env.get("MONGODB_URI")))
+
+        base = digest.hexdigest()
+        keys = {}
+        for label, files in labels.items():
+            label_digest = hashlib.sha256(base.encode())
+            for file in sorted(files):
+                label_digest.update(str(file).encode())
+                label_digest.update(file.read_bytes())
+            keys[label] = label_digest.hexdigest()
+        return keys
+
+    def _update_result_cache(self, repo_name: str, keys: dict, ran: list) -> None:
+        """
+        Cache the labels of this run whose tests all passed, from the JUnit
+        XML reports, and forget the ones that failed or didn't report.
+        """
+        match = self._label_matcher(keys)
+        outcomes = {}
+        for path in self.junit_reports:
+            for case in TimingStore.parse_junit(path):
+                label = match(case["test"], case["file"])
+                if label:
+                    outcomes.setdefault(label, set()).add(case["outcome"])
+
+        with self.locked_state("test-cache.json") as state:
+            passed = state.setdefault(repo_name, {})
+            for label in ran:
+                if outcomes.get(label) and outcomes[label] <= {"passed", "skipped"}:
+                    passed[label] = keys[label]
+                else:
+                    passed.pop(label, None)
+
+    def _print_test_summary(self, results: dict, elapsed: float) -> None:
+        """Print a pass/fail/duration table for per-directory test runs."""
+        width = max(len(name) for name in results)
+        self.title(f"\n{'Tests':<{width}}  {'Result':<10}  Time")
+        passed = failed = 0
+        for name, (returncode, duration) in results.items():
+            # pytest exits with 5 when a directory has no tests to collect
+            if returncode == 0 or returncode == 5:
+                passed += 1
+                status, fg = (
+                    ("passed" if returncode == 0 else "no tests"),
+                    typer.colors.GREEN,
+                )
+            else:
+                failed += 1
+                status, fg = f"failed ({returncode})", typer.colors.RED
+            self._msg(f"{name:<{width}}  {status:<10}  {duration:.1f}s", fg)
+        total = sum(duration for _, duration in results.values())
+        self._msg(
+            f"\n{passed} passed, {failed} failed in {elapsed:.1f}s "
+            f"({total:.1f}s of test time)",
+            typer.colors.RED if failed else typer.colors.GREEN,
+        )
+
+    def _run_tests(self, repo_name: str) -> None:
+        self.test_settings = self.test_cfg(repo_name)
+        if not self.test_settings:
+            self.warn(f"No test settings found for {repo_name}.")
+            return
+
+        # Determine the working directory for running tests
+        # Priority: clone_dir > current working directory (repo root)
+        test_dirs = self.test_settings.get("test_dirs", [])
+        cwd = self._test_cwd()
+
+        # Prepare environment/files
+        self.copy_apps(repo_name)
+        self.copy_migrations(repo_name)
+        self.copy_settings(repo_name)
+
+        test_command = self._test_command(repo_name)
+
+        # Prepare environment variables
+        env = self._test_env(repo_name)
+        if self.db_snapshot:
+            if self._runner_kind() == "django":
+                env["DM_DB_SNAPSHOT"] = str(self.cache_dir / "snapshots" / repo_name)
+            else:
+                self.warn("--db-snapshot only applies to ./runtests.py suites.")
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        pool = members = None
+        if self.mongo_pool:
+            pool = MongoPool(self.pyproject_file)
+            pool.ctx = self.ctx
+            # ./runtests.py workers share one server, each with its own clone
+            size = self.jobs if self._runner_kind() == "pytest" else 1
+            members = pool.start(size, detach=False)
+            if not members:
+                self.err(f"❌ Failed to start a mongod pool for {repo_name}.")
+                return
+            self.pool_uris = [member["uri"] for member in members]
+        elif self.jobs > 1:
+            self.pool_uris = MongoPool(self.pyproject_file).uris()
+        if self.pool_uris:
+            env["MONGODB_URI"] = self.pool_uris[0]
+            self.info(f"Using a pool of {len(self.pool_uris)} mongod processes")
+            if len(self.pool_uris) < self.jobs and self._runner_kind() == "pytest":
+                self.warn(
+                    f"The pool has fewer servers than --jobs {self.jobs}; "
+                    "some workers share one."
+                )
+        try:
+            if self.watch:
+                self._watch(repo_name, test_command, test_dirs, cwd, env)
+            else:
+                self._run_selected(repo_name, test_command, test_dirs, cwd, env)
+        finally:
+            if members:
+                pool.stop_members(members)
+                self.pool_uris = []
+
+    def _run_selected(
+        self,
+        repo_name: str,
+        test_command: list,
+        test_dirs: list,
+        cwd: str,
+        env: dict,
+        labels: list | None = None,
+    ) -> None:
+        """
+        Select the test labels to run (impact selection, last failures, shard,
+        result cache) unless ``labels`` are given, run them and record what
+        the run produced.
+        """
+        heads = None
+        if labels is not None:
+            self.info(f"Running {len(labels)} test labels of {repo_name}")
+        elif self.affected:
+            labels = self._affected_labels(repo_name, cwd)
+            if labels is None:
+                heads = self._start_impact_map(repo_name, test_command)
+            elif not labels:
+                self.ok(f"✅ No tests of {repo_name} are affected by the changes.")
+                return
+            else:
+                self.info(f"Running {len(labels)} affected test labels of {repo_name}")
+        elif self.last_failed:
+            labels = [label for label, _ in self._failed_labels(repo_name, cwd)]
+            if not labels:
+                self.ok(f"✅ No recorded failures of {repo_name}.")
+                return
+            self.info(f"Running {len(labels)} tests of {repo_name} that failed last")
+        elif self.shard:
+            labels = self._shard_labels(repo_name, cwd)
+            if not labels:
+                self.warn(
+                    f"Shard {self.shard[0]}/{self.shard[1]} is empty for {repo_name}."
+                )
+                return
+        if self.coverage and not self.coverage_dir:
+            full = labels is None and not (self.modules or self.keyword)
+            heads = self._start_coverage(repo_name, test_command, full)
+
+        cache_keys = {}
+        split_dirs = False
+        if self._use_result_cache(test_command):
+            cache_keys = self._result_cache_keys(repo_name, test_command, cwd, env)
+            selected = labels if labels is not None else sorted(cache_keys)
+            passed = self.load_state("test-cache.json").get(repo_name, {})
+            cached = [
+                label for label in selected if passed.get(label) == cache_keys[label]
+            ]
+            if cached:
+                self.title(
+                    f"{len(cached)} of {len(selected)} test labels passed before "
+                    "with the same inputs:"
+                )
+                for label in cached:
+                    self._msg(f"  {'cached':<10}  {label}", typer.colors.CYAN)
+                # What's left of a full run keeps its per-directory processes
+                split_dirs = labels is None
+                labels = [label for label in selected if label not in cached]
+                if not labels:
+                    self.ok(f"✅ All selected tests of {repo_name} are cached passes.")
+                    return
+
+        run_labels = labels
+        if self.failed_first:
+            run_labels = self._failed_first_labels(repo_name, cwd, labels)
+
+        self.junit_dir = Path(tempfile.mkdtemp(prefix="junit-", dir=self.cache_dir))
+        self.junit_reports = {}
+        self.rerun_reports = {}
+        self._prepare_transactions(repo_name)
+        # Quarantined tests and reruns must not inherit the deselection
+        base_command, base_env = list(test_command), dict(env)
+        flaky = self._flaky_labels(repo_name, cwd, labels) if self.quarantine else []
+        if flaky:
+            test_command, env = self._deselect(test_command, env, flaky)
+        start = time.monotonic()
+        try:
+            self._run_test_command(
+                repo_name, test_command, test_dirs, cwd, env, run_labels, split_dirs
+            )
+            if flaky:
+                self._run_quarantined(repo_name, base_command, cwd, base_env, flaky)
+            if self.rerun_failures:
+                self._rerun_failed(repo_name, base_command, cwd, base_env)
+        finally:
+            self._record_timings(repo_name, cwd, env, time.monotonic() - start)
+            if cache_keys:
+                ran = labels if labels is not None else sorted(cache_keys)
+                self._update_result_cache(repo_name, cache_keys, ran)
+            if self.mongo_stats:
+                self._report_mongo_stats(repo_name)
+            self._report_transactions(repo_name)
+            shutil.rmtree(self.junit_dir, ignore_errors=True)
+            if self.coverage_dir:
+                if heads:
+                    self._save_impact_map(repo_name, heads, keep=self.coverage)
+                shared = os.environ.get("DM_COVERAGE_DIR")
+                if self.coverage and not shared:
+                    self._report_coverage(
+                        [self.coverage_dir],
+                        self.cache_dir / "coverage" / repo_name,
+                        repo_name,
+                    )
+                if not shared:
+                    shutil.rmtree(self.coverage_dir, ignore_errors=True)
+                self.coverage_dir = None
+
+    def _watch_roots(self, cwd: str) -> list:
+        """
+        Return the directories to watch: those of the packages installed in
+        editable mode from the workspace and the test directories, or cwd
+        when there are neither.
+        """
+        roots = {
+            path.parent if path.is_file() else path for path in self._editable_sources()
+        }
+        for test_dir in self.test_settings.get("test_dirs", []):
+            path = self._resolve_test_dir(test_dir, cwd)
+            if path:
+                roots.add(path)
+        if not roots:
+            roots = {Path(cwd).resolve()}
+        return sorted(
+            root
+            for root in roots
+            if not any(root != other and root.is_relative_to(other) for other in roots)
+        )
+
+    def _watched_labels(self, repo_name: str, cwd: str, changed: set) -> list:
+        """
+        Return the test labels to rerun for changed files: the labels of
+        changed test files, the tests the impact map recorded running changed
+        source files, and for any other file the test modules named after it
+        plus the recorded failures.
+        """
+        labels = self._test_labels(cwd)
+        match = self._label_matcher(labels)
+        test_dirs = [
+            d
+            for d in (
+                self._resolve_test_dir(t, cwd)
+                for t in self.test_settings.get("test_dirs", [])
+            )
+            if d
+        ]
+        data = None
+        measured = set()
+        if self.impact_map.heads(repo_name):
+            from coverage import CoverageData
+
+            data = CoverageData(basename=str(self.impact_map.coverage_file(repo_name)))
+            data.read()
+            measured = set(data.measured_files())
+
+        selected = set()
+        tests = set()
+        unmapped = []
+        for path in sorted(path.resolve() for path in changed):
+            if any(path.is_relative_to(d) for d in test_dirs):
+                label = match("", os.path.relpath(path, cwd))
+                if label:
+                    selected.add(label)
+                else:
+                    unmapped.append(path)
+            elif str(path) in measured:
+                contexts = data.contexts_by_lineno(str(path))
+                file_tests = set().union(*contexts.values()) - {""}
+                if file_tests:
+                    tests |= file_tests
+                else:
+                    # Only runs at import or setup time
+                    unmapped.append(path)
+            else:
+                unmapped.append(path)
+
+        if unmapped:
+            names = set()
+            for path in unmapped:
+                name = path.parent.name if path.stem == "__init__" else path.stem
+                names |= {
+                    name,
+                    f"test_{name}",
+                    f"tests_{name}",
+                    f"{name}_test",
+                    f"{name}_tests",
+                }
+            for label, files in labels.items():
+                last = re.split(r"[./]", label.removesuffix(".py"))[-1]
+                if last in names or any(f.stem in names for f in files):
+                    selected.add(label)
+            selected |= {label for label, _ in self._failed_labels(repo_name, cwd)}
+        return sorted(selected | set(self._impact_labels(tests, cwd)))
+
+    def _watch(
+        self, repo_name: str, test_command: list, test_dirs: list, cwd: str, env: dict
+    ) -> None:
+        """
+        Rerun the tests mapped to the files that change in the watched
+        directories, then summarize the run, until interrupted. On a
+        terminal each run replaces the previous one on screen.
+        """
+        roots = self._watch_roots(cwd)
+        watcher = FileWatcher(roots)
+        live = sys.stdout.isatty()
+        store = self.timing_store
+        try:
+            while True:
+                self.info(
+                    f"Watching {len(roots)} directories for changes ({watcher.mode}); "
+                    "press Ctrl+C to stop."
+                )
+                changed = watcher.wait()
+                if live:
+                    typer.echo("\x1b[2J\x1b[H", nl=False)
+                names = sorted(os.path.relpath(path, self.path) for path in changed)
+                more = f" and {len(names) - 5} more" if len(names) > 5 else ""
+                self.title(
+                    f"{time.strftime('%H:%M:%S')}  Changed {', '.join(names[:5])}{more}"
+                )
+                labels = self._watched_labels(repo_name, cwd, changed)
+                if not labels:
+                    self.warn(f"No tests of {repo_name} map to the changed files.")
+                    continue
+                last_run = store.last_run_id(repo_name)
+                start = time.monotonic()
+                self._run_selected(
+                    repo_name, list(test_command), test_dirs, cwd, env, labels
+                )
+                self._print_watch_result(
+                    store.results_since(repo_name, last_run), time.monotonic() - start
+                )
+        except KeyboardInterrupt:
+            self.info("\nStopped watching.")
+        finally:
+            watcher.close()
+
+    def _print_watch_result(self, results: list, elapsed: float) -> None:
+        """Print the failures and outcome counts of a watched run."""
+        counts = dict.fromkeys(("passed", "failed", "error", "skipped"), 0)
+        for result in results:
+            counts[result["outcome"]] = counts.get(result["outcome"], 0) + 1
+        failures = [r["test"] for r in results if r["outcome"] in ("failed", "error")]
+        if failures:
+            self.title("\nFailures:")
+            for test in failures[:10]:
+                self._msg(f"  {test}", typer.colors.RED)
+            if len(failures) > 10:
+                self._msg(f"  ... and {len(failures) - 10} more", typer.colors.RED)
+        summary = ", ".join(f"{n} {outcome}" for outcome, n in counts.items() if n)
+        self._msg(
+            f"\n{time.strftime('%H:%M:%S')}  {summary or 'no test results'} "
+            f"in {elapsed:.1f}s",
+            typer.colors.RED if failures else typer.colors.GREEN,
+        )
+
+    def _run_test_command(
+        self,
+        repo_name: str,
+        test_command: list,
+        test_dirs: list,
+        cwd: str,
+        env: dict,
+        labels: list | None = None,
+        split_dirs: bool = False,
+    ) -> None:
+        """
+        Run the tests: explicit modules or ``labels`` in one process, or each
+        test directory of a pytest suite in its own process. With
+        ``split_dirs``, pytest ``labels`` are also run per test directory.
+        """
+        pytest_dirs = test_command and test_command[0] == "pytest" and test_dirs
+        if self.modules:
+            test_command.extend(self.modules)
+        elif labels and split_dirs and pytest_dirs and not self.single_session:
+            dir_labels = self._labels_by_dir(labels, test_dirs, cwd)
+            if dir_labels is not None:
+                self._run_test_dirs(
+                    repo_name, test_command, list(dir_labels), cwd, env, dir_labels
+                )
+                return
+            test_command[1:1] = labels
+        elif labels:
+            # Labels go first: wrapper scripts such as DRF's runtests.py only
+            # treat a leading argument as a test path.
+            test_command[1:1] = labels
+        elif pytest_dirs:
+            # When no specific modules are provided, run pytest separately for each test_dir
+            # This avoids import errors when one test directory has problematic imports
+            # but allows all tests to run
+            if self.single_session:
+                self._run_single_session(repo_name, test_command, test_dirs, cwd, env)
+            else:
+                self._run_test_dirs(repo_name, test_command, test_dirs, cwd, env)
+            return  # Early return since we already ran the tests
+
+        self.info(f"Running tests in {cwd} with command: {' '.join(test_command)}")
+        test_command, env = self._instrument(test_command, env, repo_name)
+        self._run_test_process(repo_name, test_command, cwd, env)
+
+    def _labels_by_dir(self, labels: list, test_dirs: list, cwd: str) -> dict | None:
+        """
+        Group path labels by the configured test directory that contains
+        them, in ``test_dirs`` order, or return None if one is in none.
+        """
+        resolved = [(d, self._resolve_test_dir(d, cwd)) for d in test_dirs]
+        dir_labels = {}
+        for label in labels:
+            path = (Path(cwd) / label.partition("::")[0]).resolve()
+            test_dir = next(
+                (d for d, r in resolved if r is not None and path.is_relative_to(r)),
+                None,
+            )
+            if test_dir is None:
+                return None
+            dir_labels.setdefault(test_dir, []).append(label)
+        return {d: dir_labels[d] for d in test_dirs if d in dir_labels}
+
+    def _run_test_process(
+        self, repo_name: str, test_command: list, cwd: str, env: dict, nice=False
+    ) -> int:
+        """
+        Run a test command and return its exit status. With ``--warm``,
+        Python test commands are forked from the repository's warm server.
+        """
+        socket_path = None
+        if self.warm and not self.coverage_dir:
+            socket_path = self._warm_server(repo_name, test_command, cwd, env)
+        if socket_path is not None:
+            from .testing import warm
+
+            try:
+                return warm.run(socket_path, test_command, cwd, env, nice)
+            except OSError as e:
+                self.warn(f"The warm server failed ({e}); starting a new process.")
+        return subprocess.run(
+            test_command,
+            cwd=cwd,
+            env=env,
+            preexec_fn=(lambda: os.nice(10)) if nice else None,
+        ).returncode
+
+    def _warm_fingerprint(self, cwd: str, env: dict, preload: list) -> str:
+        """
+        Hash what a warm server preloaded: the sources of the packages
+        installed in editable mode from the workspace, the settings module,
+        the test settings, apps and migrations overlaid on the clone, the
+        test directories when the server populates the apps, the testing
+        helpers, the environment and the preload arguments. Symlinked
+        directories aren't followed; overlays are hashed at their source.
+        """
+        digest = hashlib.sha256()
+        digest.update(json.dumps([sys.executable, cwd, preload]).encode())
+        digest.update(
+            json.dumps(
+                sorted((k, v) for k, v in env.items() if k not in WARM_RUN_VARS)
+            ).encode()
+        )
+        settings_module, setup = preload
+        sources = [*self._editable_sources(), Path(__file__).parent / "testing"]
+        overlays = [
+            (self.test_settings.get("settings") or {}).get("test"),
+            self.test_settings.get("apps_file"),
+            self.test_settings.get("migrations_dir"),
+        ]
+        sources += [
+            Path(o["source"]).resolve() for o in overlays if o and "source" in o
+        ]
+        if settings_module:
+            module = Path(cwd, *settings_module.split("."))
+            sources += [module.with_suffix(".py"), module / "__init__.py"]
+        if setup == "1":
+            for test_dir in self.test_settings.get("test_dirs", []):
+                path = self._resolve_test_dir(test_dir, cwd)
+                if path:
+                    sources.append(path)
+
+        for source in sorted(set(sources)):
+            if source.is_file():
+                files = [str(source)]
+            else:
+                files = []
+                for dirpath, dirnames, filenames in os.walk(source):
+                    dirnames[:] = sorted(
+                        d
+                        for d in dirnames
+                        if d not in SKIPPED_SOURCE_DIRS and not d.startswith(".")
+                    )
+                    files += [
+                        os.path.join(dirpath, f)
+                        for f in sorted(filenames)
+                        if f.endswith(".py")
+                    ]
+            for path in files:
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                digest.update(f"{path}\0{stat.st_mtime_ns}\0{stat.st_size}\0".encode())
+        return digest.hexdigest()
+
+    def _warm_server(
+        self, repo_name: str, test_command: list, cwd: str, env: dict
+    ) -> Path | None:
+        """
+        Return the socket of the warm server of ``repo_name``, (re)starting
+        it when there is none or when what it preloaded changed since, or
+        None when the test command can't be forked from one.
+        """
+        from .testing import warm
+
+        if test_command[0] != "pytest" and not test_command[0].endswith(".py"):
+            return None
+        settings_module = env.get("DJANGO_SETTINGS_MODULE", "")
+        for i, arg in enumerate(test_command):
+            if arg in ("--settings", "--ds") and i + 1 < len(test_command):
+                settings_module = test_command[i + 1]
+            elif arg.startswith(("--settings=", "--ds=")):
+                settings_module = arg.partition("=")[2]
+        setup = bool(self.test_settings.get("warm_setup", True))
+        preload = [settings_module, "1" if setup else "0"]
+        cwd = os.path.abspath(cwd)
+        fingerprint = self._warm_fingerprint(cwd, env, preload)
+
+        state_path = self.cache_dir / "warm" / f"{repo_name}.json"
+        socket_path = self._warm_socket(state_path)
+        if socket_path is None:
+            return None
+        state = json.loads(state_path.read_text()) if state_path.exists() else {}
+        if state.get("fingerprint") == fingerprint and socket_path.exists():
+            return socket_path
+        if socket_path.exists():
+            self.info(f"Sources changed; restarting the warm server of {repo_name}.")
+            warm.stop(socket_path)
+        else:
+            self.info(f"Starting a warm server for {repo_name}.")
+
+        log_path = state_path.with_suffix(".log")
+        start = time.monotonic()
+        with log_path.open("w") as log:
+            proc = subprocess.Popen(
+                [
+                    sys.executable,
+                    "-m",
+                    "django_mongodb_cli.testing.warm",
+                    str(socket_path),
+                    *preload,
+                ],
+                cwd=cwd,
+                env={k: v for k, v in env.items() if k not in WARM_RUN_VARS},
+                stdin=subprocess.DEVNULL,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                start_new_session=True,
+            )
+        # The server listens once it has preloaded everything
+        while not socket_path.exists():
+            if proc.poll() is not None:
+                self.warn(f"The warm server exited; see {log_path}.")
+                return None
+            time.sleep(0.05)
+        state_path.write_text(
+            json.dumps({"pid": proc.pid, "fingerprint": fingerprint}, indent=2)
+        )
+        self.info(
+            f"Warm server {proc.pid} ready in {time.monotonic() - start:.1f}s"
+            + (f", with {settings_module} preloaded." if settings_module else ".")
+        )
+        return socket_path
+
+    def _warm_socket(self, state_path: Path) -> Path | None:
+        """
+        Return the socket path of a warm server, in a directory only the user
+        can access: ``$XDG_RUNTIME_DIR/dm-warm`` or the directory of its
+        state. Any client that can connect runs code as the user, and sends
+        its environment, credentials included.
+        """
+        runtime = os.environ.get("XDG_RUNTIME_DIR")
+        directory = Path(runtime) / "dm-warm" if runtime else state_path.parent
+        for path in {directory, state_path.parent}:
+            path.mkdir(mode=0o700, parents=True, exist_ok=True)
+            path.chmod(0o700)
+        key = hashlib.sha256(str(state_path.resolve()).encode()).hexdigest()[:12]
+        socket_path = directory.resolve() / f"{key}.sock"
+        # Unix socket paths are limited to about 100 characters
+        if len(os.fsencode(socket_path)) > 100:
+            self.warn(
+                f"{socket_path} is too long for a Unix socket; set XDG_RUNTIME_DIR "
+                "to run warm."
+            )
+            return None
+        return socket_path
+
+    def _run_labels(
+        self,
+        repo_name: str,
+        test_command: list,
+        cwd: str,
+        env: dict,
+        labels: list,
+        nice: bool = False,
+    ) -> Path:
+        """
+        Run ``labels`` in a new test process and return the path of its JUnit
+        XML report. With ``nice``, the process runs at a lower CPU priority.
+        """
+        test_command = list(test_command)
+        test_command[1:1] = labels
+        test_command, env = self._instrument(test_command, env, repo_name)
+        self._run_test_process(repo_name, test_command, cwd, env, nice)
+        return next(reversed(self.junit_reports))
+
+    def _rerun_failed(
+        self, repo_name: str, test_command: list, cwd: str, env: dict
+    ) -> None:
+        """
+        Run the tests that failed again in a fresh process, up to
+        ``rerun_failures`` times, each time only those that failed in the
+        previous attempt, and report the ones that passed on a rerun.
+        """
+        reports = list(self.junit_reports)
+        failed_before = set()
+        flaky = {}
+        for attempt in range(1, self.rerun_failures + 1):
+            failed = {}
+            for path in reports:
+                for case in TimingStore.parse_junit(path):
+                    if case["outcome"] in ("failed", "error"):
+                        label = self._failure_label(case["test"], case["file"])
+                        if label is not None:
+                            failed[case["test"]] = label
+            if not failed:
+                break
+            failed_before |= failed.keys()
+            labels = sorted(set(failed.values()))
+            self.info(
+                f"Rerunning {len(failed)} failed tests of {repo_name} "
+                f"(attempt {attempt} of {self.rerun_failures})"
+            )
+            path = self._run_labels(repo_name, test_command, cwd, env, labels)
+            self.rerun_reports[path] = attempt
+            reports = [path]
+            for case in TimingStore.parse_junit(path):
+                if case["test"] in failed_before and case["outcome"] == "passed":
+                    flaky.setdefault(failed.get(case["test"], case["test"]), attempt)
+        for test, attempt in sorted(flaky.items()):
+            self.warn(f"Flaky: {test} passed on rerun {attempt}")
+        if flaky:
+            self.info(
+                f"Recorded {len(flaky)} flaky tests; see them with "
+                f"`dm repo test {repo_name} --flaky`."
+            )
+
+    def _flaky_labels(self, repo_name: str, cwd: str, labels: list | None) -> list:
+        """
+        Return labels for the tests recently recorded as flaky among
+        ``labels`` (all test labels when None) whose files still exist.
+        """
+        match = self._label_matcher(self._test_labels(cwd))
+        flaky = []
+        for test, stats in self.timing_store.flaky_tests(repo_name).items():
+            label = self._failure_label(test, stats["file"])
+            unit = match(label or test, stats["file"])
+            if (
+                stats["recent"]
+                and label is not None
+                and unit
+                and (labels is None or unit in labels)
+            ):
+                flaky.append(label)
+        return sorted(flaky)
+
+    def _deselect(self, test_command: list, env: dict, labels: list) -> tuple:
+        """
+        Return the test command and environment that leave ``labels`` out of
+        a run. The pytest plugin and the timing runner read them from the
+        file in ``DM_DESELECT``.
+        """
+        path = self.junit_dir / "deselect.txt"
+        path.write_text("\n".join(labels) + "\n")
+        if self._runner_kind() == "pytest":
+            test_command = test_command + [
+                "-p",
+                "django_mongodb_cli.testing.pytest_plugin",
+            ]
+        return test_command, {**env, "DM_DESELECT": str(path)}
+
+    def _run_quarantined(
+        self, repo_name: str, test_command: list, cwd: str, env: dict, labels: list
+    ) -> None:
+        """Run the quarantined flaky tests last, at a lower CPU priority."""
+        self.title(f"\nRunning {len(labels)} quarantined flaky tests of {repo_name}:")
+        path = self._run_labels(repo_name, test_command, cwd, env, labels, nice=True)
+        cases = TimingStore.parse_junit(path)
+        failed = [case for case in cases if case["outcome"] in ("failed", "error")]
+        if failed:
+            self.warn(f"{len(failed)} of {len(cases)} quarantined tests failed.")
+        else:
+            self.ok(f"✅ All {len(cases)} quarantined tests passed.")
+
+    def _report_mongo_stats(self, repo_name: str, top: int = 20) -> None:
+        """
+        Rank the tests of a run by the MongoDB commands they sent, print the
+        top ones and write the counts of every test to
+        ``.dm/mongo-stats/<repo>.json``.
+        """
+        # Each test process wrote one JSON line of counts per test
+        stats = {}
+        for path in sorted((self.junit_dir / "mongo-stats").glob("*.jsonl")):
+            for line in path.read_text().splitlines():
+                record = json.loads(line)
+                total = stats.setdefault(
+                    record.pop("test"), {"by_command": {}, "commands": 0}
+                )
+                for name, count in record.pop("by_command").items():
+                    total["by_command"][name] = total["by_command"].get(name, 0) + count
+                for key, value in record.items():
+                    total[key] = total.get(key, 0) + value
+        if not stats:
+            self.warn(
+                f"No MongoDB commands were counted for {repo_name}; "
+                "was the test process using pymongo?"
+            )
+            return
+        ranked = sorted(stats.items(), key=lambda item: (-item[1]["commands"], item[0]))
+        path = self.cache_dir / "mongo-stats" / f"{repo_name}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        totals = {
+            key: sum(counts[key] for counts in stats.values())
+            for key in ("commands", "duration", "sent", "received")
+        }
+        path.write_text(
+            json.dumps(
+                {
+                    "repo": repo_name,
+                    "started": time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "total": totals,
+                    "tests": [{"test": test, **counts} for test, counts in ranked],
+                },
+                indent=2,
+            )
+        )
+
+        self.title(
+            f"\n{'Commands':>8}  {'MongoDB':>9}  {'Sent':>9}  {'Received':>9}  "
+            f"Test (top {min(top, len(ranked))} of {len(ranked)})"
+        )
+        for test, counts in ranked[:top]:
+            commands = ", ".join(
+                f"{name} {count}"
+                for name, count in sorted(
+                    counts["by_command"].items(), key=lambda item: -item[1]
+                )[:3]
+            )
+            typer.echo(
+                f"{counts['commands']:>8}  {counts['duration'] * 1000:>7.0f}ms  "
+                f"{counts['sent'] / 1024:>7.0f}KB  {counts['received'] / 1024:>7.0f}KB  "
+                f"{test}  ({commands})"
+            )
+        self.info(
+            f"\n{totals['commands']} commands, {totals['duration']:.1f}s waiting "
+            f"on MongoDB, {(totals['sent'] + totals['received']) / 1024**2:.1f} MB "
+            f"transferred. Full report: {path}"
+        )
+
+    def _prepare_transactions(self, repo_name: str) -> None:
+        """
+        Give the test processes of a run the test classes of ``repo_name``
+        that can't be rolled back, found by earlier runs.
+        """
+        directory = self.junit_dir / "transactions"
+        directory.mkdir()
+        fallbacks = self.cache_dir / "transactions" / f"{repo_name}.txt"
+        if fallbacks.exists():
+            shutil.copyfile(fallbacks, directory / "fallback.txt")
+
+    def _report_transactions(self, repo_name: str) -> None:
+        """
+        Report how much faster rolling back TestCase tests was than flushing
+        would have been, and keep the test classes that fell back to flushing
+        in ``.dm/transactions/<repo>.txt``.
+        """
+        directory = self.junit_dir / "transactions"
+        records = [
+            json.loads(line)
+            for path in sorted(directory.glob("*.jsonl"))
+            for line in path.read_text().splitlines()
+        ]
+        if not records:
+            return
+        fallback = directory / "fallback.txt"
+        fell_back = {}
+        if fallback.exists():
+            for line in fallback.read_text().splitlines():
+                name, _, reason = line.partition("\t")
+                fell_back.setdefault(name, reason)
+            path = self.cache_dir / "transactions" / f"{repo_name}.txt"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(
+                "".join(
+                    f"{name}\t{reason}\n" for name, reason in sorted(fell_back.items())
+                )
+            )
+
+        rolled_back = [r for r in records if r["rollback"] is not None]
+        flushed = [r for r in records if r["rollback"] is None or r["reason"]]
+        if not rolled_back:
+            reasons = sorted({r["reason"] for r in records if r["reason"]})
+            self.warn(
+                f"No {repo_name} tests were rolled back ({'; '.join(reasons)}). "
+                "Transactions need a replica set, e.g. `dm mongo pool up --replica-set`."
+            )
+            return
+        # Every flush measured, including those of rolled back tests sampled
+        # to know what flushing costs
+        flushes = [r["flush"] for r in records if r["flush"] is not None]
+        took = sum(r["rollback"] or 0 for r in records) + sum(
+            r["flush"] for r in flushed
+        )
+        new = [
+            name
+            for name in fell_back
+            if any(
+                r["test"].startswith(f"{name}.") and r["rollback"] is not None
+                for r in flushed
+            )
+        ]
+        self.info(
+            f"\nTransactions: {len(rolled_back)} {repo_name} tests rolled back, "
+            f"{len(flushed)} flushed ({len(fell_back)} test classes fall back to "
+            "flushing)."
+        )
+        if flushes:
+            estimate = len(records) * sum(flushes) / len(flushes)
+            self.ok(
+                f"Test isolation took {took:.1f}s instead of ~{estimate:.1f}s "
+                f"flushing ({estimate / max(took, 1e-6):.1f}x faster, "
+                f"{estimate - took:.1f}s saved)."
+            )
+        for name in new:
+            self.warn(f"  {name} falls back to flushing: {fell_back[name]}")
+
+    def _print_flaky(self, repo_name: str) -> None:
+        """Print the tests of a repository that passed on a rerun after failing."""
+        flaky = self.timing_store.flaky_tests(repo_name)
+        if not flaky:
+            self.ok(f"✅ No flaky tests recorded for {repo_name}.")
+            return
+        self.title(
+            f"{'Flaky':>7}  {'Rate':>6}  {'Last seen':<19}  Test ({len(flaky)} flaky tests)"
+        )
+        for test, stats in sorted(
+            flaky.items(), key=lambda item: (-item[1]["flaky"], item[0])
+        ):
+            rate = stats["flaky"] / stats["runs"] if stats["runs"] else 0
+            self._msg(
+                f"{stats['flaky']:>3}/{stats['runs']:<3}  {rate:>6.0%}  "
+                f"{stats['last']:<19}  {test}",
+                typer.colors.YELLOW if stats["recent"] else None,
+            )
+
+    def run_tests(self, repo_name: str) -> None:
+        """
+        Run tests for the specified repository.
+        """
+        if self.list_tests:
+            self._list_tests(repo_name)
+            return
+        if self.dry_run:
+            self._dry_run(repo_name)
+            return
+        if self.slowest:
+            self._print_slowest(repo_name)
+            return
+        if self.trend:
+            self._print_trend(repo_name)
+            return
+        if self.flaky:
+            self._print_flaky(repo_name)
+            return
+
+        path, _ = self.ensure_repo(repo_name)
+        if not path:
+            self.err(f"❌ Failed to run tests for {repo_name}: path not found.")
+            return
+
+        self._run_tests(repo_name)
+
+    def run_test_group(self, repo_names: list, options: list) -> bool:
+        """
+        Run the test suites of several repositories concurrently, each in its
+        own ``dm repo test`` process and database, ``self.jobs`` at a time
+        (all at once by default). Show their progress live, then write a
+        compatibility report and return whether every suite passed.
+        """
+        configured = [name for name in repo_names if self.test_cfg(name)]
+        for name in repo_names:
+            if name not in configured:
+                self.warn(f"Skipping {name}: no test settings.")
+        if not configured:
+            self.err("❌ None of the repositories has test settings.")
+            return False
+        configured = [name for name in configured if self.ensure_repo(name)[0]]
+
+        run_dir = self.cache_dir / "group-runs" / time.strftime("%Y%m%d-%H%M%S")
+        run_dir.mkdir(parents=True, exist_ok=True)
+        workers = self.jobs if self.jobs > 1 else len(configured)
+
+        pool = members = None
+        if self.mongo_pool:
+            pool = MongoPool(self.pyproject_file)
+            pool.ctx = self.ctx
+            members = pool.start(min(workers, len(configured)), detach=False)
+            if not members:
+                self.err("❌ Failed to start a mongod pool for the test group.")
+                return False
+            uris = [member["uri"] for member in members]
+        else:
+            uris = MongoPool(self.pyproject_file).uris()
+
+        store = self.timing_store
+        status = {
+            name: {
+                "state": "queued",
+                "start": None,
+                "end": None,
+                "counts": dict.fromkeys(("passed", "failed", "skipped"), 0),
+                "cached": 0,
+                "last_run": store.last_run_id(name),
+                "log": run_dir / f"{name}.log",
+            }
+            for name in configured
+        }
+        slots = queue.Queue()
+        for slot in range(workers):
+            slots.put(slot)
+
+        def run_repo(name):
+            slot = slots.get()
+            entry = status[name]
+            try:
+                env = os.environ.copy()
+                env["DM_TEST_DB_SUFFIX"] = re.sub(r"\W", "_", name)
+                # Stream test output as it happens for the live counts
+                env["PYTHONUNBUFFERED"] = "1"
+                if uris:
+                    env["MONGODB_URI"] = uris[slot % len(uris)]
+                if self.coverage:
+                    # Combined below into one report for the whole group
+                    env["DM_COVERAGE_DIR"] = str(run_dir / "coverage")
+                command = [sys.executable, "-m", "django_mongodb_cli"]
+                command += ["repo", "test", name, *options]
+                entry["state"], entry["start"] = "running", time.monotonic()
+                with open(entry["log"], "w") as log:
+                    proc = subprocess.Popen(
+                        command,
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.STDOUT,
+                        text=True,
+                        env=env,
+                    )
+                    for line in proc.stdout:
+                        log.write(line)
+                        if CACHED_LABEL_RE.match(line):
+                            entry["cached"] += 1
+                        for match in PROGRESS_RE.finditer(line):
+                            outcome = match.group("pytest") or match.group("django")
+                            entry["counts"][PROGRESS_OUTCOMES[outcome]] += 1
+                    entry["returncode"] = proc.wait()
+            except OSError as e:
+                entry["returncode"] = None
+                entry["error"] = str(e)
+            finally:
+                entry["state"], entry["end"] = "done", time.monotonic()
+                slots.put(slot)
+
+        self.info(
+            f"Running the tests of {len(configured)} repositories with {workers} "
+            f"workers; logs in {run_dir}"
+        )
+        start = time.monotonic()
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(run_repo, name) for name in configured]
+                self._show_group_progress(status, futures)
+        finally:
+            if members:
+                pool.stop_members(members)
+        report = self._group_report(status, options, time.monotonic() - start)
+        self._write_group_report(report, run_dir)
+        if self.coverage:
+            coverage_dir = run_dir / "coverage"
+            self._report_coverage(
+                sorted(p for p in coverage_dir.glob("*") if p.is_dir()),
+                coverage_dir,
+                "the group run",
+            )
+        return all(
+            library["status"] in PASSING_STATUSES
+            for library in report["libraries"].values()
+        )
+
+    def _show_group_progress(self, status: dict, futures: list) -> None:
+        """
+        Show one line per repository until every future is done, redrawn in
+        place on a terminal and printed as repositories finish otherwise.
+        """
+        width = max(len(name) for name in status)
+        live = sys.stdout.isatty()
+        # Longer lines would wrap and break redrawing in place
+        columns = shutil.get_terminal_size().columns - 1
+        shown = set()
+        drawn = 0
+
+        def line(name):
+            entry = status[name]
+            counts = entry["counts"]
+            elapsed = (entry["end"] or time.monotonic()) - (entry["start"] or 0)
+            elapsed = f"{elapsed:.0f}s" if entry["start"] else ""
+            return (
+                f"{name:<{width}}  {entry['state']:<8}  {elapsed:>6}  "
+                f"{counts['passed']:>6} passed  {counts['failed']:>5} failed  "
+                f"{counts['skipped']:>5} skipped"
+            )
+
+        while True:
+            finished = all(future.done() for future in futures)
+            if live:
+                if drawn:
+                    typer.echo(f"\x1b[{drawn}F", nl=False)
+                for name in status:
+                    typer.echo(f"\x1b[2K{line(name)[:columns]}")
+                drawn = len(status)
+            else:
+                for name, entry in status.items():
+                    if entry["state"] == "done" and name not in shown:
+                        shown.add(name)
+                        typer.echo(line(name))
+            if finished:
+                break
+            time.sleep(0.5)
+        for future in futures:
+            future.result()
+
+    def _group_report(self, status: dict, options: list, elapsed: float) -> dict:
+        """
+        Collect the outcome of each repository of a group run from the results
+        its run recorded in the timing database.
+        """
+        store = self.timing_store
+        heads = self._workspace_heads()
+        report = {
+            "started": time.strftime(
+                "%Y-%m-%d %H:%M:%S", time.localtime(time.time() - elapsed)
+            ),
+            "elapsed": round(elapsed, 1),
+            "options": options,
+            "workspace": {
+                name: heads[name]
+                for name in ("django", "django-mongodb-backend", "mongo-python-driver")
+                if name in heads
+            },
+            "libraries": {},
+        }
+        for name, entry in status.items():
+            results = store.results_since(name, entry["last_run"])
+            counts = dict.fromkeys(("passed", "failed", "error", "skipped"), 0)
+            for result in results:
+                counts[result["outcome"]] = counts.get(result["outcome"], 0) + 1
+            returncode = entry.get("returncode")
+            if counts["failed"] or counts["error"]:
+                library_status = "failed"
+            elif returncode != 0:
+                # Crashed, killed or failed outside the tests it recorded;
+                # None when the suite couldn't be started at all
+                library_status = "crashed"
+            elif not results:
+                library_status = "cached" if entry["cached"] else "no results"
+            else:
+                library_status = "passed"
+            report["libraries"][name] = {
+                "status": library_status,
+                "returncode": returncode,
+                "start_error": entry.get("error"),
+                **counts,
+                "cached_labels": entry["cached"],
+                "duration": round((entry["end"] or 0) - (entry["start"] or 0), 1),
+                "log": str(entry["log"]),
+                "failures": [
+                    {k: result[k] for k in ("test", "outcome", "message")}
+                    for result in results
+                    if result["outcome"] in ("failed", "error")
+                ],
+            }
+        return report
+
+    def _write_group_report(self, report: dict, run_dir: Path) -> None:
+        """Write a group run report as JSON and Markdown and print a summary."""
+        (run_dir / "report.json").write_text(json.dumps(report, indent=2))
+        lines = [
+            "# Compatibility report",
+            "",
+            f"Run {report['started']} in {report['elapsed']:.0f}s"
+            + (f" with `{' '.join(report['options'])}`" if report["options"] else "")
+            + ".",
+            "",
+        ]
+        for name, sha in report["workspace"].items():
+            lines.append(f"- {name} at `{sha[:12]}`")
+        if report["workspace"]:
+            lines.append("")
+        lines += [
+            "| Library | Status | Passed | Failed | Errors | Skipped | Cached | Time |",
+            "| --- | --- | ---: | ---: | ---: | ---: | ---: | ---: |",
+        ]
+        for name, library in report["libraries"].items():
+            lines.append(
+                f"| {name} | {library['status']} | {library['passed']} "
+                f"| {library['failed']} | {library['error']} | {library['skipped']} "
+                f"| {library['cached_labels']} | {library['duration']:.0f}s |"
+            )
+        for name, library in report["libraries"].items():
+            if library["status"] in PASSING_STATUSES:
+                continue
+            lines += ["", f"## {name}", ""]
+            if library["start_error"]:
+                lines.append(f"`dm repo test` couldn't start: {library['start_error']}")
+            elif library["returncode"]:
+                lines.append(
+                    f"`dm repo test` exited with {library['returncode']}; "
+                    f"see `{library['log']}`."
+                )
+            if not library["failures"] and library["returncode"] == 0:
+                lines.append(f"No test results were recorded; see `{library['log']}`.")
+            for failure in library["failures"][:50]:
+                message = f": {failure['message']}" if failure["message"] else ""
+                lines.append(f"- `{failure['test']}` ({failure['outcome']}){message}")
+            if len(library["failures"]) > 50:
+                lines.append(
+                    f"- ... and {len(library['failures']) - 50} more in report.json"
+                )
+        (run_dir / "report.md").write_text("\n".join(lines) + "\n")
+
+        self.title("")
+        for name, library in report["libraries"].items():
+            passed = library["status"] in PASSING_STATUSES
+            fg = typer.colors.GREEN if passed else typer.colors.RED
+            self._msg(
+                f"{name}: {library['status']} ({library['passed']} passed, "
+                f"{library['failed'] + library['error']} failed, "
+                f"{library['skipped']} skipped)",
+                fg,
+            )
+        self.info(f"Report written to {run_dir / 'report.md'} and report.json")
+
+    def set_modules(self, modules: list) -> None:
+        self.modules = modules
+
+    def set_keep_db(self, keep_db: bool) -> None:
         """Set whether to keep the database after tests."""
         self.keep_db = keep_db
 
@@ -1252,6 +4213,82 @@ class Test(Repo):
         """Set whether to list tests instead of running them."""
         self.list_tests = list_tests
 
+    def set_dry_run(self, dry_run: bool) -> None:
+        """Set whether to report the tests -k matches instead of running them."""
+        self.dry_run = dry_run
+
+    def set_jobs(self, jobs: int) -> None:
+        """Set how many test directories run concurrently."""
+        self.jobs = max(1, jobs)
+
+    def set_single_session(self, single_session: bool) -> None:
+        """Set whether to run all test directories in one pytest session."""
+        self.single_session = single_session
+
+    def set_shard(self, shard: tuple[int, int]) -> None:
+        """Set the (K, N) shard of the test labels to run."""
+        self.shard = shard
+
+    def set_slowest(self, slowest: int) -> None:
+        """Set how many of the slowest recorded tests to report."""
+        self.slowest = slowest
+
+    def set_trend(self, trend: int) -> None:
+        """Set how many recent recorded runs to report."""
+        self.trend = trend
+
+    def set_affected(self, affected: bool) -> None:
+        """Set whether to run only the tests affected by workspace changes."""
+        self.affected = affected
+
+    def set_result_cache(self, result_cache: bool) -> None:
+        """Set whether to skip test labels that passed with the same inputs."""
+        self.result_cache = result_cache
+
+    def set_mongo_pool(self, mongo_pool: bool) -> None:
+        """Set whether to start a private mongod per worker for this run."""
+        self.mongo_pool = mongo_pool
+
+    def set_last_failed(self, last_failed: bool) -> None:
+        """Set whether to run only the tests that failed when last run."""
+        self.last_failed = last_failed
+
+    def set_failed_first(self, failed_first: bool) -> None:
+        """Set whether to run the tests that failed when last run first."""
+        self.failed_first = failed_first
+
+    def set_rerun_failures(self, rerun_failures: int) -> None:
+        """Set how many times to rerun the tests that failed."""
+        self.rerun_failures = rerun_failures
+
+    def set_mongo_stats(self, mongo_stats: bool) -> None:
+        """Set whether to count the MongoDB commands of each test."""
+        self.mongo_stats = mongo_stats
+
+    def set_coverage(self, coverage: bool) -> None:
+        """Set whether to measure coverage and write a combined report."""
+        self.coverage = coverage
+
+    def set_warm(self, warm: bool) -> None:
+        """Set whether to fork test processes from a warm server."""
+        self.warm = warm
+
+    def set_watch(self, watch: bool) -> None:
+        """Set whether to rerun the tests mapped to files as they change."""
+        self.watch = watch
+
+    def set_quarantine(self, quarantine: bool) -> None:
+        """Set whether to run known flaky tests in a separate batch."""
+        self.quarantine = quarantine
+
+    def set_flaky(self, flaky: bool) -> None:
+        """Set whether to report the recorded flaky tests."""
+        self.flaky = flaky
+
+    def set_db_snapshot(self, db_snapshot: bool) -> None:
+        """Set whether to restore migrated test databases from snapshots."""
+        self.db_snapshot = db_snapshot
+
     def set_env(self, setenv: bool) -> None:
         """Set whether to set DJANGO_SETTINGS_MODULE environment variable."""
         self.setenv = setenv
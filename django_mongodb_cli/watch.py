@@ -0,0 +1,183 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from pathlib import Path
+
+# Directories never searched or watched for workspace sources, besides hidden
+# ones such as .git, .venv and .tox
+SKIPPED_SOURCE_DIRS = {"__pycache__", "node_modules"}
+
+# inotify(7) event flags
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+# struct inotify_event, without its name
+INOTIFY_EVENT = struct.Struct("iIII")
+
+# Seconds without further changes before a batch of changes is reported
+WATCH_DEBOUNCE = 0.3
+
+# Seconds between scans when inotify isn't available
+WATCH_POLL_INTERVAL = 1.0
+
+
+class FileWatcher:
+    """
+    Report the files created, saved or removed under some directories,
+    through inotify on Linux, or by comparing modification times every
+    ``WATCH_POLL_INTERVAL`` seconds elsewhere and when inotify runs out of
+    watches. Hidden and editor backup files are ignored.
+    """
+
+    def __init__(self, roots: list):
+        self.roots = roots
+        self.fd = None
+        self.dirs = {}
+        self.mtimes = {}
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            self.add_watch = libc.inotify_add_watch
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd < 0:
+                raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+            self.fd = fd
+            for root in roots:
+                self._watch_tree(root)
+        except (AttributeError, OSError):
+            self._poll_instead()
+
+    @property
+    def mode(self) -> str:
+        return "inotify" if self.fd is not None else "polling"
+
+    @staticmethod
+    def ignored(name: str) -> bool:
+        return (
+            name.startswith(".")
+            or name.endswith(("~", ".pyc", ".swp", ".swx"))
+            # Vim checks that it can write to a directory with this file
+            or name == "4913"
+        )
+
+    def _walk(self, root: Path):
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(
+                d
+                for d in dirnames
+                if d not in SKIPPED_SOURCE_DIRS and not d.startswith(".")
+            )
+            yield Path(dirpath), filenames
+
+    def _watch_tree(self, root: Path) -> None:
+        for directory, _ in self._walk(root):
+            wd = self.add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                # ENOSPC once fs.inotify.max_user_watches is reached
+                raise OSError(ctypes.get_errno(), f"Can't watch {directory}")
+            self.dirs[wd] = directory
+
+    def _poll_instead(self) -> None:
+        self.close()
+        self.mtimes = self._scan()
+
+    def _scan(self) -> dict:
+        mtimes = {}
+        for root in self.roots:
+            for directory, filenames in self._walk(root):
+                for name in filenames:
+                    if self.ignored(name):
+                        continue
+                    path = directory / name
+                    try:
+                        stat = path.stat()
+                    except OSError:
+                        continue
+                    mtimes[path] = (stat.st_mtime_ns, stat.st_size)
+        return mtimes
+
+    def _changes(self, timeout: float | None) -> set:
+        """Return the files changed within ``timeout`` seconds (None: any)."""
+        if self.fd is None:
+            while True:
+                time.sleep(WATCH_POLL_INTERVAL if timeout is None else timeout)
+                mtimes = self._scan()
+                changed = {
+                    path
+                    for path in mtimes.keys() | self.mtimes.keys()
+                    if mtimes.get(path) != self.mtimes.get(path)
+                }
+                self.mtimes = mtimes
+                if changed or timeout is not None:
+                    return changed
+
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        data = b""
+        while True:
+            try:
+                data += os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+        return self._events(data)
+
+    def _events(self, data: bytes) -> set:
+        """
+        Return the files changed by a buffer of inotify events, watching the
+        directories created in the meantime.
+        """
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost; report the roots as changed
+                changed.update(self.roots)
+                continue
+            if mask & IN_IGNORED:
+                self.dirs.pop(wd, None)
+                continue
+            directory = self.dirs.get(wd)
+            if directory is None or not name or self.ignored(name):
+                continue
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    try:
+                        self._watch_tree(directory / name)
+                    except OSError:
+                        self._poll_instead()
+                        changed.add(directory / name)
+                        break
+                continue
+            changed.add(directory / name)
+        return changed
+
+    def wait(self) -> set:
+        """
+        Block until files change and return them once no more changes came
+        for ``WATCH_DEBOUNCE`` seconds, so that a save touching several
+        files is reported as one batch.
+        """
+        changed = self._changes(None)
+        while batch := self._changes(WATCH_DEBOUNCE):
+            changed |= batch
+        return changed
+
+    def close(self) -> None:
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+            self.dirs = {}
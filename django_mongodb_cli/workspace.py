@@ -0,0 +1,83 @@
+import fcntl
+import json
+import os
+from contextlib import contextmanager
+from pathlib import Path
+
+import toml
+import typer
+
+
+class Workspace:
+    """
+    The [tool.django-mongodb-cli] configuration of a pyproject.toml, with the
+    console messages and the JSON state files in its cache directory that
+    every dm command shares.
+    """
+
+    def __init__(self, pyproject_file: Path = Path("pyproject.toml")):
+        self.pyproject_file = pyproject_file
+        self.config = self._load_config()
+        self._tool_cfg = self.config.get("tool", {}).get("django-mongodb-cli", {}) or {}
+
+    def _load_config(self) -> dict:
+        return toml.load(self.pyproject_file)
+
+    def _msg(self, text: str, fg) -> None:
+        typer.echo(typer.style(text, fg=fg))
+
+    def info(self, text: str) -> None:
+        self._msg(text, typer.colors.CYAN)
+
+    def warn(self, text: str) -> None:
+        self._msg(text, typer.colors.YELLOW)
+
+    def ok(self, text: str) -> None:
+        self._msg(text, typer.colors.GREEN)
+
+    def err(self, text: str) -> None:
+        self._msg(text, typer.colors.RED)
+
+    def title(self, text: str) -> None:
+        typer.echo(text)
+
+    @property
+    def tool_cfg(self) -> dict:
+        return self._tool_cfg
+
+    @property
+    def cache_dir(self) -> Path:
+        """Directory for local dm state, ``cache_dir`` in pyproject.toml (default: .dm)."""
+        return Path(self.tool_cfg.get("cache_dir", ".dm")).resolve()
+
+    def load_state(self, name: str) -> dict:
+        """Load a JSON state file from the cache directory."""
+        state_file = self.cache_dir / name
+        if not state_file.exists():
+            return {}
+        try:
+            return json.loads(state_file.read_text())
+        except ValueError:
+            self.warn(f"Ignoring corrupt state file: {state_file}")
+            return {}
+
+    def save_state(self, name: str, state: dict) -> None:
+        """Write a JSON state file to the cache directory."""
+        state_file = self.cache_dir / name
+        state_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = state_file.with_name(f".{name}.{os.getpid()}")
+        tmp.write_text(json.dumps(state, indent=2, sort_keys=True))
+        os.replace(tmp, state_file)
+
+    @contextmanager
+    def locked_state(self, name: str):
+        """
+        Load a JSON state file for update and save it after the with-block,
+        holding a lock so that concurrent dm processes don't lose updates.
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.cache_dir / f".{name}.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            state = self.load_state(name)
+            yield state
+            self.save_state(name, state)
@@ -1,5 +1,7 @@
 import os
 
+from django_mongodb_cli.testing.databases import suffix_databases
+
 MONGODB_URI = os.environ.get("MONGODB_URI", "mongodb://localhost:27017")
 DATABASES = {
     "default": {
@@ -8,7 +10,11 @@ DATABASES = {
         "HOST": MONGODB_URI,
     }
 }
+suffix_databases(DATABASES)
 DEFAULT_AUTO_FIELD = "django_mongodb_backend.fields.ObjectIdAutoField"
 PASSWORD_HASHERS = ("django.contrib.auth.hashers.MD5PasswordHasher",)
 SECRET_KEY = "django_tests_secret_key"
+# `dm repo test` swaps in its runner to record per-test timings
+if os.environ.get("DM_TEST_RUNNER"):
+    TEST_RUNNER = os.environ["DM_TEST_RUNNER"]
 USE_TZ = False
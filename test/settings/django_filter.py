@@ -3,10 +3,17 @@ from django_filters.conf import DEFAULTS
 
 import os
 import django_mongodb_backend
+from django_mongodb_cli.testing.databases import suffix_databases
 
 DATABASE_URL = os.environ.get("MONGODB_URI", "mongodb://localhost:27017/djangotests")
 DATABASES = {"default": django_mongodb_backend.parse_uri(DATABASE_URL)}
 
+suffix_databases(DATABASES)
+
+# `dm repo test` swaps in its runner to record per-test timings
+if os.environ.get("DM_TEST_RUNNER"):
+    TEST_RUNNER = os.environ["DM_TEST_RUNNER"]
+
 INSTALLED_APPS = (
     "tests.mongo_apps.MongoContentTypesConfig",
     "django.contrib.admin",
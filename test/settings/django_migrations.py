@@ -2,6 +2,7 @@ import sys
 import os
 
 from django_mongodb_backend import encryption, parse_uri
+from django_mongodb_cli.testing.databases import suffix_databases
 
 # Queryable Encryption settings
 KEY_VAULT_NAMESPACE = encryption.get_key_vault_namespace()
@@ -28,6 +29,12 @@ DATABASES = {
     ),
 }
 
+suffix_databases(DATABASES)
+
+# `dm repo test` swaps in its runner to record per-test timings
+if os.environ.get("DM_TEST_RUNNER"):
+    TEST_RUNNER = os.environ["DM_TEST_RUNNER"]
+
 DEFAULT_AUTO_FIELD = "django_mongodb_backend.fields.ObjectIdAutoField"
 PASSWORD_HASHERS = ("django.contrib.auth.hashers.MD5PasswordHasher",)
 SECRET_KEY = "django_tests_secret_key"
@@ -2,10 +2,13 @@
 
 import os
 import django_mongodb_backend
+from django_mongodb_cli.testing.databases import suffix_databases
 
 DATABASE_URL = os.environ.get("MONGODB_URI", "mongodb://localhost:27017/djangotests")
 DATABASES = {"default": django_mongodb_backend.parse_uri(DATABASE_URL)}
 
+suffix_databases(DATABASES)
+
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 
 
@@ -2,6 +2,7 @@ import os
 
 
 from pymongo.encryption import AutoEncryptionOpts
+from django_mongodb_cli.testing.databases import suffix_databases
 
 
 MONGODB_URI = os.environ.get("MONGODB_URI", "mongodb://localhost:27017")
@@ -59,6 +60,12 @@ DATABASES = {
     },
 }
 
+suffix_databases(DATABASES)
+
+# `dm repo test` swaps in its runner to record per-test timings
+if os.environ.get("DM_TEST_RUNNER"):
+    TEST_RUNNER = os.environ["DM_TEST_RUNNER"]
+
 
 class EncryptedRouter:
     def db_for_read(self, model, **hints):
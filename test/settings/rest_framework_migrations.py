@@ -2,10 +2,23 @@ import os
 
 import django_mongodb_backend
 
+from django_mongodb_cli.testing.databases import suffix_databases
+from django_mongodb_cli.testing.transactions import rollback_test_cases
+from django_mongodb_cli.testing.truncate import truncate_touched_collections
+
 DATABASE_URL = os.environ.get("MONGODB_URI", "mongodb://localhost:27017/djangotests")
 
 DEBUG_PROPAGATE_EXCEPTIONS = (True,)
 DATABASES = {"default": django_mongodb_backend.parse_uri(DATABASE_URL)}
+
+suffix_databases(DATABASES)
+
+# Flushes between tests only empty the collections each test wrote to
+truncate_touched_collections(DATABASES)
+
+# TestCase tests roll back a transaction instead, on replica sets
+rollback_test_cases(DATABASES)
+
 SITE_ID = 1
 SECRET_KEY = "not very secret in tests"
 USE_I18N = True
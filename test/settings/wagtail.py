@@ -1,6 +1,10 @@
 import os
 import django_mongodb_backend
 
+from django_mongodb_cli.testing.databases import suffix_databases
+from django_mongodb_cli.testing.transactions import rollback_test_cases
+from django_mongodb_cli.testing.truncate import truncate_touched_collections
+
 from bson import ObjectId
 from django.contrib.messages import constants as message_constants
 from django.utils.translation import gettext_lazy as _
@@ -258,6 +262,18 @@ MESSAGE_TAGS = {
 MONGODB_URI = os.environ.get("MONGODB_URI", "mongodb://localhost:27017/wagtail")
 DATABASES["default"] = django_mongodb_backend.parse_uri(MONGODB_URI)
 
+suffix_databases(DATABASES)
+
+# Flushes between tests only empty the collections each test wrote to
+truncate_touched_collections(DATABASES)
+
+# TestCase tests roll back a transaction instead, on replica sets
+rollback_test_cases(DATABASES)
+
+# `dm repo test` swaps in its runner to record per-test timings
+if os.environ.get("DM_TEST_RUNNER"):
+    TEST_RUNNER = os.environ["DM_TEST_RUNNER"]
+
 MIGRATION_MODULES = {
     "admin": None,
     "auth": None,
@@ -0,0 +1,20 @@
+import pytest
+
+from django_mongodb_cli import utils
+
+
+@pytest.fixture
+def runner(tmp_path, monkeypatch):
+    """A test runner for an empty workspace, running pytest suites in tmp_path."""
+    pyproject = tmp_path / "pyproject.toml"
+    pyproject.write_text(
+        "[tool.django-mongodb-cli]\n"
+        "repos = []\n"
+        'path = "src"\n'
+        f'cache_dir = "{tmp_path / ".dm"}"\n'
+    )
+    runner = utils.Test(pyproject)
+    monkeypatch.setattr(runner, "info", lambda text: None)
+    monkeypatch.setattr(runner, "_runner_kind", lambda: "pytest")
+    monkeypatch.setattr(runner, "_test_cwd", lambda: str(tmp_path))
+    return runner
@@ -0,0 +1,135 @@
+import textwrap
+
+import pytest
+
+from django_mongodb_cli import catalog
+
+
+def write(path, source):
+    path.write_text(textwrap.dedent(source))
+    return path
+
+
+def test_parse(tmp_path):
+    file = write(
+        tmp_path / "test_a.py",
+        """
+        import pytest
+
+        def test_function():
+            pass
+
+        def helper():
+            pass
+
+        @pytest.mark.slow
+        @pytest.mark.parametrize("x", [1, 2, 3])
+        def test_parametrized(x):
+            pass
+
+        class Base:
+            def test_inherited(self):
+                pass
+
+        @pytest.mark.django_db
+        class TestThing(Base):
+            @pytest.mark.parametrize("x,y", argvalues=[(1, 2), (3, 4)])
+            @pytest.mark.parametrize("z", range(3))
+            def test_method(self, x, y, z):
+                pass
+
+            def not_a_test(self):
+                pass
+
+        class Helper:
+            def test_ignored(self):
+                pass
+        """,
+    )
+    assert catalog.TestCatalog.parse(file) == [
+        ["", "test_function", 1, []],
+        ["", "test_parametrized", 3, ["parametrize", "slow"]],
+        ["TestThing", "test_inherited", 1, ["django_db"]],
+        ["TestThing", "test_method", 2, ["django_db", "parametrize"]],
+    ]
+
+
+def test_parse_unittest_classes(tmp_path):
+    file = write(
+        tmp_path / "tests.py",
+        """
+        from django.test import TestCase
+
+        class Mixin:
+            def test_shared(self):
+                pass
+
+        class ModelTests(Mixin, TestCase):
+            def test_create(self):
+                pass
+        """,
+    )
+    # Mixin has no bases and no Test prefix, so only its subclass counts
+    assert catalog.TestCatalog.parse(file) == [
+        ["ModelTests", "test_create", 1, []],
+        ["ModelTests", "test_shared", 1, []],
+    ]
+
+
+def test_parse_invalid_file(tmp_path):
+    file = write(tmp_path / "test_broken.py", "def test_x(:\n")
+    assert catalog.TestCatalog.parse(file) == []
+    assert catalog.TestCatalog.parse(tmp_path / "missing.py") == []
+
+
+def test_refresh_reparses_changed_files(tmp_path):
+    file = write(tmp_path / "test_a.py", "def test_one():\n    pass\n")
+    test_catalog = catalog.TestCatalog(tmp_path / "cache" / "catalog.json")
+    assert test_catalog.refresh([file]) == {str(file): [["", "test_one", 1, []]]}
+    assert str(file) in test_catalog.load()
+
+    write(file, "def test_one():\n    pass\n\ndef test_two():\n    pass\n")
+    tests = test_catalog.refresh([file])[str(file)]
+    assert [name for _, name, _, _ in tests] == ["test_one", "test_two"]
+
+    assert test_catalog.refresh([]) == {}
+    assert test_catalog.load() == {}
+
+
+@pytest.mark.parametrize(
+    "expression, names, expected",
+    [
+        ("", ["test_a.py", "test_x"], True),
+        ("foo", ["test_a.py", "TestFoo", "test_x"], True),
+        ("foo", ["test_a.py", "test_x"], False),
+        ("foo and not bar", ["test_foo_bar"], False),
+        ("foo and not bar", ["test_foo"], True),
+        ("(foo or bar) and baz", ["test_bar_baz"], True),
+        ("(foo or bar) and baz", ["test_bar"], False),
+        ("x[1]", ["test_x[1]"], True),
+    ],
+)
+def test_pytest_keyword_matcher(expression, names, expected):
+    assert catalog.pytest_keyword_matcher(expression)(names) is expected
+
+
+@pytest.mark.parametrize(
+    "expression", ["foo bar", "foo (bar)", "not", "foo and (", "()"]
+)
+def test_pytest_keyword_matcher_invalid(expression):
+    with pytest.raises(ValueError, match="Invalid -k expression"):
+        catalog.pytest_keyword_matcher(expression)
+
+
+@pytest.mark.parametrize(
+    "pattern, test_id, expected",
+    [
+        ("query", "queries.tests.QueryTests.test_query", True),
+        ("Query", "queries.tests.QueryTests.test_x", True),
+        ("query", "queries.tests.QueryTests.test_x", False),
+        ("*Tests.test_q*", "queries.tests.QueryTests.test_query", True),
+        ("queries.*.test_x", "queries.tests.QueryTests.test_y", False),
+    ],
+)
+def test_unittest_keyword_matcher(pattern, test_id, expected):
+    assert catalog.unittest_keyword_matcher(pattern)(test_id) is expected
@@ -0,0 +1,50 @@
+import pytest
+
+
+@pytest.mark.parametrize(
+    "test, file, label",
+    [
+        ("tests.test_a.test_x", "tests/test_a.py", "tests/test_a.py::test_x"),
+        (
+            "tests.test_a.TestA.test_x",
+            "tests/test_a.py",
+            "tests/test_a.py::TestA::test_x",
+        ),
+        (
+            "tests.test_a.TestA.Inner.test_x",
+            "tests/test_a.py",
+            "tests/test_a.py::TestA::Inner::test_x",
+        ),
+        (
+            "tests.test_a.test_x[1.5-a.b]",
+            "tests/test_a.py",
+            "tests/test_a.py::test_x[1.5-a.b]",
+        ),
+        # Collection errors carry no file
+        ("tests.test_a", None, None),
+        # A class name that doesn't start with the module can't be rerun
+        ("other.test_x", "tests/test_a.py", None),
+    ],
+)
+def test_failure_label_pytest(runner, test, file, label):
+    assert runner._failure_label(test, file) == label
+
+
+def test_failure_label_pytest_rootdir_above_cwd(runner, tmp_path):
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "tests" / "test_a.py").write_text("")
+    label = runner._failure_label("repo.tests.test_a.test_x", "repo/tests/test_a.py")
+    assert label == "tests/test_a.py::test_x"
+
+
+@pytest.mark.parametrize(
+    "test, label",
+    [
+        ("queries.tests.QueryTests.test_x", "queries.tests.QueryTests.test_x"),
+        ("setUpClass (queries.tests.QueryTests)", "queries.tests.QueryTests"),
+        ("unittest.loader._FailedTest.queries", "queries"),
+    ],
+)
+def test_failure_label_django(runner, monkeypatch, test, label):
+    monkeypatch.setattr(runner, "_runner_kind", lambda: "django")
+    assert runner._failure_label(test, None) == label
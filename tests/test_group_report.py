@@ -0,0 +1,90 @@
+import json
+
+import pytest
+
+
+def write_report(path, outcomes):
+    """Write a JUnit XML report with one test case per ``name: outcome``."""
+    tags = {"failed": "<failure message='boom'/>", "skipped": "<skipped/>"}
+    body = "".join(
+        f"<testcase classname='tests.A' name='{name}' time='0.5'>"
+        f"{tags.get(outcome, '')}</testcase>"
+        for name, outcome in outcomes.items()
+    )
+    path.write_text(f"<testsuites><testsuite>{body}</testsuite></testsuites>")
+    return path
+
+
+@pytest.fixture
+def status(runner, tmp_path, monkeypatch):
+    """The status of a group run of four repositories, with their results."""
+    monkeypatch.setattr(runner, "_workspace_heads", lambda: {"django": "f" * 40})
+    store = runner.timing_store
+    results = {
+        "passing": {"test_ok": "passed", "test_skip": "skipped"},
+        "failing": {"test_ok": "passed", "test_bad": "failed"},
+    }
+    for name, outcomes in results.items():
+        report = write_report(tmp_path / f"{name}.xml", outcomes)
+        store.record_run(name, None, None, "", 1.0, {report: "tests"})
+
+    def entry(returncode, cached=0):
+        return {
+            "start": 10.0,
+            "end": 12.0,
+            "cached": cached,
+            "last_run": 0,
+            "log": tmp_path / "run.log",
+            "returncode": returncode,
+        }
+
+    return {
+        "passing": entry(0),
+        "failing": entry(1),
+        "crashing": entry(-9),
+        "cached": entry(0, cached=3),
+    }
+
+
+def test_group_report(runner, status, tmp_path):
+    report = runner._group_report(status, ["--keepdb"], 5.0)
+    assert report["elapsed"] == 5.0
+    assert report["options"] == ["--keepdb"]
+    assert report["workspace"] == {"django": "f" * 40}
+    libraries = report["libraries"]
+    assert {name: library["status"] for name, library in libraries.items()} == {
+        "passing": "passed",
+        "failing": "failed",
+        "crashing": "crashed",
+        "cached": "cached",
+    }
+    assert libraries["passing"] == {
+        "status": "passed",
+        "returncode": 0,
+        "start_error": None,
+        "passed": 1,
+        "failed": 0,
+        "error": 0,
+        "skipped": 1,
+        "cached_labels": 0,
+        "duration": 2.0,
+        "log": str(tmp_path / "run.log"),
+        "failures": [],
+    }
+    assert libraries["failing"]["failures"] == [
+        {"test": "tests.A.test_bad", "outcome": "failed", "message": "boom"}
+    ]
+    assert libraries["cached"]["cached_labels"] == 3
+
+
+def test_write_group_report(runner, status, tmp_path):
+    report = runner._group_report(status, [], 5.0)
+    runner._write_group_report(report, tmp_path)
+    assert json.loads((tmp_path / "report.json").read_text()) == report
+    markdown = (tmp_path / "report.md").read_text()
+    assert "- django at `ffffffffffff`" in markdown
+    assert "| passing | passed | 1 | 0 | 0 | 1 | 0 | 2s |" in markdown
+    assert "## passing" not in markdown
+    assert "- `tests.A.test_bad` (failed): boom" in markdown
+    assert "## crashing\n\n`dm repo test` exited with -9" in markdown
+    assert "## cached" not in markdown
@@ -0,0 +1,56 @@
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def warms(runner, tmp_path, monkeypatch):
+    """
+    Clone repositories a, b and c, where a and b share a pre-commit config,
+    and record the directories ``install-hooks`` runs in instead of running it.
+    """
+    configs = {"a": "repos: []\n", "b": "repos: []\n", "c": "repos: [x]\n"}
+    for name, config in configs.items():
+        (tmp_path / "src" / name).mkdir(parents=True)
+        (tmp_path / "src" / name / ".pre-commit-config.yaml").write_text(config)
+    store = tmp_path / "store"
+    monkeypatch.setenv("PRE_COMMIT_HOME", str(store))
+    monkeypatch.setattr(runner, "pre_commit_cmd", lambda: "pre-commit")
+    monkeypatch.setattr(
+        runner, "ensure_repo", lambda name: (tmp_path / "src" / name, None)
+    )
+    for name in ("ok", "err"):
+        monkeypatch.setattr(runner, name, lambda text: None)
+    # Both distinct configs must be installing at the same time to finish
+    barrier = threading.Barrier(2, timeout=5)
+    warms = []
+
+    def run_capture(args, cwd=None, env=None):
+        assert args == ["pre-commit", "install-hooks"]
+        warms.append(cwd.name)
+        barrier.wait()
+        (store / cwd.name).mkdir(parents=True, exist_ok=True)
+        return 0, ""
+
+    monkeypatch.setattr(runner, "run_capture", run_capture)
+    return warms
+
+
+def test_warm_hooks_concurrently_once_per_config(runner, warms):
+    runner.warm_hooks(["a", "b", "c"], jobs=2)
+    assert sorted(warms) == ["a", "c"]
+    state = runner.load_state("hooks.json")
+    assert set(state) == {"a", "b", "c"}
+    assert state["a"] == state["b"] != state["c"]
+
+
+def test_warm_hooks_skips_unchanged_configs(runner, warms, tmp_path):
+    runner.warm_hooks(["a", "b", "c"], jobs=2)
+    runner.warm_hooks(["a", "b", "c"], jobs=2)
+    assert len(warms) == 2
+
+    # A cleaned store is warmed again
+    for path in (tmp_path / "store").iterdir():
+        path.rmdir()
+    runner.warm_hooks(["a", "b", "c"], jobs=2)
+    assert len(warms) == 4
@@ -0,0 +1,47 @@
+import subprocess
+
+from django_mongodb_cli.impact import ImpactMap, git_blob_hash
+
+
+def test_git_blob_hash(tmp_path):
+    path = tmp_path / "module.py"
+    path.write_text("print('hello')\n")
+    expected = subprocess.run(
+        ["git", "hash-object", str(path)], capture_output=True, text=True, check=True
+    ).stdout.strip()
+    assert git_blob_hash(path) == expected
+
+
+def test_blobs(tmp_path):
+    impact_map = ImpactMap(tmp_path)
+    impact_map.save("a", {"a": "abc"}, {"a/x.py": "1", "a/y.py": "2"})
+    impact_map.save("b", {"b": "def"}, {"a/x.py": "3"})
+    assert impact_map.blobs("a", {"a/x.py", "a/y.py", "a/z.py"}) == {
+        "a/x.py": "1",
+        "a/y.py": "2",
+    }
+    assert impact_map.blobs("b", {"a/x.py"}) == {"a/x.py": "3"}
+
+
+def test_blobs_of_many_files(tmp_path):
+    impact_map = ImpactMap(tmp_path)
+    blobs = {f"src/{i}.py": str(i) for i in range(1234)}
+    impact_map.save("a", {}, blobs)
+    assert impact_map.blobs("a", set(blobs)) == blobs
+
+
+def test_save_replaces_the_previous_build(tmp_path):
+    impact_map = ImpactMap(tmp_path)
+    impact_map.save("a", {}, {"a/x.py": "1", "a/y.py": "2"})
+    impact_map.save("a", {}, {"a/x.py": "3"})
+    assert impact_map.blobs("a", {"a/x.py", "a/y.py"}) == {"a/x.py": "3"}
+
+
+def test_heads_need_coverage_data(tmp_path):
+    impact_map = ImpactMap(tmp_path)
+    assert impact_map.heads("a") is None
+    impact_map.save("a", {"a": "abc"}, {})
+    assert impact_map.heads("a") is None
+    impact_map.coverage_file("a").touch()
+    assert impact_map.heads("a") == {"a": "abc"}
+    assert impact_map.heads("b") is None
@@ -0,0 +1,53 @@
+import threading
+
+import pytest
+
+from django_mongodb_cli import utils
+
+
+def test_reserve_holds_jobs_for_the_block():
+    budget = utils.JobBudget(8)
+    with budget.reserve(3):
+        assert budget.available == 5
+        with budget.reserve(5):
+            assert budget.available == 0
+        assert budget.available == 5
+    assert budget.available == 8
+
+
+def test_reservations_are_capped_at_the_total():
+    budget = utils.JobBudget(4)
+    with budget.reserve(16):
+        assert budget.available == 0
+    assert budget.available == 4
+
+
+def test_no_jobs_reserve_nothing():
+    budget = utils.JobBudget(0)
+    assert budget.total == 1
+    with budget.reserve(None), budget.reserve(0):
+        assert budget.available == 1
+
+
+def test_jobs_are_released_on_errors():
+    budget = utils.JobBudget(2)
+    with pytest.raises(RuntimeError), budget.reserve(2):
+        raise RuntimeError
+    assert budget.available == 2
+
+
+def test_reserve_waits_for_free_jobs():
+    budget = utils.JobBudget(4)
+    reserved = threading.Event()
+
+    def build():
+        with budget.reserve(2):
+            reserved.set()
+
+    with budget.reserve(3):
+        thread = threading.Thread(target=build)
+        thread.start()
+        assert not reserved.wait(0.1)
+    assert reserved.wait(5)
+    thread.join()
+    assert budget.available == 4
@@ -0,0 +1,89 @@
+from pathlib import Path
+
+import pytest
+from git import Actor
+from git import Repo as GitRepo
+
+from django_mongodb_cli import utils
+
+AUTHOR = Actor("dm", "dm@example.com")
+
+
+def commit(repo, files):
+    """Commit ``files``, a mapping of path to contents, to ``repo``."""
+    for name, text in files.items():
+        (Path(repo.working_tree_dir) / name).write_text(text)
+    repo.index.add(list(files))
+    repo.index.commit("Change", author=AUTHOR, committer=AUTHOR)
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """
+    A workspace with ``lib`` cloned from an upstream, changed on its branch
+    and in its working tree, and ``clean`` with hooks but no changes.
+    """
+    pyproject = tmp_path / "pyproject.toml"
+    pyproject.write_text(
+        f'[tool.django-mongodb-cli]\nrepos = []\npath = "{tmp_path / "src"}"\n'
+    )
+    origin = GitRepo.init(tmp_path / "origin")
+    commit(origin, {"mod.py": "", "gone.py": "", ".pre-commit-config.yaml": ""})
+
+    lib = GitRepo.clone_from(origin.working_tree_dir, tmp_path / "src" / "lib")
+    path = Path(lib.working_tree_dir)
+    commit(lib, {"branch.py": ""})
+    (path / "mod.py").write_text("x = 1\n")
+    (path / "new.py").write_text("")
+    (path / "gone.py").unlink()
+
+    clean = GitRepo.init(tmp_path / "src" / "clean")
+    commit(clean, {".pre-commit-config.yaml": ""})
+    GitRepo.init(tmp_path / "src" / "unhooked")
+
+    workspace = utils.Repo(pyproject)
+    workspace.commands = []
+    workspace.rows = []
+    monkeypatch.setattr(workspace, "info", lambda text: None)
+    monkeypatch.setattr(workspace, "err", lambda text: None)
+    monkeypatch.setattr(workspace, "_msg", lambda text, fg: workspace.rows.append(text))
+    monkeypatch.setattr(workspace, "pre_commit_cmd", lambda: "prek")
+
+    def run_capture(args, cwd=None, env=None):
+        workspace.commands.append((args, cwd))
+        return 1, "mod.py: lint error\n"
+
+    monkeypatch.setattr(workspace, "run_capture", run_capture)
+    return workspace
+
+
+def test_changed_files(workspace):
+    assert workspace.changed_files("lib") == ["branch.py", "mod.py", "new.py"]
+    assert workspace.changed_files("lib", include_deleted=True) == [
+        "branch.py",
+        "gone.py",
+        "mod.py",
+        "new.py",
+    ]
+    assert workspace.changed_files("clean") == []
+
+
+def test_lint_repos(workspace, tmp_path):
+    assert not workspace.lint_repos(["lib", "clean", "unhooked"], jobs=2)
+    assert workspace.commands == [
+        (
+            ["prek", "run", "--files", "branch.py", "mod.py", "new.py"],
+            tmp_path / "src" / "lib",
+        )
+    ]
+    statuses = [row.split()[:3] for row in workspace.rows]
+    assert statuses == [
+        ["lib", "3", "failed"],
+        ["clean", "0", "clean"],
+        ["unhooked", "0", "no"],
+    ]
+
+
+def test_lint_repos_without_changes(workspace):
+    assert workspace.lint_repos(["clean", "unhooked"])
+    assert workspace.commands == []
@@ -0,0 +1,105 @@
+import sys
+
+import pytest
+import typer
+from git import Repo as GitRepo
+
+from django_mongodb_cli import utils
+
+
+@pytest.fixture
+def package(tmp_path, monkeypatch):
+    """
+    A package installer for a workspace with one group of one repository,
+    installed from two directories, recording the commands it runs.
+    """
+    pyproject = tmp_path / "pyproject.toml"
+    pyproject.write_text(
+        '[project]\nname = "workspace"\n\n'
+        "[tool.django-mongodb-cli]\n"
+        "repos = []\n"
+        f'path = "{tmp_path / "src"}"\n\n'
+        "[tool.django-mongodb-cli.groups]\n"
+        'web = ["lib"]\n\n'
+        "[tool.django-mongodb-cli.install.lib]\n"
+        'install_dirs = ["core", "extra"]\n'
+        'extras = ["test"]\n'
+        'groups = ["dev"]\n'
+        'env_vars = [{name = "LIB_BUILD", value = 1}]\n'
+    )
+    lib = tmp_path / "src" / "lib"
+    GitRepo.init(lib)
+    (lib / "core").mkdir()
+    (lib / "core" / "pyproject.toml").write_text(
+        "[dependency-groups]\n"
+        'dev = ["pytest>=8", {include-group = "lint"}]\n'
+        'lint = ["ruff"]\n'
+    )
+    (lib / "extra").mkdir()
+
+    package = utils.Package(pyproject)
+    package.commands = []
+    for name in ("info", "ok", "err"):
+        monkeypatch.setattr(package, name, lambda text: None)
+
+    def run(args, cwd=None, check=True, env=None):
+        package.commands.append((args, cwd, env))
+        return True
+
+    monkeypatch.setattr(package, "run", run)
+    return package
+
+
+def test_lock_path(package, tmp_path):
+    assert package.lock_path("web") == tmp_path / "locks" / "web.txt"
+    package.tool_cfg["lock_dir"] = "ci/locks"
+    assert package.lock_path("web") == tmp_path / "ci" / "locks" / "web.txt"
+
+
+def test_lock_group(package, tmp_path):
+    lock_path = tmp_path / "locks" / "web.txt"
+    assert package.lock_group("web") == lock_path
+    assert lock_path.with_suffix(".in").read_text().splitlines() == [
+        "# project",
+        "-e ..",
+        "# lib",
+        "-e ../src/lib/core[test]",
+        "pytest>=8",
+        "ruff",
+        "-e ../src/lib/extra[test]",
+    ]
+    [(args, cwd, env)] = package.commands
+    assert args == [
+        "uv",
+        "pip",
+        "compile",
+        str(lock_path.with_suffix(".in")),
+        "--output-file",
+        str(lock_path),
+        "--python",
+        sys.executable,
+    ]
+    assert cwd == lock_path.parent
+    assert env["LIB_BUILD"] == "1"
+
+
+def test_lock_unknown_group(package):
+    assert package.lock_group("api") is None
+    assert package.commands == []
+
+
+def test_install_locked(package, tmp_path):
+    lock_path = tmp_path / "locks" / "web.txt"
+    lock_path.parent.mkdir()
+    lock_path.write_text("pytest==8.0.0\n")
+    package.install_locked("web")
+    [(args, cwd, env)] = package.commands
+    assert args == ["uv", "pip", "sync", str(lock_path)]
+    assert cwd == lock_path.parent
+    assert env["LIB_BUILD"] == "1"
+
+
+def test_install_locked_without_lock(package):
+    with pytest.raises(typer.Exit):
+        package.install_locked("web")
+    assert package.commands == []
@@ -0,0 +1,83 @@
+import pytest
+
+FLAKY = "tests/test_a.py::test_flaky"
+BROKEN = "tests/test_a.py::test_broken"
+
+
+@pytest.fixture
+def runs(runner, tmp_path, monkeypatch):
+    """
+    Run the test processes of ``runner`` in memory: each records its command
+    and environment, and reports test_broken failing and test_flaky passing.
+    """
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "tests" / "test_a.py").write_text("")
+    runs = []
+
+    def run_test_process(repo_name, test_command, cwd, env, nice=False):
+        runs.append((test_command, env))
+        report = next(
+            arg.removeprefix("--junitxml=")
+            for arg in test_command
+            if arg.startswith("--junitxml=")
+        )
+        cases = "".join(
+            f"<testcase classname='tests.test_a' name='{name}' "
+            f"file='tests/test_a.py' time='0.1'>{failure}</testcase>"
+            for name, failure in (
+                ("test_broken", "<failure message='boom'/>"),
+                ("test_flaky", ""),
+            )
+        )
+        with open(report, "w") as f:
+            f.write(f"<testsuites><testsuite>{cases}</testsuite></testsuites>")
+        return 1
+
+    monkeypatch.setattr(runner, "_run_test_process", run_test_process)
+    monkeypatch.setattr(runner, "_flaky_labels", lambda *args: [FLAKY])
+    monkeypatch.setattr(runner, "mongodb_topology", lambda uri: "standalone")
+    for name in ("title", "ok", "warn"):
+        monkeypatch.setattr(runner, name, lambda text: None)
+    runner.cache_dir.mkdir()
+    runner.set_result_cache(False)
+    return runs
+
+
+def run(runner, labels=None):
+    runner.test_settings = {"test_command": "pytest"}
+    runner._run_selected(
+        "a", ["pytest"], ["tests"], str(runner._test_cwd()), {}, labels
+    )
+
+
+def test_quarantine_runs_the_deselected_labels(runner, runs):
+    runner.quarantine = True
+    run(runner, ["tests"])
+    (command, env), (quarantined, quarantined_env) = runs
+    assert "DM_DESELECT" in env
+    assert "django_mongodb_cli.testing.pytest_plugin" in command
+    assert quarantined[1] == FLAKY
+    assert "DM_DESELECT" not in quarantined_env
+    assert "django_mongodb_cli.testing.pytest_plugin" not in quarantined
+
+
+def test_reruns_are_not_deselected(runner, runs):
+    runner.quarantine = True
+    runner.rerun_failures = 2
+    run(runner, ["tests"])
+    # The main run, the quarantined tests, then one process per attempt
+    assert len(runs) == 4
+    for command, env in runs[2:]:
+        assert command[1] == BROKEN
+        assert "DM_DESELECT" not in env
+    assert runner.timing_store.failures("a") == {
+        "tests.test_a.test_broken": {"file": "tests/test_a.py", "run_id": 1}
+    }
+
+
+def test_no_quarantine_without_flaky_tests(runner, runs, monkeypatch):
+    monkeypatch.setattr(runner, "_flaky_labels", lambda *args: [])
+    runner.quarantine = True
+    run(runner, ["tests"])
+    [(_, env)] = runs
+    assert "DM_DESELECT" not in env
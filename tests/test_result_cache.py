@@ -0,0 +1,64 @@
+import itertools
+import json
+
+import pytest
+
+
+@pytest.fixture
+def commands(runner, tmp_path, monkeypatch):
+    """
+    Give ``runner`` a pytest suite with two test directories where
+    ``one/test_a.py`` passed before with the same inputs, and record the
+    commands of its test processes instead of running them.
+    """
+    for name in ("one/test_a.py", "one/test_b.py", "two/test_c.py"):
+        (tmp_path / name).parent.mkdir(exist_ok=True)
+        (tmp_path / name).write_text("def test_x():\n    pass\n")
+    runner.test_settings = {"test_command": "pytest", "test_dirs": ["one", "two"]}
+    keys = {label: f"key-{label}" for label in runner._test_labels(str(tmp_path))}
+    monkeypatch.setattr(runner, "_result_cache_keys", lambda *args: keys)
+    monkeypatch.setattr(runner, "mongodb_topology", lambda uri: "standalone")
+    runner.cache_dir.mkdir()
+    (runner.cache_dir / "test-cache.json").write_text(
+        json.dumps({"a": {"one/test_a.py": "key-one/test_a.py"}})
+    )
+    for name in ("title", "ok", "warn", "_msg"):
+        monkeypatch.setattr(runner, name, lambda *args: None)
+    commands = []
+
+    def run_test_process(repo_name, test_command, cwd, env, nice=False):
+        # Leave out the JUnit XML options
+        commands.append(
+            list(itertools.takewhile(lambda a: not a.startswith("-"), test_command))
+        )
+        return 0
+
+    monkeypatch.setattr(runner, "_run_test_process", run_test_process)
+    return commands
+
+
+def run(runner):
+    runner._run_selected(
+        "a", ["pytest"], ["one", "two"], runner._test_cwd(), {}, labels=None
+    )
+
+
+def test_cached_labels_keep_the_per_directory_runs(runner, commands):
+    run(runner)
+    assert commands == [
+        ["pytest", "one/test_b.py"],
+        ["pytest", "two/test_c.py"],
+    ]
+
+
+def test_no_cache_runs_every_directory(runner, commands):
+    runner.set_result_cache(False)
+    run(runner)
+    assert commands == [["pytest", "one"], ["pytest", "two"]]
+
+
+def test_labels_by_dir(runner, commands, tmp_path):
+    assert runner._labels_by_dir(["one/test_a.py"], ["one", "two"], str(tmp_path)) == {
+        "one": ["one/test_a.py"]
+    }
+    assert runner._labels_by_dir(["other.py"], ["one"], str(tmp_path)) is None
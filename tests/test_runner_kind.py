@@ -0,0 +1,48 @@
+import pytest
+
+from django_mongodb_cli import utils
+
+
+@pytest.fixture
+def tester(tmp_path):
+    """A test runner for an empty workspace, guessing its runner kind."""
+    pyproject = tmp_path / "pyproject.toml"
+    pyproject.write_text("[tool.django-mongodb-cli]\nrepos = []\n")
+    tester = utils.Test(pyproject)
+    tester.set_jobs(4)
+    return tester
+
+
+@pytest.mark.parametrize(
+    ("test_command", "test_options", "kind"),
+    [
+        (None, [], "pytest"),
+        ("pytest", [], "pytest"),
+        ("./runtests.py", [], "django"),
+        ("python tests/runtests.py", [], "django"),
+        ("python", ["manage.py", "test"], "django"),
+        ("python", ["manage.py", "check"], "other"),
+        ("just", ["test"], "other"),
+    ],
+)
+def test_runner_kind(tester, test_command, test_options, kind):
+    tester.test_settings = {"test_command": test_command, "test_options": test_options}
+    assert tester._runner_kind() == kind
+
+
+def test_configured_runner_wins(tester):
+    tester.test_settings = {"test_command": "just", "runner": "pytest"}
+    assert tester._runner_kind() == "pytest"
+
+
+def test_jobs_only_parallelize_django(tester):
+    tester.test_settings = {"test_command": "./runtests.py"}
+    assert tester._test_command("a") == ["./runtests.py", "--parallel", "4"]
+    tester.test_settings = {"test_command": "just", "test_options": ["test"]}
+    assert tester._test_command("a") == ["just", "test"]
+
+
+def test_other_commands_are_not_instrumented(tester, tmp_path):
+    tester.junit_dir = tmp_path
+    tester.test_settings = {"test_command": "just"}
+    assert tester._instrument(["just", "test"], {}, "a") == (["just", "test"], {})
@@ -0,0 +1,49 @@
+from pathlib import Path
+
+
+def shard(runner, monkeypatch, labels, durations):
+    monkeypatch.setattr(runner, "_test_labels", lambda cwd: labels)
+    monkeypatch.setattr(runner, "_unit_durations", lambda repo, labels: durations)
+    shards = []
+    for index in range(1, 4):
+        runner.shard = (index, 3)
+        shards.append(runner._shard_labels("a", "."))
+    return shards
+
+
+def test_shard_labels_by_duration(runner, monkeypatch):
+    labels = {name: [Path(f"{name}.py")] for name in "abcdef"}
+    durations = {"a": 10.0, "b": 6.0, "c": 5.0, "d": 4.0, "e": 3.0, "f": 2.0}
+    # Heaviest label to the lightest shard: 10 | 6 + 3 + 2 | 5 + 4
+    assert shard(runner, monkeypatch, labels, durations) == [
+        ["a"],
+        ["b", "e", "f"],
+        ["c", "d"],
+    ]
+
+
+def test_shard_labels_without_history(runner, monkeypatch):
+    labels = {
+        "big": [Path(f"big/{i}.py") for i in range(4)],
+        "mid": [Path("mid/0.py"), Path("mid/1.py")],
+        "one": [Path("one.py")],
+        "two": [Path("two.py")],
+    }
+    assert shard(runner, monkeypatch, labels, {}) == [["big"], ["mid"], ["one", "two"]]
+
+
+def test_shard_labels_weigh_untimed_labels_like_known_ones(runner, monkeypatch):
+    labels = {
+        "timed": [Path("timed/0.py"), Path("timed/1.py")],
+        "fast": [Path("fast.py")],
+        "new": [Path(f"new/{i}.py") for i in range(3)],
+    }
+    # 2s per file on average, so the untimed label weighs 6s
+    shards = shard(runner, monkeypatch, labels, {"timed": 4.0, "fast": 0.5})
+    assert shards == [["new"], ["timed"], ["fast"]]
+
+
+def test_shards_cover_every_label_once(runner, monkeypatch):
+    labels = {f"label{i}": [Path(f"{i}.py")] * (i % 4 + 1) for i in range(20)}
+    shards = shard(runner, monkeypatch, labels, {})
+    assert sorted(label for labels in shards for label in labels) == sorted(labels)
@@ -0,0 +1,98 @@
+from django_mongodb_cli.timings import TimingStore
+
+
+def write_report(path, cases):
+    """Write a JUnit XML report with ``(classname, name, outcome)`` cases."""
+    tags = {"failed": "<failure message='boom'/>", "skipped": "<skipped/>"}
+    body = "".join(
+        f"<testcase classname='{classname}' name='{name}' file='tests/test_a.py' "
+        f"time='0.5'>{tags.get(outcome, '')}</testcase>"
+        for classname, name, outcome in cases
+    )
+    path.write_text(f"<testsuites><testsuite>{body}</testsuite></testsuites>")
+    return path
+
+
+def test_parse_junit(tmp_path):
+    report = write_report(
+        tmp_path / "report.xml",
+        [("tests.A", "test_ok", "passed"), ("tests.A", "test_bad", "failed")],
+    )
+    assert TimingStore.parse_junit(report) == [
+        {
+            "test": "tests.A.test_ok",
+            "file": "tests/test_a.py",
+            "outcome": "passed",
+            "duration": 0.5,
+            "message": "",
+        },
+        {
+            "test": "tests.A.test_bad",
+            "file": "tests/test_a.py",
+            "outcome": "failed",
+            "duration": 0.5,
+            "message": "boom",
+        },
+    ]
+
+
+def test_parse_junit_unreadable(tmp_path):
+    (tmp_path / "broken.xml").write_text("<testsuites>")
+    assert TimingStore.parse_junit(tmp_path / "broken.xml") == []
+    assert TimingStore.parse_junit(tmp_path / "missing.xml") == []
+
+
+def test_record_run(tmp_path):
+    store = TimingStore(tmp_path / "timings.sqlite")
+    report = write_report(
+        tmp_path / "report.xml",
+        [("tests.A", "test_ok", "passed"), ("tests.A", "test_skip", "skipped")],
+    )
+    assert store.record_run("a", "abc", None, "standalone", 1.0, {report: "tests"}) == 2
+    assert store.last_run_id("a") == 1
+    assert store.tests_since("a", 0) == {"tests.A.test_ok", "tests.A.test_skip"}
+    assert store.failures("a") == {}
+    assert store.flaky_tests("a") == {}
+
+
+def test_record_run_without_results(tmp_path):
+    store = TimingStore(tmp_path / "timings.sqlite")
+    report = write_report(tmp_path / "report.xml", [])
+    assert store.record_run("a", None, None, "", 1.0, {report: "tests"}) == 0
+    assert store.last_run_id("a") == 0
+
+
+def test_rerun_that_passes_is_flaky(tmp_path):
+    store = TimingStore(tmp_path / "timings.sqlite")
+    first = write_report(
+        tmp_path / "first.xml",
+        [("tests.A", "test_flaky", "failed"), ("tests.A", "test_broken", "failed")],
+    )
+    rerun = write_report(
+        tmp_path / "rerun.xml",
+        [("tests.A", "test_flaky", "passed"), ("tests.A", "test_broken", "failed")],
+    )
+    recorded = store.record_run(
+        "a", None, None, "", 1.0, {first: "tests", rerun: "tests"}, {rerun: 1}
+    )
+    # The rerun replaces the outcome instead of adding a second result
+    assert recorded == 2
+    assert list(store.failures("a")) == ["tests.A.test_broken"]
+    flaky = store.flaky_tests("a")
+    assert list(flaky) == ["tests.A.test_flaky"]
+    assert flaky["tests.A.test_flaky"]["flaky"] == 1
+    assert flaky["tests.A.test_flaky"]["runs"] == 1
+    assert flaky["tests.A.test_flaky"]["recent"]
+
+
+def test_flaky_tests_age_out_of_recent_runs(tmp_path):
+    store = TimingStore(tmp_path / "timings.sqlite")
+    store.HISTORY = 2
+    first = write_report(tmp_path / "first.xml", [("tests.A", "test_x", "failed")])
+    rerun = write_report(tmp_path / "rerun.xml", [("tests.A", "test_x", "passed")])
+    store.record_run("a", None, None, "", 1.0, {first: "t", rerun: "t"}, {rerun: 1})
+    for _ in range(2):
+        store.record_run("a", None, None, "", 1.0, {rerun: "t"})
+    flaky = store.flaky_tests("a")["tests.A.test_x"]
+    assert flaky["runs"] == 3
+    assert not flaky["recent"]
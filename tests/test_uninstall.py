@@ -0,0 +1,87 @@
+import importlib.metadata
+import os
+import sys
+
+import pytest
+from git import Repo as GitRepo
+
+from django_mongodb_cli import utils
+
+
+@pytest.fixture
+def package(tmp_path, monkeypatch):
+    """
+    A package installer for a workspace of repositories declaring their
+    distribution names in different ways, recording the commands it runs.
+    """
+    pyproject = tmp_path / "pyproject.toml"
+    pyproject.write_text(
+        "[tool.django-mongodb-cli]\n"
+        "repos = []\n"
+        f'path = "{tmp_path / "src"}"\n'
+        f'cache_dir = "{tmp_path / ".dm"}"\n\n'
+        "[tool.django-mongodb-cli.install.tools]\n"
+        'install_dirs = ["one", "two"]\n'
+    )
+    metadata = {
+        "core/pyproject.toml": '[project]\nname = "pkg-core"\n',
+        "tools/one/setup.cfg": "[metadata]\nname = pkg-core\n",
+        "tools/two/setup.py": 'setup(name="pkg-tools")\n',
+        "bare/README": "",
+    }
+    for path, text in metadata.items():
+        repo_name = path.split("/")[0]
+        GitRepo.init(tmp_path / "src" / repo_name)
+        (tmp_path / "src" / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / "src" / path).write_text(text)
+
+    installed = {"pkg-core", "pkg-tools"}
+
+    def distribution(name):
+        if name not in installed:
+            raise importlib.metadata.PackageNotFoundError(name)
+
+    monkeypatch.setattr(importlib.metadata, "distribution", distribution)
+
+    package = utils.Package(pyproject)
+    package.commands = []
+    package.skipped = []
+    for name in ("info", "ok"):
+        monkeypatch.setattr(package, name, lambda text: None)
+    monkeypatch.setattr(package, "warn", package.skipped.append)
+
+    def run(args, cwd=None, check=True, env=None):
+        package.commands.append(args)
+        return True
+
+    monkeypatch.setattr(package, "run", run)
+    return package
+
+
+def test_uninstall_packages(package):
+    package.uninstall_packages(["core", "tools", "bare"])
+    assert package.commands == [
+        [sys.executable, "-m", "pip", "uninstall", "-y", "pkg-core", "pkg-tools"]
+    ]
+    assert package.skipped == ["bare is not installed, skipping."]
+
+
+def test_nothing_to_uninstall(package):
+    package.uninstall_packages(["bare"])
+    assert package.commands == []
+
+
+def test_distribution_names_are_cached(package, tmp_path):
+    cache = {}
+    assert package.distribution_names("core", cache) == ["pkg-core"]
+    metadata = tmp_path / "src" / "core" / "pyproject.toml"
+    assert cache == {
+        str(metadata.parent): {"name": "pkg-core", "mtime": metadata.stat().st_mtime}
+    }
+    # Unchanged metadata isn't read again
+    cache[str(metadata.parent)]["name"] = "pkg-cached"
+    assert package.distribution_names("core", cache) == ["pkg-cached"]
+
+    metadata.write_text('[project]\nname = "pkg-renamed"\n')
+    os.utime(metadata, (0, cache[str(metadata.parent)]["mtime"] + 1))
+    assert package.distribution_names("core", cache) == ["pkg-renamed"]
@@ -0,0 +1,84 @@
+import os
+
+import pytest
+
+from django_mongodb_cli import watch
+
+
+def event(wd, mask, name=""):
+    """Pack an inotify event, its name padded as the kernel does."""
+    encoded = os.fsencode(name)
+    if encoded:
+        encoded += b"\0" * (16 - len(encoded) % 16)
+    return watch.INOTIFY_EVENT.pack(wd, mask, 0, len(encoded)) + encoded
+
+
+@pytest.fixture
+def watcher(tmp_path):
+    watcher = watch.FileWatcher([tmp_path])
+    if watcher.mode != "inotify":
+        pytest.skip("inotify isn't available")
+    yield watcher
+    watcher.close()
+
+
+def root_wd(watcher, path):
+    return next(wd for wd, directory in watcher.dirs.items() if directory == path)
+
+
+def test_events(watcher, tmp_path):
+    wd = root_wd(watcher, tmp_path)
+    data = (
+        event(wd, watch.IN_CLOSE_WRITE, "models.py")
+        + event(wd, watch.IN_DELETE, "old.py")
+        + event(wd, watch.IN_CLOSE_WRITE, "models.py")
+    )
+    assert watcher._events(data) == {tmp_path / "models.py", tmp_path / "old.py"}
+
+
+def test_events_ignore_backups_and_unknown_watches(watcher, tmp_path):
+    wd = root_wd(watcher, tmp_path)
+    data = (
+        event(wd, watch.IN_CLOSE_WRITE, ".models.py.swp")
+        + event(wd, watch.IN_CLOSE_WRITE, "models.py~")
+        + event(wd, watch.IN_CREATE, "4913")
+        + event(wd + 100, watch.IN_CLOSE_WRITE, "models.py")
+    )
+    assert watcher._events(data) == set()
+
+
+def test_events_watch_new_directories(watcher, tmp_path):
+    wd = root_wd(watcher, tmp_path)
+    (tmp_path / "pkg" / "sub").mkdir(parents=True)
+    changed = watcher._events(event(wd, watch.IN_CREATE | watch.IN_ISDIR, "pkg"))
+    assert changed == set()
+    assert {tmp_path / "pkg", tmp_path / "pkg" / "sub"} <= set(watcher.dirs.values())
+
+
+def test_events_overflow_reports_the_roots(watcher, tmp_path):
+    assert watcher._events(event(-1, watch.IN_Q_OVERFLOW)) == {tmp_path}
+
+
+def test_events_forget_removed_watches(watcher, tmp_path):
+    wd = root_wd(watcher, tmp_path)
+    assert watcher._events(event(wd, watch.IN_IGNORED)) == set()
+    assert wd not in watcher.dirs
+
+
+def test_wait(watcher, tmp_path):
+    (tmp_path / "tests.py").write_text("")
+    (tmp_path / ".hidden.py").write_text("")
+    assert watcher.wait() == {tmp_path / "tests.py"}
+
+
+def test_polling(tmp_path, monkeypatch):
+    monkeypatch.setattr(watch, "WATCH_POLL_INTERVAL", 0.01)
+    (tmp_path / "kept.py").write_text("")
+    (tmp_path / "removed.py").write_text("")
+    watcher = watch.FileWatcher([tmp_path])
+    watcher._poll_instead()
+    assert watcher.mode == "polling"
+    (tmp_path / "removed.py").unlink()
+    (tmp_path / "added.py").write_text("")
+    (tmp_path / "added.py~").write_text("")
+    assert watcher._changes(None) == {tmp_path / "removed.py", tmp_path / "added.py"}